@@ -0,0 +1,56 @@
+"""Benchmark building a per-request config from layers
+
+Compares copying the base and merging the overrides with
+`update_recursively` against a `ChainDiot` overlay, both followed by a few
+lookups.
+
+Usage:
+    python benchmarks/bench_chain.py
+"""
+from time import perf_counter
+
+from diot import ChainDiot, Diot
+
+N_SECTIONS = 200
+N_KEYS = 50
+N_REQUESTS = 2_000
+
+
+def main() -> None:
+    defaults = Diot(
+        {
+            f"section{i}": {f"key{j}": j for j in range(N_KEYS)}
+            for i in range(N_SECTIONS)
+        }
+    )
+    env = Diot({f"section{i}": {"key0": -1} for i in range(0, N_SECTIONS, 10)})
+    tenant = Diot({"section1": {"key1": -2}})
+    base = ChainDiot(tenant, env, defaults)
+
+    def lookups(conf: Diot) -> None:
+        conf.section1.key1
+        conf.section10.key0
+        conf.section5.key5
+
+    start = perf_counter()
+    for i in range(N_REQUESTS):
+        conf = Diot(defaults.to_dict())
+        conf.update_recursively(env)
+        conf.update_recursively(tenant)
+        conf.update_recursively({"section5": {"key5": i}})
+        lookups(conf)
+    t_merge = perf_counter() - start
+
+    start = perf_counter()
+    for i in range(N_REQUESTS):
+        conf = base.new_child(Diot({"section5": {"key5": i}}))
+        lookups(conf)
+    t_chain = perf_counter() - start
+
+    print(f"{N_SECTIONS * N_KEYS} keys, {N_REQUESTS} requests")
+    print(f"copy + update_recursively: {t_merge / N_REQUESTS * 1e6:10.1f} us/request")
+    print(f"ChainDiot.new_child:       {t_chain / N_REQUESTS * 1e6:10.1f} us/request")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Benchmark deep copying diot trees
+
+Compares the previous `Diot.__deepcopy__` (running the constructor,
+deep copying the configurations and setting every value through
+`__setitem__`) with the current iterative one, on a config-like tree of
+sections, nested settings and lists of records.
+
+Usage:
+    python benchmarks/bench_deepcopy.py
+"""
+from copy import deepcopy
+from time import perf_counter
+from typing import Any, Dict, Optional
+
+from diot import Diot, OrderedDiot
+from diot.diot import _set_config
+
+N_SECTIONS = 100
+N_RUNS = 5
+
+
+class PreviousDiot(Diot):
+    _nest_lazily = False
+
+    def __deepcopy__(self, memo: Optional[Dict[int, Any]] = None) -> Diot:
+        out = self.__class__()
+        _set_config(out, deepcopy(self.__diot__))
+
+        memo = memo or {}
+        memo[id(self)] = out
+        for key, value in self.items():
+            out[key] = deepcopy(value, memo)
+        return out
+
+
+def make_config() -> Dict[str, Any]:
+    return {
+        f"service-{i}": {
+            "host": f"host{i}.example.com",
+            "port": 8000 + i,
+            "enabled": i % 2 == 0,
+            "timeouts": {"connect": 1.5, "read": 30, "write": 30},
+            "tags": ["web", "internal", f"team{i % 7}"],
+            "replicas": [
+                {"zone": f"z{j}", "weight": j, "labels": {"tier": "a"}}
+                for j in range(10)
+            ],
+        }
+        for i in range(N_SECTIONS)
+    }
+
+
+def measure(name: str, conf: Diot) -> None:
+    # convert the lazy lists, to copy the same trees
+    for section in conf.values():
+        list(section.replicas)
+    start = perf_counter()
+    for _ in range(N_RUNS):
+        copied = deepcopy(conf)
+    elapsed = (perf_counter() - start) / N_RUNS
+    assert copied == conf
+    print(f"{name:12s} {elapsed * 1000:8.2f} ms")
+
+
+def main() -> None:
+    data = make_config()
+    measure("previous", PreviousDiot(data))
+    measure("Diot", Diot(data))
+    measure("OrderedDiot", OrderedDiot(data))
+
+
+if __name__ == "__main__":
+    main()
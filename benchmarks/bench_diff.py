@@ -0,0 +1,70 @@
+"""Benchmark diffing two large configs
+
+Compares converting both trees with `to_dict()` and diffing the dicts in
+python with `Diot.diff()`, on plain diots and on versions published by
+`VersionedDiot`, where unchanged subtrees are shared.
+
+Usage:
+    python benchmarks/bench_diff.py
+"""
+from time import perf_counter
+from typing import Any, Dict, List, Tuple
+
+from diot import Diot, VersionedDiot
+
+N_SECTIONS = 500
+N_KEYS = 200
+
+
+def dict_diff(old: Any, new: Any, path: Tuple = ()) -> List[Tuple]:
+    if isinstance(old, dict) and isinstance(new, dict):
+        out = []
+        for key in old.keys() | new.keys():
+            if key not in new:
+                out.append(("remove", path + (key,)))
+            elif key not in old:
+                out.append(("add", path + (key,)))
+            else:
+                out.extend(dict_diff(old[key], new[key], path + (key,)))
+        return out
+    return [] if old == new else [("replace", path)]
+
+
+def timeit(func: Any, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = perf_counter()
+        func()
+        best = min(best, perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    data: Dict[str, Any] = {
+        f"section{i}": {f"key{j}": {"value": j} for j in range(N_KEYS)}
+        for i in range(N_SECTIONS)
+    }
+    patch = {f"section{i}": {"key0": {"value": -1}} for i in range(0, 500, 50)}
+
+    before = Diot(data)
+    after = Diot(data)
+    after.update_recursively(patch)
+
+    t_dict = timeit(lambda: dict_diff(before.to_dict(), after.to_dict()))
+    t_diot = timeit(lambda: list(before.diff(after)))
+
+    versioned = VersionedDiot(data)
+    snap_before = versioned.snapshot()
+    versioned.update_recursively(patch)
+    snap_after = versioned.snapshot()
+    t_snap = timeit(lambda: list(snap_before.diff(snap_after)))
+
+    n_changes = len(list(before.diff(after)))
+    print(f"{N_SECTIONS * N_KEYS} leaves, {n_changes} changes")
+    print(f"to_dict + dict diff:      {t_dict * 1000:8.1f} ms")
+    print(f"Diot.diff:                {t_diot * 1000:8.1f} ms")
+    print(f"Diot.diff on snapshots:   {t_snap * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
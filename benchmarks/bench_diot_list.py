@@ -0,0 +1,53 @@
+"""Benchmark diots holding a large list of dictionaries
+
+Compares converting the items of the list right away (the previous
+behavior) with converting them lazily in `DiotList`, in the time and the
+memory to create the diot and read the first item, and to iterate over
+all the items afterwards (twice).
+
+Usage:
+    python benchmarks/bench_diot_list.py
+"""
+import tracemalloc
+from time import perf_counter
+
+from diot import Diot
+
+N_ITEMS = 50_000
+
+
+class EagerDiot(Diot):
+    _nest_lazily = False
+
+
+def measure(diot_class: type) -> None:
+    records = [{"id": i, "name": f"r{i}", "tags": ["a", "b"]} for i in range(N_ITEMS)]
+    tracemalloc.start()
+    start = perf_counter()
+    d = diot_class(records=records)
+    assert d.records[0].id == 0
+    first = perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    iterations = []
+    for _ in range(2):
+        start = perf_counter()
+        assert sum(rec.id for rec in d.records) == N_ITEMS * (N_ITEMS - 1) // 2
+        iterations.append(perf_counter() - start)
+
+    print(
+        f"{diot_class.__name__:10s} create + items[0]: {first * 1000:8.2f} ms "
+        f"{peak / 1e6:6.2f} MB, iterate: "
+        + ", ".join(f"{elapsed * 1000:7.2f} ms" for elapsed in iterations)
+    )
+
+
+def main() -> None:
+    print(f"{N_ITEMS} items")
+    measure(EagerDiot)
+    measure(Diot)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""Benchmark ingesting nested environment variables
+
+Compares `Diot.from_env` with setting the variables one by one by their
+dotted paths.
+
+Usage:
+    python benchmarks/bench_from_env.py
+"""
+from time import perf_counter
+
+from diot import Diot
+
+N_SECTIONS = 20
+N_KEYS = 25
+N_RUNS = 50
+
+ENVIRON = {
+    f"APP__SECTION{i}__SUB__KEY{j}": str(j)
+    for i in range(N_SECTIONS)
+    for j in range(N_KEYS)
+}
+
+
+def by_paths() -> Diot:
+    out = Diot()
+    for name, value in ENVIRON.items():
+        out.set_path(tuple(name.lower().split("__")[1:]), value)
+    return out
+
+
+def from_env() -> Diot:
+    return Diot.from_env("APP", environ=ENVIRON)
+
+
+def main() -> None:
+    assert by_paths() == from_env()
+    print(f"{len(ENVIRON)} variables")
+    for func in (by_paths, from_env):
+        start = perf_counter()
+        for _ in range(N_RUNS):
+            func()
+        elapsed = (perf_counter() - start) / N_RUNS
+        print(f"{func.__name__:10s} {elapsed * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Benchmark loading a directory of config fragments
+
+Writes 200 yaml/json fragments to a temporary directory, and compares
+loading them serially with the thread pool and the process pool of
+`Diot.load_dir`.
+
+Usage:
+    python benchmarks/bench_load_dir.py
+"""
+import json
+import os
+import tempfile
+from pathlib import Path
+from time import perf_counter
+
+import yaml
+
+from diot import Diot
+
+N_FILES = 200
+N_KEYS = 200
+
+
+def write_fragments(root: Path) -> None:
+    for i in range(N_FILES):
+        data = {
+            f"section{i % 20}": {
+                f"key{j}": {"value": i, "tags": [i, j]} for j in range(N_KEYS)
+            }
+        }
+        if i % 2:
+            (root / f"{i:03d}.json").write_text(json.dumps(data))
+        else:
+            (root / f"{i:03d}.yaml").write_text(yaml.safe_dump(data))
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        write_fragments(root)
+
+        results = {}
+        for name, kwargs in [
+            ("serial", {"workers": 1}),
+            ("threads", {"workers": 8}),
+            ("processes", {"processes": True}),
+        ]:
+            start = perf_counter()
+            conf = Diot.load_dir(root, **kwargs)
+            results[name] = perf_counter() - start
+            assert conf.section0.key0.value == 180
+
+    print(f"{N_FILES} files, {os.cpu_count()} cpus")
+    for name, elapsed in results.items():
+        print(f"{name:10s} {elapsed * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
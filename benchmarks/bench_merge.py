@@ -0,0 +1,58 @@
+"""Benchmark deep-merging several sources into a diot
+
+Compares sequential `update_recursively` calls with a single `merge`.
+
+Usage:
+    python benchmarks/bench_merge.py
+"""
+from time import perf_counter
+from typing import Any, Callable, Dict, List
+
+from diot import Diot
+
+N_SOURCES = 20
+N_SECTIONS = 100
+N_KEYS = 50
+
+
+def make_sources() -> List[Dict[str, Any]]:
+    return [
+        {
+            f"section{i}": {
+                f"key{j}": {"value": s, "tags": [s]} for j in range(N_KEYS)
+            }
+            for i in range(N_SECTIONS)
+        }
+        for s in range(N_SOURCES)
+    ]
+
+
+def timeit(func: Callable[[], Any], repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = perf_counter()
+        func()
+        best = min(best, perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    sources = make_sources()
+
+    def sequential() -> None:
+        d = Diot()
+        for source in sources:
+            d.update_recursively(source)
+
+    def merged() -> None:
+        Diot().merge(*sources)
+
+    t_seq = timeit(sequential)
+    t_merge = timeit(merged)
+    print(f"{N_SOURCES} sources x {N_SECTIONS * N_KEYS} keys")
+    print(f"update_recursively x {N_SOURCES}: {t_seq * 1000:8.1f} ms")
+    print(f"merge:                    {t_merge * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
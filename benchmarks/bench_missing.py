@@ -0,0 +1,47 @@
+"""Benchmark miss-heavy attribute and item access
+
+Usage:
+    python benchmarks/bench_missing.py
+"""
+from timeit import timeit
+
+from diot import Diot
+
+N = 200_000
+
+
+def main() -> None:
+    keys = [f"key{i}" for i in range(100)]
+    probes = [f"key{i}" for i in range(0, 200, 2)]  # half of them missing
+    d_none = Diot({key: 1 for key in keys}, diot_missing=None)
+    d_default = Diot({key: 1 for key in keys})
+    d_func = Diot({key: 1 for key in keys}, diot_missing=lambda key, _: 0)
+
+    def getattr_none():
+        for probe in probes:
+            getattr(d_none, probe)
+
+    def getitem_none():
+        for probe in probes:
+            d_none[probe]
+
+    def getattr_func():
+        for probe in probes:
+            getattr(d_func, probe)
+
+    def getattr_default():
+        for probe in probes:
+            getattr(d_default, probe, None)
+
+    def hits():
+        for key in keys:
+            getattr(d_default, key)
+
+    number = N // len(probes)
+    for func in (getattr_none, getitem_none, getattr_func, getattr_default, hits):
+        elapsed = timeit(func, number=number)
+        print(f"{func.__name__:>16}: {elapsed / N * 1e9:8.1f} ns/access")
+
+
+if __name__ == "__main__":
+    main()
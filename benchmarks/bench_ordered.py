@@ -0,0 +1,46 @@
+"""Benchmark building and trimming OrderedDiot objects at different sizes
+
+Usage:
+    python benchmarks/bench_ordered.py
+"""
+from time import perf_counter
+
+from diot import OrderedDiot
+
+
+def build(n: int) -> OrderedDiot:
+    od = OrderedDiot()
+    for i in range(n):
+        od[f"k{i}"] = i
+    return od
+
+
+def insert_before(n: int) -> None:
+    od = OrderedDiot(k=0)
+    for i in range(n):
+        od.insert_before("k", f"k{i}", i)
+
+
+def trim(od: OrderedDiot) -> None:
+    for i in range(0, len(od), 2):
+        del od[f"k{i}"]
+
+
+def main() -> None:
+    for n in (1_000, 10_000, 100_000):
+        start = perf_counter()
+        od = build(n)
+        built = perf_counter()
+        trim(od)
+        trimmed = perf_counter()
+        insert_before(n)
+        inserted = perf_counter()
+        print(
+            f"n={n:>7}: build {built - start:8.3f}s  "
+            f"delete half {trimmed - built:8.3f}s  "
+            f"insert_before {inserted - trimmed:8.3f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
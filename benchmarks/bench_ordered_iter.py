@@ -0,0 +1,28 @@
+"""Benchmark iterating and copying a large OrderedDiot
+
+Usage:
+    python benchmarks/bench_ordered_iter.py
+"""
+from time import perf_counter
+
+from diot import OrderedDiot
+
+N = 1_000_000
+
+
+def main() -> None:
+    od = OrderedDiot([(f"k{i}", i) for i in range(N)])
+
+    for name, func in (
+        ("keys", lambda: sum(1 for _ in od.keys())),
+        ("values", lambda: sum(od.values())),
+        ("items", lambda: sum(1 for _ in od.items())),
+        ("copy", od.copy),
+    ):
+        start = perf_counter()
+        func()
+        print(f"{name:>6}: {perf_counter() - start:8.3f}s")
+
+
+if __name__ == "__main__":
+    main()
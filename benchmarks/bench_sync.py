@@ -0,0 +1,58 @@
+"""Benchmark the throughput of a shared diot under a thread pool
+
+A reloader thread keeps patching the diot while request threads read from
+it. Run it with the free-threaded build (e.g. python3.13t) to see how the
+readers scale without the GIL.
+
+Usage:
+    python benchmarks/bench_sync.py
+"""
+import sys
+import threading
+from time import perf_counter
+
+from diot import Diot, SyncDiot
+
+N_READERS = 16
+N_READS = 20_000
+
+
+def run(diot_class: type) -> float:
+    conf = diot_class(
+        {f"section{i}": {f"key{j}": j for j in range(20)} for i in range(20)}
+    )
+    stop = threading.Event()
+
+    def reloader() -> None:
+        i = 0
+        while not stop.is_set():
+            conf.update_recursively({f"section{i % 20}": {"key0": i}})
+            i += 1
+
+    def reader() -> None:
+        for i in range(N_READS):
+            conf[f"section{i % 20}"].get(f"key{i % 20}")
+
+    writer = threading.Thread(target=reloader)
+    readers = [threading.Thread(target=reader) for _ in range(N_READERS)]
+    writer.start()
+    start = perf_counter()
+    for thread in readers:
+        thread.start()
+    for thread in readers:
+        thread.join()
+    elapsed = perf_counter() - start
+    stop.set()
+    writer.join()
+    return N_READERS * N_READS / elapsed
+
+
+def main() -> None:
+    gil = getattr(sys, "_is_gil_enabled", lambda: True)()
+    print(f"Python {sys.version.split()[0]}, GIL enabled: {gil}")
+    for diot_class in (Diot, SyncDiot):
+        print(f"{diot_class.__name__:>8}: {run(diot_class):12,.0f} reads/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Benchmark exporting a diot tree to plain python objects
+
+The tree has sections of diots holding large lists of numbers, which have
+no diots inside. Compares the previous recursive `to_dict` with the
+current one, by default and with `share=True`, in time and peak memory.
+
+Usage:
+    python benchmarks/bench_to_dict.py
+"""
+import tracemalloc
+from time import perf_counter
+from typing import Any, Callable
+
+from diot import Diot
+
+N_SECTIONS = 100
+N_ITEMS = 10_000
+
+
+def to_dict_recursive(value: Any) -> Any:
+    """The previous implementation of `utils.to_dict`"""
+    if isinstance(value, dict):
+        return {key: to_dict_recursive(val) for key, val in value.items()}
+    if isinstance(value, tuple):
+        return tuple(to_dict_recursive(val) for val in value)
+    if isinstance(value, list):
+        return [to_dict_recursive(val) for val in value]
+    return value
+
+
+def measure(func: Callable[[], Any]) -> None:
+    start = perf_counter()
+    func()
+    elapsed = perf_counter() - start
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{func.__name__:12s} {elapsed * 1000:8.1f} ms {peak / 1e6:8.1f} MB")
+
+
+def main() -> None:
+    tree = Diot(
+        {
+            f"section{i}": {
+                "values": list(range(N_ITEMS)),
+                "meta": {"name": f"s{i}", "tags": ["a", "b"]},
+            }
+            for i in range(N_SECTIONS)
+        }
+    )
+
+    def recursive() -> Any:
+        return to_dict_recursive(tree)
+
+    def default() -> Any:
+        return tree.to_dict()
+
+    def share() -> Any:
+        return tree.to_dict(share=True)
+
+    assert recursive() == default() == share()
+    for func in (recursive, default, share):
+        measure(func)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Benchmark transforming the keys when creating and filling diots
+
+Compares the previous `safe_transform` (regular expressions for every
+key) with the current one (fast paths for identifiers and ints), for a
+sparse id map keyed by ints and a diot keyed by identifiers.
+
+Usage:
+    python benchmarks/bench_transform.py
+"""
+import keyword
+import re
+from time import perf_counter
+from typing import Any, Callable, Dict
+
+from diot import Diot
+
+N_KEYS = 100_000
+
+
+def previous_safe_transform(item: Any) -> str:
+    """The previous implementation of `transforms.safe_transform`"""
+    if isinstance(item, bytes):
+        item = item.decode("utf-8")
+    item = str(item)
+    item = re.sub(r"[^A-Za-z0-9_]+", ".", item)
+    item = re.sub(r"_?\.+|\.+_?", "_", item)
+    if not item:
+        return ""
+    return "_" + item if item[0] in "0123456789" or item in keyword.kwlist else item
+
+
+def measure(data: Dict[Any, Any], transform: Callable[..., str]) -> float:
+    start = perf_counter()
+    d = Diot(data, diot_transform=transform)
+    for key in data:
+        d[key] = 0
+    return perf_counter() - start
+
+
+def main() -> None:
+    from diot.transforms import safe_transform
+
+    for name, data in [
+        ("int keys", {i * 7: i for i in range(N_KEYS)}),
+        ("identifiers", {f"key_{i}": i for i in range(N_KEYS)}),
+    ]:
+        before = measure(data, previous_safe_transform)
+        after = measure(data, safe_transform)
+        print(
+            f"{name:12s} previous: {before * 1000:8.1f} ms, "
+            f"current: {after * 1000:8.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Benchmark wrapping a large dictionary for attribute access
+
+Compares converting a `json.loads` result into a diot with wrapping it
+with `Diot.view`, in time and the memory allocated, and the cost of
+reading a nested value afterwards.
+
+Usage:
+    python benchmarks/bench_view.py
+"""
+import json
+import tracemalloc
+from time import perf_counter
+from typing import Any, Callable
+
+from diot import Diot
+
+N_RECORDS = 20_000
+N_READS = 100_000
+
+PAYLOAD = json.dumps(
+    {
+        f"record-{i}": {"user": {"first-name": f"u{i}", "age": i}, "tags": ["a"]}
+        for i in range(N_RECORDS)
+    }
+)
+
+
+def measure(name: str, wrap: Callable[[Any], Any]) -> None:
+    data = json.loads(PAYLOAD)
+    tracemalloc.start()
+    start = perf_counter()
+    wrapped = wrap(data)
+    elapsed = perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = perf_counter()
+    for _ in range(N_READS):
+        wrapped.record_7.user.first_name
+    reads = perf_counter() - start
+    print(
+        f"{name:6s} wrap: {elapsed * 1000:8.2f} ms {peak / 1e6:7.2f} MB, "
+        f"read: {reads / N_READS * 1e6:5.2f} us"
+    )
+
+
+def main() -> None:
+    measure("Diot", Diot)
+    measure("view", Diot.view)
+
+
+if __name__ == "__main__":
+    main()
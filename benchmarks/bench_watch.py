@@ -0,0 +1,77 @@
+"""Benchmark re-reading a config file on a timer
+
+Compares rebuilding a diot from the file on every check with a
+`Diot.watch_file` handle, both when the file is unchanged and when one
+value in it changes.
+
+Usage:
+    python benchmarks/bench_watch.py
+"""
+import os
+import tempfile
+from pathlib import Path
+from time import perf_counter
+
+import yaml
+
+from diot import Diot
+from diot.loaders import load_file
+
+N_SECTIONS = 50
+N_KEYS = 100
+N_CHECKS = 20
+
+
+def write(path: Path, value: int) -> None:
+    data = {
+        f"section{i}": {f"key{j}": {"value": j, "tags": [i, j]} for j in range(N_KEYS)}
+        for i in range(N_SECTIONS)
+    }
+    data["section0"]["key0"]["value"] = value
+    path.write_text(yaml.safe_dump(data))
+    # make sure the modification time changes
+    os.utime(path, ns=(value * 1_000_000_000, value * 1_000_000_000))
+
+
+def rebuild(path: Path, changed: bool) -> float:
+    elapsed = 0.0
+    for i in range(N_CHECKS):
+        if changed:
+            write(path, i)
+        start = perf_counter()
+        conf = Diot(load_file(path))
+        assert conf.section0.key0.value == (i if changed else 0)
+        elapsed += perf_counter() - start
+    return elapsed
+
+
+def watch(path: Path, changed: bool) -> float:
+    conf = Diot.watch_file(path, interval=0)
+    conf.refresh()  # the first load
+    elapsed = 0.0
+    for i in range(N_CHECKS):
+        if changed:
+            write(path, i)
+        start = perf_counter()
+        assert conf.section0.key0.value == (i if changed else 0)
+        elapsed += perf_counter() - start
+    return elapsed
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / "conf.yaml"
+        for changed in (False, True):
+            write(path, 0)
+            rebuilt = rebuild(path, changed)
+            write(path, 0)
+            watched = watch(path, changed)
+            label = "changed" if changed else "unchanged"
+            print(
+                f"{label:10s} rebuild: {rebuilt / N_CHECKS * 1000:7.2f} ms/check, "
+                f"watch_file: {watched / N_CHECKS * 1000:7.2f} ms/check"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -5,8 +5,18 @@ from .diot import (
     SnakeDiot,
     FrozenDiot,
     OrderedDiot,
+    SyncDiot,
     DiotFrozenError
 )
+from .collection import DiotCollection
+from .frame import DiotFrame
+from .versioned import VersionedDiot
+from .observable import ObservableDiot
+from .tracked import TrackedDiot
+from .chain import ChainDiot
+from .view import DiotView
+from .watch import FileDiot
+from .changes import Change
 
 __all__ = [
     "Diot",
@@ -14,7 +24,17 @@ __all__ = [
     "SnakeDiot",
     "FrozenDiot",
     "OrderedDiot",
+    "SyncDiot",
     "DiotFrozenError",
+    "DiotCollection",
+    "DiotFrame",
+    "VersionedDiot",
+    "ObservableDiot",
+    "TrackedDiot",
+    "ChainDiot",
+    "DiotView",
+    "FileDiot",
+    "Change",
 ]
 
 __version__ = "0.3.4"
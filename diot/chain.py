@@ -0,0 +1,240 @@
+"""Layered views of diots, deep-merged lazily"""
+from __future__ import annotations
+
+from collections.abc import Mapping, MutableMapping
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .diot import Diot
+from .paths import _MISSING, _match_key
+from .transforms import TRANSFORMS
+from .utils import to_dict
+
+
+def _version(mapping: Mapping[Any, Any]) -> Optional[int]:
+    """The version of a diot, None for other mappings that can't tell"""
+    config = getattr(mapping, "__dict__", {}).get("__diot__")
+    return None if config is None else config.get("version")
+
+
+class ChainDiot(MutableMapping):
+    """A deep-merged view of several diots (or dictionaries)
+
+    Like `collections.ChainMap`, `maps[0]` has the highest priority, and
+    writes and deletions only go to `maps[0]`. Different from `ChainMap`,
+    values that are mappings in several layers are merged as the way
+    `update_recursively` does, but lazily: nothing is copied, keys are
+    resolved through the layers when they are accessed.
+
+    The views of the nested levels are cached, until any layer at that level
+    changes (told by the versions of the diots; views from layers of other
+    mappings are not cached).
+
+    Examples:
+        >>> base = ChainDiot(env, defaults)
+        >>> conf = base.new_child(request_overrides)  # O(1)
+        >>> conf.db.host   # from the layer with the highest priority
+        >>> conf.db.port = 5432   # written to request_overrides
+
+    Args:
+        *maps: The layers, from the highest priority to the lowest
+    """
+
+    __slots__ = ("maps", "_parent", "_key", "_transform", "_cache", "_versions")
+
+    def __init__(self, *maps: Mapping[str, Any]) -> None:
+        self._init(list(maps) or [Diot()], None, None)
+
+    def _init(
+        self,
+        maps: List[Mapping[str, Any]],
+        parent: Optional[ChainDiot],
+        key: Any,
+    ) -> None:
+        set_attr = object.__setattr__
+        set_attr(self, "maps", maps)
+        # the view of the level above and the key to this level, so that the
+        # mapping can be created in the top layer when writing
+        set_attr(self, "_parent", parent)
+        set_attr(self, "_key", key)
+        set_attr(self, "_cache", {})
+        set_attr(self, "_versions", None)
+        transform = TRANSFORMS["safe"]
+        for mapping in maps:
+            config = getattr(mapping, "__dict__", {}).get("__diot__")
+            if config is not None:
+                transform = config["transform"]
+                break
+        set_attr(self, "_transform", transform)
+
+    def _child(self, maps: List[Mapping[str, Any]], key: Any) -> ChainDiot:
+        out = ChainDiot.__new__(ChainDiot)
+        out._init(maps, self, key)
+        return out
+
+    def _is_top(self) -> bool:
+        """Whether maps[0] is at the top layer"""
+        parent = self._parent
+        if parent is None:
+            return True
+        if not parent._is_top():
+            return False
+        top = parent.maps[0]
+        key = _match_key(top, self._key)
+        return key is not _MISSING and top[key] is self.maps[0]
+
+    def _writable(self) -> MutableMapping[str, Any]:
+        """Get the mapping of the top layer at this level, created if needed"""
+        if self._is_top():
+            return self.maps[0]  # type: ignore[return-value]
+
+        top = self._parent._writable()  # type: ignore[union-attr]
+        top[self._key] = {}
+        mapping = top[_match_key(top, self._key)]
+        self.maps.insert(0, mapping)
+        return mapping
+
+    def _cache_valid(self) -> bool:
+        """Check the versions of the layers, drop the cache if any changed"""
+        versions: Tuple[Any, ...] = tuple(
+            (id(mapping), _version(mapping)) for mapping in self.maps
+        )
+        if versions == self._versions:
+            return True
+        self._cache.clear()
+        if any(version is None for _, version in versions):
+            object.__setattr__(self, "_versions", None)
+            return False
+        object.__setattr__(self, "_versions", versions)
+        return True
+
+    def _cache_key(self, key: Any) -> Any:
+        return self._transform(key) if isinstance(key, str) else key
+
+    def __getitem__(self, key: Any) -> Any:
+        cacheable = self._cache_valid()
+        if cacheable:
+            cached = self._cache.get(self._cache_key(key))
+            if cached is not None:
+                return cached
+
+        submaps: List[Mapping[str, Any]] = []
+        subkey = _MISSING
+        for mapping in self.maps:
+            found = _match_key(mapping, key)
+            if found is _MISSING:
+                continue
+            value = mapping[found]
+            if not isinstance(value, Mapping):
+                if not submaps:
+                    return value
+                # shadowed by a non-mapping value
+                break
+            if subkey is _MISSING:
+                subkey = found
+            submaps.append(value)
+
+        if not submaps:
+            raise KeyError(key)
+
+        out = self._child(submaps, subkey)
+        if cacheable:
+            self._cache[self._cache_key(key)] = out
+        return out
+
+    def __getattr__(self, name: str) -> Any:
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(
+                f"{self.__class__.__name__} object has no attribute {name!r}"
+            ) from None
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        self[name] = value
+
+    def __delattr__(self, name: str) -> None:
+        try:
+            del self[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        mapping = self._writable()
+        found = _match_key(mapping, key)
+        mapping[key if found is _MISSING else found] = value
+
+    def __delitem__(self, key: Any) -> None:
+        """Delete a key from the top layer
+
+        Raises:
+            KeyError: when the key is not in the top layer
+        """
+        found = _MISSING
+        if self._is_top():
+            found = _match_key(self.maps[0], key)
+        if found is _MISSING:
+            raise KeyError(f"Key not found in the top layer: {key!r}")
+        del self.maps[0][found]  # type: ignore[attr-defined]
+
+    def __contains__(self, key: Any) -> bool:
+        return any(_match_key(mapping, key) is not _MISSING for mapping in self.maps)
+
+    def __iter__(self) -> Iterator[Any]:
+        seen = set()
+        for mapping in reversed(self.maps):
+            for key in mapping:
+                cache_key = self._cache_key(key)
+                if cache_key not in seen:
+                    seen.add(cache_key)
+                    yield key
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.maps!r})"
+
+    def new_child(self, mapping: Optional[Mapping[str, Any]] = None) -> ChainDiot:
+        """Create a chain with a new layer of the highest priority
+
+        Args:
+            mapping: The new layer, an empty diot if not given
+
+        Returns:
+            The new chain, sharing the layers with this one
+        """
+        return self.__class__(
+            Diot() if mapping is None else mapping,
+            *self.maps,
+        )
+
+    @property
+    def parents(self) -> ChainDiot:
+        """The chain without the top layer"""
+        return self.__class__(*self.maps[1:])
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Materialize the merged view as a python dictionary
+
+        Returns:
+            The merged dictionary
+        """
+        return {
+            key: value.to_dict()
+            if isinstance(value, ChainDiot)
+            else to_dict(value)
+            for key, value in self.items()
+        }
+
+    dict = as_dict = to_dict
+
+    def to_diot(self, diot_class: type = Diot) -> Diot:
+        """Materialize the merged view as a diot
+
+        Args:
+            diot_class: The diot class
+
+        Returns:
+            The merged diot
+        """
+        return diot_class(self.to_dict())
@@ -0,0 +1,372 @@
+"""Changes of diot trees"""
+from __future__ import annotations
+
+from collections.abc import Mapping
+from typing import (
+    Any,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from .paths import _MISSING, _match_key, compile_path, format_path
+
+
+class Change(NamedTuple):
+    """A change at a path of a diot tree
+
+    The kinds are named after the JSON Patch operations: `add` when the key
+    didn't exist, `remove` when the key is removed, and `replace` when the
+    value is changed.
+
+    Args:
+        kind: One of `add`, `remove` and `replace`
+        path: The path of the change, such as `a.b[0].c`, or the tuple of
+            the keys and indices, such as `("a", "b", 0, "c")`, from
+            `diff(..., raw=True)`
+        old: The old value, None for `add`
+        new: The new value, None for `remove`
+    """
+
+    kind: str
+    path: Union[str, Tuple[Any, ...]]
+    old: Any = None
+    new: Any = None
+
+
+def make_change(path: str, old: Any, new: Any) -> Optional[Change]:
+    """Make a change from the old and new values
+
+    Args:
+        path: The path of the change
+        old: The old value, `_MISSING` if the key didn't exist
+        new: The new value, `_MISSING` if the key is removed
+
+    Returns:
+        The change, or None if nothing changed
+    """
+    if old is _MISSING:
+        if new is _MISSING:
+            return None
+        return Change("add", path, None, new)
+    if new is _MISSING:
+        return Change("remove", path, old, None)
+    if old is new:
+        return None
+    return Change("replace", path, old, new)
+
+
+def to_pointer(segments: Sequence[Any]) -> str:
+    """Format path segments into a JSON Pointer (RFC 6901)
+
+    Args:
+        segments: The keys and indices
+
+    Returns:
+        The JSON Pointer, such as `/a/b/0`
+    """
+    return "".join(
+        "/" + str(seg).replace("~", "~0").replace("/", "~1")
+        for seg in segments
+    )
+
+
+def from_pointer(pointer: str) -> Tuple[str, ...]:
+    """Parse a JSON Pointer (RFC 6901) into the keys
+
+    Args:
+        pointer: The JSON Pointer, such as `/a/b/0`
+
+    Returns:
+        The keys. Indices of lists are kept as strings.
+
+    Raises:
+        ValueError: when the pointer is not empty and doesn't start with `/`
+    """
+    if not pointer:
+        return ()
+    if not pointer.startswith("/"):
+        raise ValueError(f"Invalid JSON Pointer: {pointer!r}")
+    return tuple(
+        seg.replace("~1", "/").replace("~0", "~")
+        for seg in pointer[1:].split("/")
+    )
+
+
+def _list_index(obj: List[Any], segment: str, op: str) -> int:
+    if segment == "-" and op == "add":
+        return len(obj)
+    try:
+        return int(segment)
+    except ValueError:
+        raise ValueError(f"Invalid list index: {segment!r}") from None
+
+
+def _apply(
+    obj: Any,
+    segments: Sequence[Any],
+    op: str,
+    value: Any,
+    path: Union[str, Tuple[Any, ...]],
+) -> None:
+    """Apply an add, replace or remove operation at path segments"""
+    parent = obj
+    for segment in segments[:-1]:
+        if isinstance(parent, list):
+            parent = parent[_list_index(parent, segment, "")]
+        else:
+            parent = parent[segment]
+
+    segment = segments[-1]
+    if isinstance(parent, list):
+        index = _list_index(parent, segment, op)
+        if op == "add":
+            if index > len(parent):
+                raise IndexError(f"Index out of range: {segment!r}")
+            parent.insert(index, value)
+        elif op == "replace":
+            parent[index] = value
+        else:
+            del parent[index]
+    elif op == "add":
+        parent[segment] = value
+    elif segment not in parent:
+        raise KeyError(path)
+    elif op == "replace":
+        parent[segment] = value
+    else:
+        del parent[segment]
+
+
+def apply_patch(obj: Any, patch: Iterable[Mapping[str, Any]]) -> None:
+    """Apply a JSON Patch (RFC 6902) to a tree in place
+
+    Only the `add`, `replace` and `remove` operations are supported. The
+    operations are applied one by one, so the earlier ones are kept if a
+    later one fails.
+
+    Args:
+        obj: The tree, a diot or a dictionary
+        patch: The operations, like `{"op": "add", "path": "/a", "value": 1}`
+
+    Raises:
+        ValueError: when an operation is not supported or the path is empty
+        KeyError: when the path to replace or remove doesn't exist
+        IndexError: when a list index is out of range
+    """
+    for operation in patch:
+        op = operation["op"]
+        if op not in ("add", "replace", "remove"):
+            raise ValueError(f"Unsupported patch operation: {op!r}")
+        segments = from_pointer(operation["path"])
+        if not segments:
+            raise ValueError("Cannot patch the root of the tree.")
+        value = None if op == "remove" else operation["value"]
+        _apply(obj, segments, op, value, operation["path"])
+
+
+def apply_changes(obj: Any, changes: Iterable[Change]) -> None:
+    """Apply changes, such as the ones generated by `diff()`, in place
+
+    The changes must be collected before they are applied, since `diff()`
+    walks the trees lazily. The paths can be strings or tuples of the keys
+    and indices.
+
+    Args:
+        obj: The tree, a diot or a dictionary
+        changes: The changes
+
+    Raises:
+        KeyError: when the path to replace or remove doesn't exist
+        IndexError: when a list index is out of range
+    """
+    for change in changes:
+        _apply(obj, compile_path(change.path), change.kind, change.new, change.path)
+
+
+def content_hash(obj: Any) -> Optional[int]:
+    """Get the hash of the contents of a recursively frozen diot
+
+    The hash is cached on the diot until it's frozen or unfrozen again.
+    Diots that are not recursively frozen, or with mutable values like lists
+    that can be changed in place, are not hashed. Tuples are hashed by the
+    contents of their items, other values by `hash()`.
+
+    Args:
+        obj: The object
+
+    Returns:
+        The hash, or None if the object can't be hashed by its contents
+    """
+    if isinstance(obj, tuple):
+        item_hashes = []
+        for item in obj:
+            item_hash = content_hash(item)
+            if item_hash is None:
+                return None
+            item_hashes.append(item_hash)
+        return hash(tuple(item_hashes))
+
+    attrs = getattr(obj, "__dict__", None)
+    if not attrs or "__diot__" not in attrs:
+        try:
+            return hash(obj)
+        except TypeError:
+            return None
+
+    if "__content_hash__" in attrs:
+        return attrs["__content_hash__"]
+    if obj.__diot__["frozen"] is not True:
+        return None
+
+    hashes = []
+    for key, value in dict.items(obj):
+        value_hash = content_hash(value)
+        if value_hash is None:
+            out = None
+            break
+        hashes.append((key, value_hash))
+    else:
+        out = hash(frozenset(hashes))
+    attrs["__content_hash__"] = out
+    return out
+
+
+def _same(old: Any, new: Any) -> Optional[bool]:
+    """Tell if two values are the same without walking them
+
+    Returns:
+        True or False if it can be told, otherwise None
+    """
+    if old is new:
+        return True
+    old_hash = content_hash(old)
+    new_hash = content_hash(new)
+    if old_hash is None or new_hash is None:
+        return None
+    if old_hash != new_hash:
+        # only the hashes of diots are known to follow their contents, other
+        # values (such as frozensets of diots) may be equal anyway
+        return False if _is_diot(old) and _is_diot(new) else None
+    # confirmed, since different values can hash the same (hash(-1) and
+    # hash(-2), for example). Equal subtrees are not walked, so this is done
+    # once for each of them
+    return bool(old == new)
+
+
+def _is_diot(obj: Any) -> bool:
+    return "__diot__" in getattr(obj, "__dict__", ())
+
+
+def _diff_value(
+    old: Any,
+    new: Any,
+    path: Tuple[Any, ...],
+) -> Optional[Union[Change, Iterator[Any]]]:
+    """Diff two values at path
+
+    Returns:
+        None if they are the same, a generator to diff their children, or a
+        change to replace old with new
+    """
+    same = _same(old, new)
+    if same:
+        return None
+    # containers are walked instead of being compared with ==, which would
+    # walk them again at every level below
+    if isinstance(old, Mapping) and isinstance(new, Mapping):
+        return _diff_mapping(old, new, path)
+    if isinstance(old, list) and isinstance(new, list):
+        return _diff_list(old, new, path)
+    if same is None and old == new:
+        return None
+    return Change("replace", path, old, new)
+
+
+def _diff_mapping(
+    old: Mapping[Any, Any],
+    new: Mapping[Any, Any],
+    path: Tuple[Any, ...],
+) -> Iterator[Any]:
+    matched = set()
+    for key, old_value in old.items():
+        new_key = _match_key(new, key)
+        if new_key is _MISSING:
+            yield Change("remove", path + (key,), old_value)
+            continue
+        matched.add(new_key)
+        out = _diff_value(old_value, new[new_key], path + (key,))
+        if out is not None:
+            yield out
+
+    if len(matched) == len(new):
+        return
+    for key, new_value in new.items():
+        if key not in matched:
+            yield Change("add", path + (key,), None, new_value)
+
+
+def _diff_list(
+    old: List[Any],
+    new: List[Any],
+    path: Tuple[Any, ...],
+) -> Iterator[Any]:
+    for i, (old_value, new_value) in enumerate(zip(old, new)):
+        out = _diff_value(old_value, new_value, path + (i,))
+        if out is not None:
+            yield out
+    # remove from the end, so that the indices are still valid when applied
+    for i in range(len(old) - 1, len(new) - 1, -1):
+        yield Change("remove", path + (i,), old[i])
+    for i in range(len(old), len(new)):
+        yield Change("add", path + (i,), None, new[i])
+
+
+def diff(old: Any, new: Any, raw: bool = False) -> Iterator[Change]:
+    """Generate the changes from one tree to another
+
+    The trees are walked together lazily and iteratively. Subtrees are
+    skipped when they are the same object, or when they are recursively
+    frozen diots with the same contents (compared by the cached content
+    hashes first). Keys are matched through the keymaps of diots, so that
+    `a-b` in the old tree matches `a_b` in the new one.
+
+    The trees are compared with `==` once at the top, which runs in C and
+    skips walking equal trees. Below that, mappings and lists are compared
+    item by item, and only the other values with `==`.
+
+    Args:
+        old: The old tree
+        new: The new tree
+        raw: Keep the paths as tuples of the keys and indices, instead of
+            formatting them into strings. Keys that are not strings, such as
+            `True` or `None` from yaml files, can't be parsed back from the
+            strings, but the changes with the raw paths can be applied.
+
+    Yields:
+        The changes, with the paths of the keys in the old tree for the
+        removed and replaced values and in the new tree for the added ones
+    """
+    if old is new or old == new:
+        return
+    out = _diff_value(old, new, ())
+    if out is None:
+        return
+    if isinstance(out, Change):
+        yield out if raw else out._replace(path=format_path(out.path))
+        return
+
+    stack = [out]
+    while stack:
+        item = next(stack[-1], None)
+        if item is None:
+            stack.pop()
+        elif isinstance(item, Change):
+            yield item if raw else item._replace(path=format_path(item.path))
+        else:
+            stack.append(item)
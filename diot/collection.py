@@ -0,0 +1,344 @@
+"""Collections of diots with secondary hash indexes"""
+from __future__ import annotations
+
+from collections.abc import MutableSequence
+from typing import (
+    Any,
+    Collection,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Tuple,
+    Union,
+    overload,
+)
+
+from .diot import Diot
+from .paths import _MISSING, compile_path, lookup
+
+
+def _get_field(item: Any, segments: Tuple[Union[str, int], ...]) -> Any:
+    """Get the value of a compiled field path, `_MISSING` if not exists"""
+    for segment in segments:
+        item = lookup(item, segment)
+        if item is _MISSING:
+            break
+    return item
+
+
+class _HashIndex:
+    """A hash index of items on a field
+
+    Items are kept by identity, so that the buckets are cheap to update.
+    Unhashable values (e.g. lists) can't be hashed into buckets and are
+    kept aside to be scanned, and so are diots, which are hashed by
+    identity but compared by contents.
+    """
+
+    __slots__ = ("segments", "buckets", "unhashable", "values", "counts")
+
+    def __init__(self, field: str) -> None:
+        self.segments = compile_path(field)
+        # value => {id(item): item}
+        self.buckets: Dict[Any, Dict[int, Any]] = {}
+        # id(item) => item, for items with unhashable values
+        self.unhashable: Dict[int, Any] = {}
+        # id(item) => the indexed value, to find the bucket when removing
+        self.values: Dict[int, Any] = {}
+        # id(item) => number of times the item is in the collection
+        self.counts: Dict[int, int] = {}
+
+    def add(self, item: Any) -> None:
+        """Add an item to the index"""
+        item_id = id(item)
+        count = self.counts.get(item_id, 0)
+        self.counts[item_id] = count + 1
+        if count:
+            return
+
+        value = _get_field(item, self.segments)
+        self.values[item_id] = value
+        if value is _MISSING:
+            return
+        try:
+            if isinstance(value, dict):
+                raise TypeError
+            bucket = self.buckets.setdefault(value, {})
+        except TypeError:
+            self.unhashable[item_id] = item
+        else:
+            bucket[item_id] = item
+
+    def discard(self, item: Any, all_copies: bool = False) -> None:
+        """Remove an item from the index"""
+        item_id = id(item)
+        count = self.counts.get(item_id, 0) - 1
+        if count > 0 and not all_copies:
+            self.counts[item_id] = count
+            return
+
+        self.counts.pop(item_id, None)
+        value = self.values.pop(item_id, _MISSING)
+        if value is _MISSING:
+            return
+        if self.unhashable.pop(item_id, None) is not None:
+            return
+        bucket = self.buckets[value]
+        del bucket[item_id]
+        if not bucket:
+            del self.buckets[value]
+
+    def lookup(self, value: Any) -> Collection[Any]:
+        """Get the candidates for items with the value"""
+        try:
+            if isinstance(value, dict):
+                raise TypeError
+            return self.buckets.get(value, {}).values()
+        except TypeError:
+            return [
+                item
+                for item in self.unhashable.values()
+                if _get_field(item, self.segments) == value
+            ]
+
+
+class DiotCollection(MutableSequence):
+    """A list of diots with secondary hash indexes on (dotted) fields
+
+    Indexes are maintained when items are added or removed, so that lookups
+    by field equality cost O(matches) instead of O(n). The items are the
+    diot objects themselves, which are returned as they are from lookups.
+
+    Indexes are not notified when the indexed fields of an item are changed
+    in place. Call `reindex(item)` after such changes.
+
+    Examples:
+        >>> users = DiotCollection(records, indexes=["status"])
+        >>> users.create_index("profile.country")
+        >>> users.where(status="active")
+        >>> users.where({"profile.country": "NL"}, status="active")
+
+    Args:
+        items: The items. Dictionaries that are not diots are converted with
+            `diot_class`.
+        indexes: The fields to build indexes on
+        diot_class: The diot class to convert plain dictionaries
+    """
+
+    __slots__ = ("_items", "_indexes", "_diot_class")
+
+    def __init__(
+        self,
+        items: Iterable[Any] = (),
+        indexes: Iterable[str] = (),
+        diot_class: type = Diot,
+    ) -> None:
+        self._diot_class = diot_class
+        self._items: List[Diot] = [self._convert(item) for item in items]
+        self._indexes: Dict[str, _HashIndex] = {}
+        for field in indexes:
+            self.create_index(field)
+
+    def _convert(self, item: Any) -> Diot:
+        """Make sure the item is a diot"""
+        if isinstance(item, Diot):
+            return item
+        if isinstance(item, dict):
+            return self._diot_class(item)
+        raise TypeError(
+            f"{self.__class__.__name__} can only hold dictionaries, "
+            f"not {type(item).__name__}."
+        )
+
+    @property
+    def indexes(self) -> List[str]:
+        """The indexed fields"""
+        return list(self._indexes)
+
+    def create_index(self, field: str) -> None:
+        """Build a hash index on a field
+
+        Args:
+            field: The field, which can be a dotted path like `a.b`
+        """
+        if field in self._indexes:
+            return
+        index = _HashIndex(field)
+        for item in self._items:
+            index.add(item)
+        self._indexes[field] = index
+
+    def drop_index(self, field: str) -> None:
+        """Drop the index on a field
+
+        Args:
+            field: The indexed field
+
+        Raises:
+            KeyError: when the field is not indexed
+        """
+        del self._indexes[field]
+
+    def reindex(self, item: Any = None) -> None:
+        """Update the indexes after the indexed fields of items are changed
+
+        Args:
+            item: The item that changed. If not given, rebuild all indexes.
+        """
+        if item is None:
+            for field in list(self._indexes):
+                del self._indexes[field]
+                self.create_index(field)
+            return
+
+        for index in self._indexes.values():
+            count = index.counts.get(id(item), 0)
+            if not count:
+                continue
+            index.discard(item, all_copies=True)
+            for _ in range(count):
+                index.add(item)
+
+    def where(self, *conditions: Dict[str, Any], **kwargs: Any) -> List[Diot]:
+        """Get the items with fields equal to the given values
+
+        Indexed fields are used to narrow down the candidates, and the
+        remaining conditions are checked on the candidates only.
+
+        Examples:
+            >>> coll.where(status="active")
+            >>> coll.where({"profile.country": "NL"}, status="active")
+
+        Args:
+            *conditions: Dictionaries of field-value pairs, for dotted fields
+            **kwargs: Field-value pairs
+
+        Returns:
+            The matched items (each item only once)
+        """
+        conds: Dict[str, Any] = {}
+        for condition in conditions:
+            conds.update(condition)
+        conds.update(kwargs)
+
+        candidates: Any = None
+        cand_field = cand_value = None
+        rest = []
+        for field, value in conds.items():
+            index = self._indexes.get(field)
+            if index is None:
+                rest.append((compile_path(field), value))
+                continue
+            matched = index.lookup(value)
+            if candidates is None or len(matched) < len(candidates):
+                if candidates is not None:
+                    rest.append((self._indexes[cand_field].segments, cand_value))
+                candidates, cand_field, cand_value = matched, field, value
+            else:
+                rest.append((index.segments, value))
+
+        if candidates is None:
+            # no indexes to use, also avoid repeated items
+            candidates = {id(item): item for item in self._items}.values()
+
+        return [
+            item
+            for item in candidates
+            if all(
+                _get_field(item, segments) == value
+                for segments, value in rest
+            )
+        ]
+
+    def _index_add(self, item: Diot) -> None:
+        for index in self._indexes.values():
+            index.add(item)
+
+    def _index_discard(self, item: Diot) -> None:
+        for index in self._indexes.values():
+            index.discard(item)
+
+    @overload
+    def __getitem__(self, index: int) -> Diot:  # pragma: no cover
+        ...
+
+    @overload
+    def __getitem__(  # pragma: no cover
+        self,
+        index: slice,
+    ) -> DiotCollection:
+        ...
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.__class__(
+                self._items[index],
+                indexes=self._indexes,
+                diot_class=self._diot_class,
+            )
+        return self._items[index]
+
+    def __setitem__(self, index: int, item: Any) -> None:  # type: ignore
+        if isinstance(index, slice):
+            raise TypeError(
+                f"{self.__class__.__name__} doesn't support slice assignment."
+            )
+        item = self._convert(item)
+        self._index_discard(self._items[index])
+        self._items[index] = item
+        self._index_add(item)
+
+    def __delitem__(self, index: Union[int, slice]) -> None:
+        if isinstance(index, slice):
+            items = self._items[index]
+        else:
+            items = [self._items[index]]
+        del self._items[index]
+        for item in items:
+            self._index_discard(item)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __iter__(self) -> Iterator[Diot]:
+        return iter(self._items)
+
+    def __contains__(self, item: Any) -> bool:
+        return item in self._items
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, DiotCollection):
+            return self._items == other._items
+        return self._items == other
+
+    def __repr__(self) -> str:
+        return (
+            f"{self.__class__.__name__}({self._items!r}, "
+            f"indexes={self.indexes!r})"
+        )
+
+    def insert(self, index: int, item: Any) -> None:
+        """Insert an item before index
+
+        Args:
+            index: The position
+            item: The item, converted to a diot if it is a plain dictionary
+        """
+        item = self._convert(item)
+        self._items.insert(index, item)
+        self._index_add(item)
+
+    def clear(self) -> None:
+        """Remove all items, keeping the indexed fields"""
+        self._items.clear()
+        for field in list(self._indexes):
+            self._indexes[field] = _HashIndex(field)
+
+    def to_list(self) -> List[Diot]:
+        """Get the items as a list
+
+        Returns:
+            A shallow copy of the items
+        """
+        return self._items[:]
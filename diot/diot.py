@@ -1,9 +1,12 @@
 """diot module"""
 from __future__ import annotations
 
+import os
 from contextlib import contextmanager
-from copy import deepcopy
+from copy import copy, deepcopy
 from os import PathLike
+from threading import RLock
+from types import FunctionType
 from typing import (
     TYPE_CHECKING,
     Any,
@@ -11,17 +14,32 @@ from typing import (
     Dict,
     Iterable,
     Iterator,
+    List,
+    Mapping,
+    MutableMapping,
     Optional,
     Tuple,
     Union,
     cast,
 )
 
+from .changes import Change, apply_patch, diff
+from .paths import (
+    PathAccessor,
+    PathType,
+    format_path,
+    get_path,
+    has_path,
+    select,
+    set_path,
+)
 from .transforms import TRANSFORMS
-from .utils import DiotFrozenError, nest, to_dict
+from .utils import DiotFrozenError, DiotList, OrderedKeys, nest, to_dict
 
 if TYPE_CHECKING:
     from argparse import Namespace
+    from .view import DiotView
+    from .watch import FileDiot
 
 
 class _DiotMissingDefault:
@@ -43,6 +61,296 @@ class _DiotMissingDefault:
 # This class makes it pickable than object
 DIOT_MISSING_DEFAULT = _DiotMissingDefault()
 
+# A private marker for missing values, so that lookups don't need to raise
+_MISSING = object()
+
+# Strategies to handle missing keys, decided once from diot_missing
+_MISSING_RAISE_DEFAULT = 0
+_MISSING_RAISE_OBJECT = 1
+_MISSING_RAISE_CLASS = 2
+_MISSING_CALL = 3
+_MISSING_RETURN = 4
+
+
+def _missing_strategy(handler: Any) -> Tuple[int, Any]:
+    """Classify the missing handler
+
+    Returns:
+        A tuple of the strategy and the handler itself, so that we can tell if
+        the handler has been replaced since the strategy was decided.
+    """
+    # if handler is DIOT_MISSING_DEFAULT:
+    # In case it is picked somewhere else
+    if isinstance(handler, _DiotMissingDefault):
+        return (_MISSING_RAISE_DEFAULT, handler)
+    if isinstance(handler, Exception):
+        return (_MISSING_RAISE_OBJECT, handler)
+    if isinstance(handler, type) and issubclass(handler, Exception):
+        return (_MISSING_RAISE_CLASS, handler)
+    if callable(handler):
+        return (_MISSING_CALL, handler)
+    return (_MISSING_RETURN, handler)
+
+
+def _set_config(obj: Diot, config: Dict[str, Any]) -> None:
+    """Attach the diot configurations to the object
+
+    They are kept in both `__dict__` and the `__diot__` slot. The slot makes
+    `self.__diot__` a plain attribute access, otherwise it would fail and
+    fall back to `__getattr__` every time.
+    """
+    obj.__dict__["__diot__"] = config
+    object.__setattr__(obj, "__diot__", config)
+
+
+_MERGE_LISTS = ("replace", "append", "unique")
+
+
+def _merge_conflict(
+    conflict: Any,
+) -> Optional[Callable[[Tuple[Any, ...], Any, Any], Any]]:
+    """Get the function to resolve conflicts for merge()
+
+    None for the default, replacing the old value with the new one.
+    """
+    if callable(conflict):
+        return conflict
+    if conflict == "replace":
+        return None
+    if conflict == "keep":
+        return lambda path, old, new: old
+    if conflict == "error":
+
+        def raise_conflict(path: Tuple[Any, ...], old: Any, new: Any) -> Any:
+            raise ValueError(
+                f"Conflicting values at {format_path(path)!r}: "
+                f"{old!r} and {new!r}"
+            )
+
+        return raise_conflict
+    raise ValueError(
+        "Expect conflict to be 'replace', 'keep', 'error' or a callable, "
+        f"got {conflict!r}."
+    )
+
+
+def _merge_lists(old: List[Any], new: List[Any], lists: str) -> List[Any]:
+    """Combine two lists for merge()"""
+    if lists == "append":
+        return old + new
+
+    seen = set()
+    unhashable = []
+
+    def known(item: Any) -> bool:
+        """Tell if the item is seen, and record it if not"""
+        # diots are hashed by identity, so containers are compared by equality
+        if not isinstance(item, (dict, list)):
+            try:
+                if item in seen:
+                    return True
+                seen.add(item)
+                return False
+            except TypeError:
+                pass
+        if item in unhashable:
+            return True
+        unhashable.append(item)
+        return False
+
+    for item in old:
+        known(item)
+    return old + [item for item in new if not known(item)]
+
+
+def _store(node: Diot, key: Any, value: Any, fast: bool) -> None:
+    """Set an already nested value to node for merge()
+
+    With `fast`, the value is written to the storage directly, and the key is
+    only transformed when it's new.
+    """
+    if not fast:
+        node[key] = value
+        return
+
+    config = node.__diot__
+    if not dict.__contains__(node, key):
+        keymaps = config["keymaps"]
+        transformed_key = config["transform"](key)
+        if (
+            transformed_key in keymaps
+            and transformed_key != key
+            and keymaps[transformed_key] != key
+        ):
+            raise KeyError(
+                f"{key!r} will be transformed to the same attribute as "
+                f"{keymaps[transformed_key]!r}. "
+                "Either use a different name or "
+                "a different diot_transform function."
+            )
+        keymaps[transformed_key] = key
+    dict.__setitem__(node, key, value)
+    config["version"] += 1
+
+
+def _merge(
+    target: Diot,
+    sources: Iterable[Mapping[str, Any]],
+    lists: str,
+    conflict: Optional[Callable[[Tuple[Any, ...], Any, Any], Any]],
+) -> None:
+    """Merge the sources into target, see `Diot.merge()`
+
+    Each level of the target is visited once for all the sources. Mappings
+    of the sources to be merged into the same child are collected while the
+    level is visited, and merged into the child later, with a stack instead
+    of recursion.
+    """
+    stack: List[Tuple[Diot, List[Mapping[str, Any]], Tuple[Any, ...]]] = [
+        (target, list(sources), ())
+    ]
+    while stack:
+        node, sources, path = stack.pop()
+        config = node.__diot__
+        if config["frozen"]:
+            raise DiotFrozenError("Cannot merge into a frozen diot.")
+        transform = config["transform"]
+        keymaps = config["keymaps"]
+        nest_types = config["nest"]
+        diot_class = node.__class__
+        # subclasses may do more when setting items
+        fast = diot_class.__setitem__ is Diot.__setitem__
+        # key => the mappings to be merged into the child diot
+        children: Dict[Any, List[Mapping[str, Any]]] = {}
+        for source in sources:
+            for key, value in source.items():
+                if not dict.__contains__(node, key) and isinstance(key, str):
+                    key = keymaps.get(transform(key), key)
+                old = dict.get(node, key, _MISSING)
+
+                if isinstance(value, Mapping):
+                    if key in children:
+                        children[key].append(value)
+                        continue
+                    if isinstance(old, Diot):
+                        children[key] = [value]
+                        continue
+                    if old is not _MISSING and conflict is not None:
+                        resolved = conflict(path + (key,), old, value)
+                        if resolved is old:
+                            continue
+                        if resolved is not value:
+                            node[key] = resolved
+                            continue
+                    if dict in nest_types:
+                        _store(node, key, diot_class(), fast)
+                        children[key] = [value]
+                    else:
+                        # not nested, but copied, not to alias the source
+                        _store(node, key, deepcopy(value), fast)
+                    continue
+
+                if isinstance(value, (list, tuple)):
+                    value = nest(value, nest_types, diot_class, False)
+                if old is _MISSING:
+                    _store(node, key, value, fast)
+                    continue
+                if (
+                    lists != "replace"
+                    and isinstance(old, list)
+                    and isinstance(value, list)
+                ):
+                    _store(node, key, _merge_lists(old, value, lists), fast)
+                    continue
+                if old is value or (
+                    not isinstance(old, (dict, list)) and old == value
+                ):
+                    continue
+                if conflict is not None:
+                    value = conflict(path + (key,), old, value)
+                    if value is old:
+                        continue
+                    value = nest(value, nest_types, diot_class, False)
+                children.pop(key, None)
+                _store(node, key, value, fast)
+
+        stack.extend(
+            (dict.__getitem__(node, key), sources, path + (key,))
+            for key, sources in reversed(children.items())
+        )
+
+
+# values that deepcopy returns as they are
+_ATOMIC = frozenset(
+    (type(None), bool, int, float, complex, str, bytes, type, FunctionType)
+)
+
+
+def _copy_list(value: List[Any]) -> List[Any]:
+    """Shallow copy a list, keeping the raw items of a DiotList"""
+    if isinstance(value, DiotList):
+        return value._clone()
+    if type(value) is list:
+        return list(value)
+    return copy(value)
+
+
+def _copy_child(value: Any, memo: Dict[int, Any], stack: List[Any]) -> Any:
+    """Copy a value in a diot tree, the diots and lists only shallowly
+
+    The shallow copies are pushed to the stack to have their values copied.
+    """
+    if type(value) in _ATOMIC:
+        return value
+    out = memo.get(id(value), _MISSING)
+    if out is not _MISSING:
+        return out
+    if isinstance(value, Diot):
+        # the configurations are shared and the keymaps copied, subclasses
+        # copy their own states, such as the ordered keys
+        out = value._copy()
+    elif isinstance(value, DiotList) or type(value) is list:
+        out = _copy_list(value)
+    else:
+        return deepcopy(value, memo)
+
+    memo[id(value)] = out
+    # keep the original alive as copy.deepcopy does, so that its id is not
+    # reused while the memo is
+    memo.setdefault(id(memo), []).append(value)
+    stack.append(out)
+    return out
+
+
+def _deepcopy(root: Diot, memo: Dict[int, Any]) -> Diot:
+    """Deep copy a diot tree iteratively
+
+    Diots are copied without running the constructor, so that the keys are
+    not transformed and the values are not nested again, and the copied
+    values are stored directly since the keys don't change. Immutable
+    leaves are not copied, and values other than diots and lists are copied
+    by `copy.deepcopy` with the same memo.
+    """
+    stack: List[Any] = []
+    out = _copy_child(root, memo, stack)
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            for key, value in list(dict.items(node)):
+                copied = _copy_child(value, memo, stack)
+                if copied is not value:
+                    dict.__setitem__(node, key, copied)
+        else:
+            # the copies of the items not converted yet are to be converted
+            pending = getattr(node, "_pending", None)
+            for i, value in enumerate(list(list.__iter__(node))):
+                copied = _copy_child(value, memo, stack)
+                if copied is not value:
+                    list.__setitem__(node, i, copied)
+                    if pending and pending.pop(id(value), None) is not None:
+                        pending[id(copied)] = copied
+    return out
+
 
 class Diot(dict[str, Any]):
     """Dictionary with dot notation
@@ -90,6 +398,9 @@ class Diot(dict[str, Any]):
 
     __slots__ = ("__diot__", "__dict__")
 
+    # convert the items of lists lazily, see `utils.DiotList`
+    _nest_lazily = True
+
     def __new__(cls, *args: Any, **kwargs: Any) -> "Diot":
         ret = super().__new__(cls)
         # unpickling will not call __init__
@@ -134,32 +445,224 @@ class Diot(dict[str, Any]):
         """
         from argparse import Namespace
 
-        ret = cls(
-            {
-                key: val
-                for key, val in vars(namespace).items()
-                if not key.startswith("__")
-            },
-            diot_nest=diot_nest,
-            diot_transform=diot_transform,
-            diot_frozen=diot_frozen,
-            diot_missing=diot_missing,
+        options = {
+            "diot_nest": diot_nest,
+            "diot_transform": diot_transform,
+            "diot_frozen": diot_frozen,
+            "diot_missing": diot_missing,
+        }
+
+        # nested namespaces are converted while building, bottom-up, so that
+        # the options apply to every level and nothing is walked twice
+        def convert(nspace: Namespace) -> Diot:
+            return cls(
+                {
+                    key: convert(val)
+                    if recursive and isinstance(val, Namespace)
+                    else val
+                    for key, val in vars(nspace).items()
+                    if not key.startswith("__")
+                },
+                **options,
+            )
+
+        return convert(namespace)
+
+    @classmethod
+    def from_env(
+        cls,
+        prefix: str = "",
+        sep: str = "__",
+        environ: Optional[Mapping[str, str]] = None,
+        lowercase: bool = True,
+        **kwargs: Any,
+    ) -> Diot:
+        """Get a Diot object from environment variables
+
+        Variables like `APP__DB__HOST` are split by `sep` into nested keys.
+        The diot configurations apply to every level.
+
+        Example:
+        >>> # APP__DB__HOST=a APP__DB__PORT=5432 APP__DEBUG=1
+        >>> Diot.from_env("APP")
+        >>> # Diot(db={"host": "a", "port": "5432"}, debug="1")
+
+        Args:
+            prefix: Only the variables named `<prefix><sep>...` are loaded,
+                with the prefix stripped. All variables if empty, skipping
+                the invalid ones (see below) instead of raising, as they are
+                likely unrelated. Of the conflicting ones, the first in
+                sorted order is kept.
+            sep: The separator of the nested keys
+            environ: The variables, `os.environ` if not given
+            lowercase: Lowercase the keys
+            **kwargs: The diot configurations, such as `diot_transform`
+
+        Returns:
+            The converted diot object, with the values as strings
+
+        Raises:
+            ValueError: with a prefix, when a key is empty, is both a value
+                and a section, for example, with `APP__DB` and
+                `APP__DB__HOST`, or is given by more than one variable, for
+                example, with `APP__DB__HOST` and `APP__db__host` when
+                lowercased
+        """
+        if environ is None:
+            environ = os.environ
+
+        head = prefix + sep if prefix else ""
+        tree: Dict[str, Any] = {}
+        for name in sorted(environ):
+            if not name.startswith(head):
+                continue
+            keys = name[len(head) :]
+            *parents, key = (keys.lower() if lowercase else keys).split(sep)
+            node = tree
+            # checked before the sections are created, so that the skipped
+            # variables leave nothing behind
+            if all(parents) and key:
+                for parent in parents:
+                    node = node.setdefault(parent, {})
+                    if not isinstance(node, dict):
+                        break
+                else:
+                    if key not in node:
+                        node[key] = environ[name]
+                        continue
+            if not prefix:
+                continue
+            raise ValueError(
+                f"Invalid environment variable {name!r}: empty key, or "
+                "conflicting with other variables, such as a variable of the "
+                "same key after lowercasing."
+            )
+
+        def convert(node: Dict[str, Any]) -> Diot:
+            return cls(
+                {
+                    key: convert(val) if isinstance(val, dict) else val
+                    for key, val in node.items()
+                },
+                **kwargs,
+            )
+
+        return convert(tree)
+
+    @classmethod
+    def load_dir(
+        cls,
+        path: Union[str, PathLike[str]],
+        pattern: str = "*",
+        workers: Optional[int] = None,
+        processes: bool = False,
+        lists: str = "replace",
+        conflict: Any = "replace",
+        **kwargs: Any,
+    ) -> Diot:
+        """Load the json, yaml and toml files in a directory and merge them
+
+        The files are parsed concurrently, and merged in the order of their
+        paths relative to the directory, so that the later ones take
+        precedence (e.g. `10-base.yaml` < `20-prod.yaml`).
+
+        Examples:
+            >>> conf = Diot.load_dir("conf.d", "*.yaml", workers=8)
+
+        Args:
+            path: The directory
+            pattern: The glob pattern of the files, use `**/*` to include the
+                subdirectories. Only files with `.json`, `.yaml`, `.yml` and
+                `.toml` suffixes are loaded.
+            workers: The max number of workers, 1 to load the files serially
+            processes: Parse the files in a process pool instead of a thread
+                pool, which pays off for large yaml files
+            lists: How to merge lists, see `merge()`
+            conflict: How to resolve conflicts, see `merge()`
+            **kwargs: The diot configurations, such as `diot_transform`
+
+        Returns:
+            The merged diot
+        """
+        from .loaders import list_files, load_files
+
+        out = cls(**kwargs)
+        out.merge(
+            *load_files(list_files(path, pattern), workers, processes),
+            lists=lists,
+            conflict=conflict,
         )
-        if not recursive:
-            return ret
+        return out
 
-        for key, value in ret.items():
-            if isinstance(value, Namespace):
-                ret[key] = cls.from_namespace(value)
-        return ret
+    @classmethod
+    def view(
+        cls,
+        mapping: MutableMapping[Any, Any],
+        diot_transform: Union[Callable[[str], str], str] = "safe",
+    ) -> DiotView:
+        """Get an attribute-access view over a dictionary, without copying it
+
+        Reads and writes go through to the dictionary. Nested dictionaries
+        and lists are wrapped as views lazily, when they are accessed. See
+        `DiotView`.
+
+        Examples:
+            >>> data = json.loads(payload)
+            >>> Diot.view(data).user.first_name  # data["user"]["first-name"]
+
+        Args:
+            mapping: The dictionary to wrap
+            diot_transform: The transform for the keys
+
+        Returns:
+            The view
+        """
+        from .view import DiotView
+
+        return DiotView(mapping, diot_transform)
+
+    @classmethod
+    def watch_file(
+        cls,
+        path: Union[str, PathLike[str]],
+        interval: float = 1.0,
+        fmt: Optional[str] = None,
+        **kwargs: Any,
+    ) -> FileDiot:
+        """Get a handle of a json, yaml or toml file, reloaded when changed
+
+        The file is loaded lazily and checked by its modification time and
+        size at most every `interval` seconds. When it has changed, only the
+        differences are applied to the loaded diot in place, so the references
+        to it and its nested diots stay valid. See `FileDiot`.
+
+        Examples:
+            >>> conf = Diot.watch_file("conf.yaml", interval=5)
+            >>> conf.db.host
+
+        Args:
+            path: The path to the file
+            interval: The min number of seconds between the checks of the file
+            fmt: The format, `json`, `yaml` or `toml`, told by the suffix of
+                the file if not given
+            **kwargs: The diot configurations, such as `diot_transform`
+
+        Returns:
+            The handle of the file
+        """
+        from .watch import FileDiot
+
+        return FileDiot(path, interval, fmt, diot_class=cls, **kwargs)
 
     def __init__(self, *args: Any, **kwargs: Any) -> None:
         if self.__dict__.get("__inited__"):
             return
 
         self.__dict__["__inited__"] = True
-        self.__dict__.setdefault("__diot__", {})
+        _set_config(self, self.__dict__.get("__diot__", {}))
         self.__diot__["keymaps"] = {}
+        # bumped by mutations, so that views can tell if the diot has changed
+        self.__diot__["version"] = 0
         self.__diot__["nest"] = kwargs.pop("diot_nest", True)
         self.__diot__["nest"] = (
             [dict, list, tuple]
@@ -175,6 +678,9 @@ class Diot(dict[str, Any]):
         self.__diot__["transform"] = kwargs.pop("diot_transform", "safe")
         self.__diot__["frozen"] = False
         self.__diot__["missing"] = kwargs.pop("diot_missing", DIOT_MISSING_DEFAULT)
+        self.__diot__["missing_strategy"] = _missing_strategy(
+            self.__diot__["missing"]
+        )
         diot_frozen = kwargs.pop("diot_frozen", False)
         if isinstance(self.__diot__["transform"], str):
             self.__diot__["transform"] = TRANSFORMS[self.__diot__["transform"]]
@@ -196,13 +702,21 @@ class Diot(dict[str, Any]):
             self.__diot__["keymaps"][transformed_key] = key
 
         # nest values
-        for key in self:
-            self[key] = nest(
-                self[key],
+        # the keymaps are built above, so when __setitem__ is not overridden,
+        # the nested values can be stored directly, without transforming the
+        # keys again
+        fast = type(self).__setitem__ is Diot.__setitem__
+        for key, value in list(dict.items(self)):
+            nested = nest(
+                value,
                 self.__diot__["nest"],
                 self.__class__,
                 self.__diot__["frozen"] is True,
             )
+            if not fast:
+                self[key] = nested
+            elif nested is not value:
+                dict.__setitem__(self, key, nested)
 
         self.__diot__["frozen"] = diot_frozen
 
@@ -243,45 +757,70 @@ class Diot(dict[str, Any]):
                 self.__diot__["frozen"] is True,
             ),
         )
+        self.__diot__["version"] += 1
 
     def __getattr__(self, name: str) -> Any:
         if name == "__diot__":
             return self.__dict__["__diot__"]
-        try:
-            return self[name]
-        except Exception as exc:
-            # if self.__diot__["missing"] is DIOT_MISSING_DEFAULT:
-            # In case it is picked somewhere else
-            if isinstance(self.__diot__["missing"], _DiotMissingDefault):
-                raise AttributeError(
-                    f"{self.__class__.__name__} object has no attribute {name!r}"
-                ) from None
+        if type(self).__getitem__ is not Diot.__getitem__:
+            # subclasses may do more when getting items
+            try:
+                return self[name]
+            except KeyError:
+                if isinstance(self.__diot__["missing"], _DiotMissingDefault):
+                    raise AttributeError(
+                        f"{self.__class__.__name__} object "
+                        f"has no attribute {name!r}"
+                    ) from None
+                raise
 
-            raise exc from None
+        diot = self.__diot__
+        original_key = diot["keymaps"].get(name, name)
+        value = dict.get(self, original_key, _MISSING)
+        if value is _MISSING:
+            return self._missing(name, original_key, True)
+        return value
 
     def __getitem__(self, name: str) -> Any:
-        original_key = self.__diot__["keymaps"].get(name, name)
-        try:
-            return super().__getitem__(original_key)
-        except KeyError as keyerr:
-            missing_handler = self.__diot__["missing"]
-            # if self.__diot__["missing"] is DIOT_MISSING_DEFAULT:
-            # In case it is picked somewhere else
-            if isinstance(self.__diot__["missing"], _DiotMissingDefault):
-                raise
+        diot = self.__diot__
+        original_key = diot["keymaps"].get(name, name)
+        value = dict.get(self, original_key, _MISSING)
+        if value is _MISSING:
+            return self._missing(name, original_key, False)
+        return value
 
-            if isinstance(missing_handler, Exception):
-                raise missing_handler from None
-            if (
-                isinstance(missing_handler, type)
-                and issubclass(missing_handler, Exception)
-            ):
-                raise missing_handler(str(keyerr)) from None
+    def _missing(self, name: str, original_key: Any, attribute: bool) -> Any:
+        """Handle a missing key with the missing handler
 
-            if callable(missing_handler):
-                return missing_handler(name, self)  # type: ignore
+        Args:
+            name: The name being accessed
+            original_key: The name resolved through keymaps
+            attribute: Whether it is accessed as an attribute
+
+        Returns:
+            The value from the missing handler
+        """
+        diot = self.__diot__
+        strategy, handler = diot.get("missing_strategy", (None, _MISSING))
+        if handler is not diot["missing"]:
+            # diot_missing replaced after construction
+            strategy, handler = diot["missing_strategy"] = _missing_strategy(
+                diot["missing"]
+            )
 
-            return cast(Any, missing_handler)
+        if strategy == _MISSING_RETURN:
+            return handler
+        if strategy == _MISSING_CALL:
+            return handler(name, self)
+        if strategy == _MISSING_RAISE_OBJECT:
+            raise handler
+        if strategy == _MISSING_RAISE_CLASS:
+            raise handler(str(KeyError(original_key)))
+        if attribute:
+            raise AttributeError(
+                f"{self.__class__.__name__} object has no attribute {name!r}"
+            )
+        raise KeyError(original_key)
 
     def pop(self, name: str, *value: Any) -> Any:
         """Pop a key from the object and return the value. If key does not
@@ -299,11 +838,16 @@ class Diot(dict[str, Any]):
         """
         if self.__diot__["frozen"]:
             raise DiotFrozenError("Cannot pop a frozen diot.")
-        if name in self.__diot__["keymaps"]:
-            name = self.__diot__["keymaps"][name]
-            del self.__diot__["keymaps"][name]
-        if value:
-            return super().pop(name, value[0])
+        keymaps = self.__diot__["keymaps"]
+        name = keymaps.get(name, name)
+        if not dict.__contains__(self, name):
+            if value:
+                return value[0]
+            raise KeyError(name)
+        transformed_key = self.__diot__["transform"](name)
+        if keymaps.get(transformed_key) == name:
+            del keymaps[transformed_key]
+        self.__diot__["version"] += 1
         return super().pop(name)
 
     def popitem(self) -> Tuple[str, Any]:
@@ -322,6 +866,7 @@ class Diot(dict[str, Any]):
             del self.__diot__["keymaps"][key]
         else:
             del self.__diot__["keymaps"][self.__diot__["transform"](key)]
+        self.__diot__["version"] += 1
         return key, val
 
     def update(self, *value: Any, **kwargs: Any) -> None:
@@ -370,6 +915,51 @@ class Diot(dict[str, Any]):
             else:
                 self[key].update_recursively(val)
 
+    def merge(
+        self,
+        *sources: Mapping[str, Any],
+        lists: str = "replace",
+        conflict: Any = "replace",
+    ) -> None:
+        """Deep-merge the sources into the object in place
+
+        Different from `update_recursively`, the sources are merged in one
+        pass without recursion, the existing diot children are reused, and
+        the values are only nested once. When `diot_nest` leaves out `dict`,
+        the mappings of the sources are stored as deep copies, replacing the
+        old values instead of being merged into them.
+
+        Examples:
+            >>> d = Diot(a={"b": 1, "c": [1]})
+            >>> d.merge({"a": {"b": 2}}, {"a": {"c": [2]}}, lists="append")
+            >>> # Diot(a={"b": 2, "c": [1, 2]})
+
+        Args:
+            *sources: The mappings to merge, the later ones take precedence
+            lists: How to merge two lists:
+                replace: replace the old list with the new one
+                append: append the new items to the old ones
+                unique: append the new items that are not in the old ones
+            conflict: How to resolve the conflicts, where a key has different
+                values that can't be merged:
+                replace: use the new value
+                keep: keep the old value
+                error: raise a ValueError
+                Or a function taking the path (a tuple of keys), the old
+                value and the new value, and returning the value to use.
+
+        Raises:
+            DiotFrozenError: when try to merge into a frozen diot
+            ValueError: when lists or conflict is invalid
+        """
+        if self.__diot__["frozen"]:
+            raise DiotFrozenError("Cannot merge into a frozen diot.")
+        if lists not in _MERGE_LISTS:
+            raise ValueError(
+                f"Expect lists to be one of {_MERGE_LISTS}, got {lists!r}."
+            )
+        _merge(self, sources, lists, _merge_conflict(conflict))
+
     def __or__(self, other: dict[str, Any]) -> "Diot":  # type: ignore[override]
         ret = self.copy()
         ret.update(other)
@@ -388,6 +978,7 @@ class Diot(dict[str, Any]):
         else:
             super().__delitem__(name)
             del self.__diot__["keymaps"][self.__diot__["transform"](name)]
+        self.__diot__["version"] += 1
 
     __delattr__ = __delitem__
 
@@ -456,6 +1047,7 @@ class Diot(dict[str, Any]):
                 False: Disable freezing
         """
         self.__diot__["frozen"] = frozen
+        self.__dict__.pop("__content_hash__", None)
         if frozen is True:
             for val in self.values():
                 if isinstance(val, Diot):
@@ -468,6 +1060,7 @@ class Diot(dict[str, Any]):
             recursive: Whether unfreeze all diot objects recursively
         """
         self.__diot__["frozen"] = False
+        self.__dict__.pop("__content_hash__", None)
         if recursive:
             for val in self.values():
                 if isinstance(val, Diot):
@@ -541,6 +1134,122 @@ class Diot(dict[str, Any]):
             ),
         )
 
+    def get_path(self, path: PathType, default: Any = None) -> Any:
+        """Get the value at a dotted path
+
+        Examples:
+            >>> d = Diot(a={"b": [{"c": 1}]})
+            >>> d.get_path("a.b[0].c")    # 1
+            >>> d.get_path("a.x.c", 2)    # 2
+
+        The path is parsed once and cached. Transformed keys are resolved
+        through keymaps at each level, and no intermediate objects are created
+        (the default is not nested either).
+
+        Args:
+            path: The path, such as `a.b[0].c` or `a["x.y"]`, or a sequence of
+                keys and indices
+            default: The value to return if the path does not exist
+
+        Returns:
+            The value at the path or the default
+        """
+        return get_path(self, path, default)
+
+    def set_path(self, path: PathType, value: Any) -> None:
+        """Set the value at a dotted path
+
+        Missing intermediate levels are created as diot objects.
+
+        Args:
+            path: The path, such as `a.b[0].c`
+            value: The value to set
+        """
+        set_path(self, path, value)
+
+    def has_path(self, path: PathType) -> bool:
+        """Check if a dotted path exists
+
+        Args:
+            path: The path, such as `a.b[0].c`
+
+        Returns:
+            True if the path exists otherwise False
+        """
+        return has_path(self, path)
+
+    @staticmethod
+    def accessor(*paths: PathType, **kwargs: Any) -> PathAccessor:
+        """Create a reusable accessor extracting values at several paths
+
+        Examples:
+            >>> get_fields = Diot.accessor("a.b", "c[0]")
+            >>> get_fields(Diot(a={"b": 1}, c=[2]))   # (1, 2)
+
+        Args:
+            *paths: The paths to extract
+            **kwargs: Other arguments for `PathAccessor`, such as `default`
+                for missing paths
+
+        Returns:
+            A callable that takes a diot and returns a tuple of the values
+        """
+        return PathAccessor(*paths, **kwargs)
+
+    def select(self, pattern: PathType) -> Iterator[Tuple[str, Any]]:
+        """Query the values matching a pattern with wildcards
+
+        Examples:
+            >>> d.select("services.*.listeners[*].port")
+            >>> d.select("**.port")
+
+        Args:
+            pattern: The pattern, where `*` matches any key of a mapping,
+                `[*]` any item of a list and `**` any number of levels.
+                Compiled patterns are cached.
+
+        Returns:
+            A generator of (path, value) pairs, walking the tree lazily
+        """
+        return select(self, pattern)
+
+    def apply_patch(self, patch: Iterable[Mapping[str, Any]]) -> None:
+        """Apply a JSON Patch in place
+
+        Examples:
+            >>> d = Diot(a={"b": 1})
+            >>> d.apply_patch([{"op": "replace", "path": "/a/b", "value": 2}])
+
+        Args:
+            patch: The JSON Patch (RFC 6902) operations, for example, exported
+                by `TrackedDiot.export_patch()`. Only `add`, `replace` and
+                `remove` are supported.
+        """
+        apply_patch(self, patch)
+
+    def diff(self, other: Mapping[str, Any]) -> Iterator[Change]:
+        """Generate the changes from this diot to another one
+
+        Examples:
+            >>> before = Diot(a={"b": 1}, c=1)
+            >>> after = Diot(a={"b": 2}, d=1)
+            >>> list(before.diff(after))
+            >>> # [Change(kind='replace', path='a.b', old=1, new=2),
+            >>> #  Change(kind='remove', path='c', old=1, new=None),
+            >>> #  Change(kind='add', path='d', old=None, new=1)]
+
+        Identical subtrees are skipped by identity, and recursively frozen
+        subtrees are compared by their cached content hashes first. Keys are
+        matched through the transformed keys, so `a-b` matches `a_b`.
+
+        Args:
+            other: The other diot or dictionary
+
+        Returns:
+            A generator of the changes, walking both trees lazily
+        """
+        return diff(self, other)
+
     def __contains__(self, name: Any) -> bool:
         if name in self.__diot__["keymaps"]:
             return True
@@ -552,32 +1261,44 @@ class Diot(dict[str, Any]):
             raise DiotFrozenError("Cannot clear a frozen diot.")
         super().clear()
         self.__diot__["keymaps"].clear()
+        self.__diot__["version"] += 1
 
     def copy(self) -> Diot:
         """Shallow copy the object
 
+        The copy is made without running the constructor, so that the keys
+        are not transformed and the values are not nested again. The lists
+        are copied, as they are when nested, so that they are not shared
+        with the object.
+
         Returns:
             The copied object
         """
-        return self.__class__(
-            list(self.items()),
-            diot_nest=self.__diot__["nest"],
-            diot_transform=self.__diot__["transform"],
-            diot_frozen=self.__diot__["frozen"],
-            diot_missing=self.__diot__["missing"],
-        )
+        out = self._copy()
+        for key, value in dict.items(out):
+            if isinstance(value, list):
+                dict.__setitem__(out, key, _copy_list(value))
+        return out
+
+    def _copy(self) -> Diot:
+        """Shallow copy the object, sharing all the values
+
+        Subclasses copy their own states here.
+        """
+        out = dict.__new__(self.__class__)
+        out.__dict__["__inited__"] = True
+        config = self.__diot__.copy()
+        config["keymaps"] = config["keymaps"].copy()
+        _set_config(out, config)
+        # dict.items to read from the storage directly, otherwise dict.update
+        # goes through keys() and __getitem__ of subclasses
+        dict.update(out, dict.items(self))
+        return out
 
     __copy__ = copy
 
     def __deepcopy__(self, memo: Optional[Dict[int, Any]] = None) -> Diot:
-        out = self.__class__()
-        out.__dict__["__diot__"] = deepcopy(self.__diot__)
-
-        memo = memo or {}
-        memo[id(self)] = out
-        for key, value in self.items():
-            out[key] = deepcopy(value, memo)
-        return out
+        return _deepcopy(self, {} if memo is None else memo)
 
     # for pickling and unpickling
     def __getstate__(self) -> dict[str, Any]:
@@ -594,15 +1315,34 @@ class Diot(dict[str, Any]):
             },
         )
 
-    def to_dict(self) -> Dict[str, Any]:
+    def to_dict(
+        self,
+        depth: Optional[int] = None,
+        shallow: bool = False,
+        share: bool = False,
+    ) -> Dict[str, Any]:
         """
         Turn the Box and sub Boxes back into a native
         python dictionary.
 
+        Containers referred to more than once are converted once, so the
+        aliasing is preserved.
+
+        Examples:
+            >>> d.to_dict(shallow=True)  # sub diots are kept
+            >>> d.to_dict(share=True)    # plain lists/dicts are not copied
+
+        Args:
+            depth: Only convert the containers down to this depth, 1 for
+                this diot only
+            shallow: Only convert this diot, the same as `depth=1`
+            share: Keep the dicts, lists and tuples with no diots inside as
+                they are, instead of copying them
+
         Returns:
             The converted python dictionary
         """
-        return to_dict(self)
+        return to_dict(self, depth, shallow, share)  # type: ignore[no-any-return]
 
     dict = as_dict = to_dict
 
@@ -717,6 +1457,182 @@ class Diot(dict[str, Any]):
 
     toml = as_toml = to_toml
 
+    async def ato_json(
+        self,
+        filename: Union[str, PathLike[str]],
+        encoding: str = "utf-8",
+        errors: str = "strict",
+        **json_kwargs: Any,
+    ) -> None:
+        """Save to a json file without blocking the event loop
+
+        The object is converted to a dictionary in the loop, so that a
+        consistent state is saved. Encoding and writing are run in the
+        default executor of the loop.
+
+        Args:
+            filename: The filename to save the json to
+            encoding: The encoding for saving to file
+            errors: The errors handling for saveing to file
+            **json_kwargs: Other kwargs for json.dumps
+        """
+        from .loaders import adump_file, dump_json
+
+        await adump_file(
+            filename,
+            dump_json,
+            self.to_dict(),
+            encoding=encoding,
+            errors=errors,
+            **json_kwargs,
+        )
+
+    async def ato_yaml(
+        self,
+        filename: Union[str, PathLike[str]],
+        default_flow_style: bool = False,
+        encoding: str = "utf-8",
+        errors: str = "strict",
+        **yaml_kwargs: Any,
+    ) -> None:
+        """Save to a yaml file without blocking the event loop
+
+        See `ato_json()`.
+
+        Args:
+            filename: The filename to save the yaml to
+            default_flow_style: The default flow style for yaml dumping
+            encoding: The encoding for saving to file
+            errors: The errors handling for saveing to file
+            **yaml_kwargs: Other kwargs for `yaml.dump`
+        """
+        from .loaders import adump_file, dump_yaml
+
+        await adump_file(
+            filename,
+            dump_yaml,
+            self.to_dict(),
+            default_flow_style,
+            encoding=encoding,
+            errors=errors,
+            **yaml_kwargs,
+        )
+
+    async def ato_toml(
+        self,
+        filename: Union[str, PathLike[str]],
+        encoding: str = "utf-8",
+        errors: str = "strict",
+    ) -> None:
+        """Save to a toml file without blocking the event loop
+
+        See `ato_json()`.
+
+        Args:
+            filename: The filename to save the toml to
+            encoding: The encoding for saving to file
+            errors: The errors handling for saveing to file
+        """
+        from .loaders import adump_file, dump_toml
+
+        await adump_file(
+            filename,
+            dump_toml,
+            self.to_dict(),
+            encoding=encoding,
+            errors=errors,
+        )
+
+    @classmethod
+    async def afrom_json(
+        cls,
+        filename: Union[str, PathLike[str]],
+        **kwargs: Any,
+    ) -> Diot:
+        """Load a json file without blocking the event loop
+
+        Reading and decoding are run in the default executor of the loop.
+
+        Args:
+            filename: The json file
+            **kwargs: The diot configurations, such as `diot_transform`
+
+        Returns:
+            The loaded diot
+        """
+        from .loaders import aload_file
+
+        return cls(await aload_file(filename, "json"), **kwargs)
+
+    @classmethod
+    async def afrom_yaml(
+        cls,
+        filename: Union[str, PathLike[str]],
+        **kwargs: Any,
+    ) -> Diot:
+        """Load a yaml file without blocking the event loop
+
+        See `afrom_json()`.
+
+        Args:
+            filename: The yaml file
+            **kwargs: The diot configurations, such as `diot_transform`
+
+        Returns:
+            The loaded diot
+        """
+        from .loaders import aload_file
+
+        return cls(await aload_file(filename, "yaml"), **kwargs)
+
+    @classmethod
+    async def afrom_toml(
+        cls,
+        filename: Union[str, PathLike[str]],
+        **kwargs: Any,
+    ) -> Diot:
+        """Load a toml file without blocking the event loop
+
+        See `afrom_json()`.
+
+        Args:
+            filename: The toml file
+            **kwargs: The diot configurations, such as `diot_transform`
+
+        Returns:
+            The loaded diot
+        """
+        from .loaders import aload_file
+
+        return cls(await aload_file(filename, "toml"), **kwargs)
+
+    @classmethod
+    async def aload_many(
+        cls,
+        filenames: Iterable[Union[str, PathLike[str]]],
+        limit: int = 8,
+        **kwargs: Any,
+    ) -> List[Diot]:
+        """Load many json, yaml or toml files concurrently
+
+        Examples:
+            >>> confs = await Diot.aload_many(paths, limit=16)
+
+        Args:
+            filenames: The files, whose formats are told by their suffixes
+            limit: The max number of files being loaded at the same time
+            **kwargs: The diot configurations, such as `diot_transform`
+
+        Returns:
+            The loaded diots, in the order of the files
+        """
+        from .loaders import aload_many
+
+        return [
+            cls(data, **kwargs)
+            for data in await aload_many(filenames, limit=limit)
+        ]
+
 
 class CamelDiot(Diot):
     """With camel case conversion"""
@@ -752,24 +1668,44 @@ class FrozenDiot(Diot):
 
 
 class OrderedDiot(Diot):
-    """With key order preserved"""
+    """With key order preserved
+
+    The order of the keys is kept in an `OrderedKeys` object, so that
+    membership, appending, removing and inserting before/after an existing key
+    are O(1).
+    """
 
     def __init__(self, *args: Any, **kwargs: Any) -> None:
+        if self.__dict__.get("__inited__"):
+            return
+
         self.__dict__.setdefault("__diot__", {})
-        self.__diot__["orderedkeys"] = [
+        self.__diot__["orderedkeys"] = OrderedKeys(
             key[0] if isinstance(key, tuple) else key
             for arg in args
+            if arg is not None
             for key in arg
-        ] + [key for key in kwargs if not key.startswith("diot_")]
+        )
+        self.__diot__["orderedkeys"].extend(
+            key for key in kwargs if not key.startswith("diot_")
+        )
         super().__init__(*args, **kwargs)
 
+    def _orderedkeys(self) -> OrderedKeys:
+        """Get the ordered keys, in case they are replaced by a list"""
+        orderedkeys = self.__diot__["orderedkeys"]
+        if not isinstance(orderedkeys, OrderedKeys):
+            orderedkeys = self.__diot__["orderedkeys"] = OrderedKeys(
+                orderedkeys
+            )
+        return orderedkeys
+
     def __repr__(self):
         return self._repr(items="items")
 
     def __setitem__(self, name: str, value: Any) -> None:
         super().__setitem__(name, value)
-        if name not in self.__diot__["orderedkeys"]:
-            self.__diot__["orderedkeys"].append(name)
+        self._orderedkeys().append(name)
 
     def items(self) -> Iterator[Tuple[str, Any]]:  # type: ignore[override]
         """Get the items in the order of the keys
@@ -777,8 +1713,8 @@ class OrderedDiot(Diot):
         Returns:
             The items (key-value) of the object
         """
-        orderedkeys = cast(list[str], self.__diot__["orderedkeys"])
-        return ((key, self[key]) for key in orderedkeys)
+        keys = self._orderedkeys()[:]
+        return zip(keys, map(dict.__getitem__.__get__(self), keys))
 
     def insert(
         self,
@@ -804,6 +1740,28 @@ class OrderedDiot(Diot):
         if position is None:
             position = len(self)
 
+        self._insert(
+            self._orderedkeys().insert,
+            position,
+            name,
+            value,
+        )
+
+    def _insert(
+        self,
+        insert_key: Callable[[Any, str], None],
+        anchor: Any,
+        name: Union[str, Tuple[str, Any], Dict[str, Any]],
+        value: Any,
+    ) -> None:
+        """Insert items with a function to insert the keys to orderedkeys
+
+        Args:
+            insert_key: The function to insert a key relative to the anchor
+            anchor: The position or the existing key
+            name: The key name, a key-value pair or a dictionary
+            value: The value to be inserted
+        """
         if isinstance(name, tuple):  # key-value pair
             if value is not None:
                 raise ValueError(
@@ -814,7 +1772,7 @@ class OrderedDiot(Diot):
                     "Expecting a key-value pair (tuple with 2 elements)."
                 )
             name, value = name
-            self.__diot__["orderedkeys"].insert(position, name)
+            insert_key(anchor, name)
             self[name] = value
 
         elif isinstance(name, dict):
@@ -823,12 +1781,25 @@ class OrderedDiot(Diot):
                     "Unnecessary value provided when "
                     "a ordered-dictionary passed."
                 )
-            self.__diot__["orderedkeys"][position:position] = list(name.keys())
+            orderedkeys = self._orderedkeys()
+            if isinstance(anchor, int):
+                # insert them one after another
+                if anchor < 0:
+                    anchor = max(anchor + len(orderedkeys), 0)
+                for i, key in enumerate(name.keys()):
+                    orderedkeys.insert(anchor + i, key)
+            else:
+                # keep them before/after the same existing key in order
+                keys = list(name.keys())
+                if insert_key == orderedkeys.insert_after:
+                    keys.reverse()
+                for key in keys:
+                    insert_key(anchor, key)
             for key, val in name.items():
                 self[key] = val
 
         else:
-            self.__diot__["orderedkeys"].insert(position, name)
+            insert_key(anchor, name)
             self[name] = value
 
     def insert_before(
@@ -846,13 +1817,12 @@ class OrderedDiot(Diot):
             KeyError: when existing key does not exist
             KeyError: when name is an existing key
         """
-        try:
-            position = self.__diot__["orderedkeys"].index(existing_key)
-        except ValueError:
-            raise KeyError("No such key: %s" % existing_key) from None
-        if name in self.__diot__["orderedkeys"]:
+        orderedkeys = self._orderedkeys()
+        if existing_key not in orderedkeys:
+            raise KeyError("No such key: %s" % existing_key)
+        if not isinstance(name, (tuple, dict)) and name in orderedkeys:
             raise KeyError("Key already exists: %s" % name)
-        self.insert(position, name, value)
+        self._insert(orderedkeys.insert_before, existing_key, name, value)
 
     def insert_after(
         self, existing_key: str, name: str, value: Any = None
@@ -869,13 +1839,12 @@ class OrderedDiot(Diot):
             KeyError: when existing key does not exist
             KeyError: when name is an existing key
         """
-        try:
-            position = self.__diot__["orderedkeys"].index(existing_key)
-        except ValueError:
-            raise KeyError("No such key: %s" % existing_key) from None
-        if name in self.__diot__["orderedkeys"]:
+        orderedkeys = self._orderedkeys()
+        if existing_key not in orderedkeys:
+            raise KeyError("No such key: %s" % existing_key)
+        if not isinstance(name, (tuple, dict)) and name in orderedkeys:
             raise KeyError("Key already exists: %s" % name)
-        self.insert(position + 1, name, value)
+        self._insert(orderedkeys.insert_after, existing_key, name, value)
 
     def keys(self) -> Iterable[str]:  # type: ignore[override]
         """Get the keys in the order they are added
@@ -883,7 +1852,7 @@ class OrderedDiot(Diot):
         Returns:
             The keys (untransformed)
         """
-        return (key for key in cast(list[str], self.__diot__["orderedkeys"]))
+        return iter(self._orderedkeys())
 
     def __iter__(self) -> Iterator[str]:  # type: ignore[override]
         return iter(self.keys())
@@ -894,34 +1863,199 @@ class OrderedDiot(Diot):
         Returns:
             The values of the object
         """
-        return (self[key] for key in cast(list[str], self.__diot__["orderedkeys"]))
+        return map(dict.__getitem__.__get__(self), self._orderedkeys())
 
     def __delitem__(self, name: str) -> None:
+        original_key = self.__diot__["keymaps"].get(name, name)
         super().__delitem__(name)
-        name = self.__diot__["keymaps"].get(name, name)
-        del self.__diot__["orderedkeys"][
-            self.__diot__["orderedkeys"].index(name)
-        ]
+        self._orderedkeys().remove(original_key)
 
     __delattr__ = __delitem__
 
     def pop(self, name: str, *value: Any) -> Any:
+        original_key = self.__diot__["keymaps"].get(name, name)
         ret = super().pop(name, *value)
-        name = self.__diot__["keymaps"].get(name, name)
-        if name in self.__diot__["orderedkeys"]:
-            del self.__diot__["orderedkeys"][
-                self.__diot__["orderedkeys"].index(name)
-            ]
+        self._orderedkeys().discard(original_key)
         return ret
 
+    def popitem(self) -> Tuple[str, Any]:
+        """Pop the last item in the order of the keys
+
+        Returns:
+            A tuple of key and value
+
+        Raises:
+            DiotFrozenError: when try to pop from a frozen diot
+        """
+        if self.__diot__["frozen"]:
+            raise DiotFrozenError("Cannot popitem of a frozen diot.")
+        orderedkeys = self._orderedkeys()
+        if not orderedkeys:
+            raise KeyError("popitem(): dictionary is empty")
+        key = orderedkeys[-1]
+        return key, self.pop(key)
+
+    def move_to_end(self, key: str, last: bool = True) -> None:
+        """Move an existing key to either end, without touching the values
+
+        Args:
+            key: The key (or the transformed key)
+            last: Move to the end if True, otherwise to the beginning
+
+        Raises:
+            KeyError: when the key does not exist
+            DiotFrozenError: when try to reorder a frozen diot
+        """
+        if self.__diot__["frozen"]:
+            raise DiotFrozenError("Cannot reorder a frozen diot.")
+        key = self.__diot__["keymaps"].get(key, key)
+        self._orderedkeys().move_to_end(key, last)
+
+    def reorder(self, keys: Iterable[str]) -> None:
+        """Put the given keys first in the given order, in a single pass
+
+        The rest of the keys keep their relative order after them. The values
+        are not touched.
+
+        Examples:
+            >>> od = OrderedDiot([("a", 1), ("b", 2), ("c", 3), ("d", 4)])
+            >>> od.reorder(["c", "a"])
+            >>> list(od)   # ["c", "a", "b", "d"]
+
+        Args:
+            keys: The keys (or the transformed keys)
+
+        Raises:
+            KeyError: when any of the keys does not exist
+            DiotFrozenError: when try to reorder a frozen diot
+        """
+        if self.__diot__["frozen"]:
+            raise DiotFrozenError("Cannot reorder a frozen diot.")
+        orderedkeys = self._orderedkeys()
+        keymaps = self.__diot__["keymaps"]
+        front = dict.fromkeys(keymaps.get(key, key) for key in keys)
+        for key in front:
+            if key not in orderedkeys:
+                raise KeyError(key)
+        orderedkeys.replace(
+            [*front, *(key for key in orderedkeys if key not in front)]
+        )
+
+    def sort_keys(
+        self,
+        key: Optional[Callable[[str], Any]] = None,
+        reverse: bool = False,
+    ) -> None:
+        """Sort the keys, without touching the values
+
+        Args:
+            key: The function to get the sort key from each key, like the
+                `key` argument of `sorted`
+            reverse: Whether to sort in descending order
+
+        Raises:
+            DiotFrozenError: when try to reorder a frozen diot
+        """
+        if self.__diot__["frozen"]:
+            raise DiotFrozenError("Cannot reorder a frozen diot.")
+        orderedkeys = self._orderedkeys()
+        orderedkeys.replace(sorted(orderedkeys, key=key, reverse=reverse))
+
     def __reversed__(self) -> Iterator[str]:  # type: ignore[override]
-        return reversed(cast(list[str], self.__diot__["orderedkeys"]))
+        return reversed(self._orderedkeys())
 
     def clear(self) -> None:
         super().clear()
-        del self.__diot__["orderedkeys"][:]
+        self._orderedkeys().clear()
 
-    def copy(self) -> OrderedDiot:
-        out = self.__class__(super().copy())
-        out.__diot__["orderedkeys"] = self.__diot__["orderedkeys"][:]
+    def _copy(self) -> OrderedDiot:
+        out = cast(OrderedDiot, super()._copy())
+        out.__diot__["orderedkeys"] = self._orderedkeys().copy()
         return out
+
+
+class SyncDiot(Diot):
+    """A thread-safe diot
+
+    Each diot node has its own re-entrant lock, and nested diots are
+    converted to SyncDiot as well, so writers to different subtrees don't
+    block each other. Mutations, including compound ones like
+    `update_recursively` and `setdefault`, hold the lock of the node, so that
+    `keymaps` is always consistent with the contents. Reads don't take the
+    lock.
+
+    Use `atomic()` to make your own compound operations atomic:
+
+    Examples:
+        >>> d = SyncDiot(counter=0)
+        >>> with d.atomic():
+        >>>     d.counter += 1
+    """
+
+    # converting the items of lists when they are read would race
+    _nest_lazily = False
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        if "__lock__" not in self.__dict__:
+            self.__dict__["__lock__"] = RLock()
+        super().__init__(*args, **kwargs)
+
+    @contextmanager
+    def atomic(self) -> Iterator[SyncDiot]:
+        """Hold the lock of this node for a compound operation
+
+        Yields:
+            self, the reference to this diot.
+        """
+        with self.__lock__:
+            yield self
+
+    def __setitem__(self, name: str, value: Any) -> None:
+        with self.__lock__:
+            super().__setitem__(name, value)
+
+    def __delitem__(self, name: str) -> None:
+        with self.__lock__:
+            super().__delitem__(name)
+
+    __delattr__ = __delitem__
+
+    def pop(self, name: str, *value: Any) -> Any:
+        with self.__lock__:
+            return super().pop(name, *value)
+
+    def popitem(self) -> Tuple[str, Any]:
+        with self.__lock__:
+            return super().popitem()
+
+    def update(self, *value: Any, **kwargs: Any) -> None:
+        with self.__lock__:
+            super().update(*value, **kwargs)
+
+    def update_recursively(self, *value: Any, **kwargs: Any) -> None:
+        with self.__lock__:
+            super().update_recursively(*value, **kwargs)
+
+    def merge(self, *sources: Mapping[str, Any], **kwargs: Any) -> None:
+        with self.__lock__:
+            super().merge(*sources, **kwargs)
+
+    def setdefault(self, name: str, value: Any) -> Any:  # type: ignore
+        with self.__lock__:
+            return super().setdefault(name, value)
+
+    def clear(self) -> None:
+        with self.__lock__:
+            super().clear()
+
+    def copy(self) -> SyncDiot:
+        with self.__lock__:
+            return cast(SyncDiot, super().copy())
+
+    __copy__ = copy
+
+    def _copy(self) -> SyncDiot:
+        with self.__lock__:
+            out = super()._copy()
+        out.__dict__["__lock__"] = RLock()
+        return cast(SyncDiot, out)
@@ -0,0 +1,397 @@
+"""Columnar storage for batches of homogeneous diots, backed by numpy"""
+from __future__ import annotations
+
+from collections.abc import Mapping
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
+
+from .diot import Diot
+from .paths import compile_path, format_path
+
+if TYPE_CHECKING:  # pragma: no cover
+    import numpy
+
+# Python types that numpy can store natively, when all values of a column
+# are of the same type
+_NATIVE_TYPES = (bool, int, float, complex, str, bytes)
+
+
+def _require_numpy() -> Any:
+    try:
+        import numpy  # type: ignore[import]
+    except ImportError:  # pragma: no cover
+        raise ImportError(
+            "You need numpy installed to use DiotFrame."
+        ) from None
+    return numpy
+
+
+def _to_array(np: Any, values: Any) -> numpy.ndarray:
+    """Convert the values of a column to a 1-d numpy array
+
+    Object dtype is only used when the values are not of the same native
+    type, so that numpy doesn't coerce them (e.g. ints to strings).
+    """
+    if isinstance(values, np.ndarray) and values.ndim == 1:
+        return values
+
+    values = list(values)
+    types = {type(value) for value in values}
+    if len(types) == 1:
+        (vtype,) = types
+        if vtype in _NATIVE_TYPES or issubclass(vtype, np.generic):
+            try:
+                return np.asarray(values)
+            except (OverflowError, ValueError):  # pragma: no cover
+                pass
+
+    out = np.empty(len(values), dtype=object)
+    for i, value in enumerate(values):
+        out[i] = value
+    return out
+
+
+def _flatten(
+    record: Any,
+    prefix: Tuple[Any, ...],
+    out: Dict[Tuple[Any, ...], Any],
+    stop: Set[Tuple[Any, ...]],
+) -> None:
+    """Flatten the nested mappings of a record into segments => value
+
+    The mappings at the segments in `stop` are kept as values.
+    """
+    for key, value in record.items():
+        segments = prefix + (key,)
+        if isinstance(value, Mapping) and value and segments not in stop:
+            _flatten(value, segments, out, stop)
+        else:
+            out[segments] = value
+
+
+def _collect(
+    records: Iterable[Any],
+    stop: Set[Tuple[Any, ...]],
+) -> Dict[Tuple[Any, ...], List[Any]]:
+    """Collect the flattened records into columns, filling the missing
+    values with None
+    """
+    columns: Dict[Tuple[Any, ...], List[Any]] = {}
+    n_records = 0
+    for record in records:
+        flat: Dict[Tuple[Any, ...], Any] = {}
+        _flatten(record, (), flat, stop)
+        for segments, value in flat.items():
+            column = columns.get(segments)
+            if column is None:
+                column = columns[segments] = [None] * n_records
+            column.append(value)
+        n_records += 1
+        for column in columns.values():
+            if len(column) < n_records:
+                column.append(None)
+    return columns
+
+
+def _conflicts(fields: Iterable[Tuple[Any, ...]]) -> Set[Tuple[Any, ...]]:
+    """Get the fields that are also the prefixes of other fields"""
+    fields = set(fields)
+    prefixes = {
+        segments[:i] for segments in fields for i in range(1, len(segments))
+    }
+    return fields & prefixes
+
+
+class DiotFrame:
+    """A batch of homogeneous diots stored as columns of numpy arrays
+
+    Each (dotted) field is stored as a numpy array. Object dtype is only used
+    when the values of a field are not of the same native type.
+
+    Examples:
+        >>> frame = DiotFrame.from_diots(records)
+        >>> frame["price"] * frame["qty"]         # column math
+        >>> frame["total"] = frame["price"] * frame["qty"]
+        >>> active = frame[frame["status"] == "active"]  # filtering
+        >>> active[0].profile.country             # row views
+        >>> active.to_diots()
+
+    Args:
+        columns: The fields and their values
+        diot_class: The diot class to convert the rows back, whose transform
+            is also used to access the fields of row views as attributes
+    """
+
+    __slots__ = ("_np", "_columns", "_length", "_diot_class", "_tree")
+
+    def __init__(
+        self,
+        columns: Optional[Mapping[str, Any]] = None,
+        diot_class: type = Diot,
+    ) -> None:
+        self._np = _require_numpy()
+        self._diot_class = diot_class
+        self._columns: Dict[str, Any] = {}
+        self._length = 0
+        self._tree: Optional[Dict[Tuple[Any, ...], Dict[Any, Any]]] = None
+        for i, (field, values) in enumerate((columns or {}).items()):
+            array = _to_array(self._np, values)
+            if i == 0:
+                self._length = len(array)
+            self._check_length(field, array)
+            self._columns[field] = array
+        self._check_fields(self._columns)
+
+    def _check_fields(self, fields: Iterable[str]) -> None:
+        conflicts = _conflicts(compile_path(field) for field in fields)
+        if conflicts:
+            raise ValueError(
+                f"Field {format_path(min(conflicts, key=len))!r} is both "
+                "a value and the parent of other fields."
+            )
+
+    def _check_length(self, field: str, array: Any) -> None:
+        if len(array) != self._length:
+            raise ValueError(
+                f"Column {field!r} has {len(array)} values, "
+                f"expecting {self._length}."
+            )
+
+    @classmethod
+    def from_diots(
+        cls,
+        diots: Iterable[Dict[str, Any]],
+        diot_class: Optional[type] = None,
+    ) -> DiotFrame:
+        """Create a frame from diots
+
+        Nested mappings are flattened into dotted fields. Fields missing in
+        some of the records are filled with None. A field that is a mapping
+        in some records but not in others, for example, `None` for optional
+        nested records, is kept as a single column of the values as they are.
+
+        Args:
+            diots: The diots (or dictionaries)
+            diot_class: The diot class to convert the rows back. If not
+                given, the class of the first record is used if it is a diot.
+
+        Returns:
+            The frame
+        """
+        records = list(diots)
+        if diot_class is None and records:
+            record = records[0]
+            diot_class = record.__class__ if isinstance(record, Diot) else Diot
+
+        columns = _collect(records, set())
+        stop = _conflicts(columns)
+        if stop:
+            # the shortest ones, the longer ones are not reached any more
+            columns = _collect(records, stop)
+
+        return cls(
+            {
+                format_path(segments): values
+                for segments, values in columns.items()
+            },
+            diot_class=diot_class or Diot,
+        )
+
+    def to_diots(self) -> List[Diot]:
+        """Convert the rows back to diots
+
+        Returns:
+            The list of diots
+        """
+        fields = [
+            (compile_path(field), column.tolist())
+            for field, column in self._columns.items()
+        ]
+        out = []
+        for i in range(self._length):
+            record: Dict[Any, Any] = {}
+            for segments, values in fields:
+                node = record
+                for segment in segments[:-1]:
+                    node = node.setdefault(segment, {})
+                node[segments[-1]] = values[i]
+            out.append(self._diot_class(record))
+        return out
+
+    @property
+    def columns(self) -> List[str]:
+        """The names of the fields"""
+        return list(self._columns)
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __contains__(self, field: Any) -> bool:
+        return field in self._columns
+
+    def __iter__(self) -> Iterator[DiotFrameRow]:
+        for i in range(self._length):
+            yield DiotFrameRow(self, i)
+
+    def rows(self) -> Iterator[DiotFrameRow]:
+        """Iterate over the rows as lightweight views
+
+        Returns:
+            The row views
+        """
+        return iter(self)
+
+    def __getitem__(self, key: Any) -> Any:
+        """Get a column, a row view, or a new frame
+
+        Args:
+            key: A field name for the column array, an integer for a row view,
+                or a slice, a boolean mask or an array of indices to select
+                the rows as a new frame
+        """
+        if isinstance(key, str):
+            return self._columns[key]
+        if isinstance(key, (int, self._np.integer)):
+            if key < 0:
+                key += self._length
+            if not 0 <= key < self._length:
+                raise IndexError(f"Row index out of range: {key}")
+            return DiotFrameRow(self, int(key))
+        return self.__class__(
+            {field: column[key] for field, column in self._columns.items()},
+            diot_class=self._diot_class,
+        )
+
+    filter = __getitem__
+
+    def __setitem__(self, field: str, values: Any) -> None:
+        """Set a column
+
+        Args:
+            field: The name of the field
+            values: The values, or a scalar to be broadcast to all rows
+        """
+        if not self._columns:
+            array = _to_array(self._np, values)
+            self._length = len(array)
+        elif self._np.ndim(values) == 0 and not isinstance(values, list):
+            array = _to_array(self._np, [values] * self._length)
+        else:
+            array = _to_array(self._np, values)
+        self._check_length(field, array)
+        if field not in self._columns:
+            self._check_fields([*self._columns, field])
+        self._columns[field] = array
+        self._tree = None
+
+    def __delitem__(self, field: str) -> None:
+        del self._columns[field]
+        self._tree = None
+
+    def __repr__(self) -> str:
+        return (
+            f"<{self.__class__.__name__}: {self._length} rows, "
+            f"columns={self.columns!r}>"
+        )
+
+    def _get_tree(self) -> Dict[Tuple[Any, ...], Dict[Any, Any]]:
+        """Get the tree of the fields for the row views
+
+        It maps the prefix of the segments to a dictionary of the accessible
+        names to a tuple of the next prefix and the field (None if the prefix
+        is not a leaf).
+        """
+        if self._tree is not None:
+            return self._tree
+
+        transform = self._diot_class().__diot__["transform"]
+        tree: Dict[Tuple[Any, ...], Dict[Any, Any]] = {}
+        for field in self._columns:
+            segments = compile_path(field)
+            for i, segment in enumerate(segments):
+                prefix, child = segments[:i], segments[: i + 1]
+                target = (child, field if i == len(segments) - 1 else None)
+                names = tree.setdefault(prefix, {})
+                names[segment] = target
+                if isinstance(segment, (str, bytes)):
+                    names.setdefault(transform(segment), target)
+        self._tree = tree
+        return tree
+
+
+class DiotFrameRow(Mapping):
+    """A lightweight view of a row (or a nested level of it) in a DiotFrame
+
+    Values are read from the columns of the frame when accessed, without
+    materializing a dictionary for the row.
+    """
+
+    __slots__ = ("_frame", "_index", "_prefix")
+
+    def __init__(
+        self,
+        frame: DiotFrame,
+        index: int,
+        prefix: Tuple[Any, ...] = (),
+    ) -> None:
+        self._frame = frame
+        self._index = index
+        self._prefix = prefix
+
+    def _names(self) -> Dict[Any, Any]:
+        return self._frame._get_tree().get(self._prefix, {})
+
+    def __getitem__(self, name: Any) -> Any:
+        child, field = self._names()[name]
+        if field is None:
+            return DiotFrameRow(self._frame, self._index, child)
+        value = self._frame._columns[field][self._index]
+        if isinstance(value, self._frame._np.generic):
+            return value.item()
+        return value
+
+    def __getattr__(self, name: str) -> Any:
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(
+                f"{self.__class__.__name__} object has no attribute {name!r}"
+            ) from None
+
+    def __iter__(self) -> Iterator[Any]:
+        # only the original keys
+        seen = set()
+        for child, _ in self._names().values():
+            if child not in seen:
+                seen.add(child)
+                yield child[-1]
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({dict(self.items())!r})"
+
+    def to_diot(self) -> Diot:
+        """Materialize the row as a diot
+
+        Returns:
+            The diot of the row
+        """
+        return self._frame._diot_class(
+            {
+                key: value.to_diot()
+                if isinstance(value, DiotFrameRow)
+                else value
+                for key, value in self.items()
+            }
+        )
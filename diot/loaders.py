@@ -0,0 +1,265 @@
+"""Load (and save) diots from (and to) json, yaml and toml files"""
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from os import PathLike
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Union
+
+
+def _parse_json(content: bytes) -> Any:
+    import json
+
+    return json.loads(content)
+
+
+def _parse_yaml(content: bytes) -> Any:
+    try:
+        import yaml  # type: ignore[import]
+    except ImportError:  # pragma: no cover
+        raise ImportError(
+            "You need pyyaml installed to load yaml files."
+        ) from None
+    # the C loader is much faster if libyaml is available
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    return yaml.load(content, Loader=loader)
+
+
+def _parse_toml(content: bytes) -> Any:
+    try:
+        import rtoml  # type: ignore[import]
+    except ImportError:
+        try:
+            import tomllib as toml_lib  # type: ignore[import]
+        except ImportError:  # pragma: no cover
+            try:
+                import tomli as toml_lib  # type: ignore[import]
+            except ImportError:
+                raise ImportError(
+                    "You need rtoml or tomli installed to load toml files."
+                ) from None
+        return toml_lib.loads(content.decode("utf-8"))
+    return rtoml.loads(content.decode("utf-8"))
+
+
+def dump_json(data: Any, **json_kwargs: Any) -> str:
+    """Dump data to a json string"""
+    import json
+
+    return json.dumps(data, ensure_ascii=False, **json_kwargs)
+
+
+def dump_yaml(
+    data: Any,
+    default_flow_style: bool = False,
+    **yaml_kwargs: Any,
+) -> str:
+    """Dump data to a yaml string"""
+    try:
+        import yaml  # type: ignore[import]
+    except ImportError:  # pragma: no cover
+        raise ImportError(
+            "You need pyyaml installed to export Diot as yaml."
+        ) from None
+    return yaml.dump(  # type: ignore[no-any-return]
+        data, default_flow_style=default_flow_style, **yaml_kwargs
+    )
+
+
+def dump_toml(data: Any) -> str:
+    """Dump data to a toml string"""
+    try:
+        import rtoml  # type: ignore[import]
+    except ImportError:  # pragma: no cover
+        raise ImportError(
+            "You need rtoml installed to export Diot as toml."
+        ) from None
+    return rtoml.dumps(data)  # type: ignore[no-any-return]
+
+
+# suffix => parser of the file content
+PARSERS: Dict[str, Callable[[bytes], Any]] = {
+    ".json": _parse_json,
+    ".yaml": _parse_yaml,
+    ".yml": _parse_yaml,
+    ".toml": _parse_toml,
+}
+
+
+def load_file(
+    path: Union[str, PathLike[str]],
+    fmt: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Load a json, yaml or toml file into a python dictionary
+
+    Args:
+        path: The path to the file
+        fmt: The format, `json`, `yaml` or `toml`. If not given, it's told by
+            the suffix of the file.
+
+    Returns:
+        The parsed dictionary, an empty one if the file is empty
+
+    Raises:
+        ValueError: when the suffix is not supported or the file doesn't
+            contain a mapping
+    """
+    path = Path(path)
+    parser = PARSERS.get(f".{fmt}" if fmt else path.suffix.lower())
+    if parser is None:
+        raise ValueError(f"Unsupported config file: {str(path)!r}")
+    data = parser(path.read_bytes())
+    if data is None:
+        return {}
+    if not isinstance(data, dict):
+        raise ValueError(
+            f"Expect a mapping in {str(path)!r}, got {type(data).__name__}."
+        )
+    return data
+
+
+def list_files(
+    path: Union[str, PathLike[str]],
+    pattern: str = "*",
+) -> List[Path]:
+    """List the supported files in a directory, in a deterministic order
+
+    Args:
+        path: The directory
+        pattern: The glob pattern, relative to the directory, for example,
+            `*.yaml` or `**/*` to include the subdirectories
+
+    Returns:
+        The files with supported suffixes, sorted by their relative paths
+    """
+    root = Path(path)
+    return sorted(
+        (
+            file
+            for file in root.glob(pattern)
+            if file.suffix.lower() in PARSERS and file.is_file()
+        ),
+        key=lambda file: file.relative_to(root).as_posix(),
+    )
+
+
+def load_files(
+    files: List[Path],
+    workers: Optional[int] = None,
+    processes: bool = False,
+) -> List[Dict[str, Any]]:
+    """Load files concurrently, keeping their order
+
+    Args:
+        files: The files
+        workers: The max number of workers, 1 to load the files serially.
+            See `concurrent.futures` for the defaults.
+        processes: Use a process pool instead of a thread pool. Threads are
+            enough for reading the files, processes also parse the files in
+            parallel, which pays off for large yaml files.
+
+    Returns:
+        The parsed dictionaries, in the order of the files
+    """
+    if workers == 1 or len(files) < 2:
+        return [load_file(file) for file in files]
+
+    executor: Executor = (
+        ProcessPoolExecutor(max_workers=workers)
+        if processes
+        else ThreadPoolExecutor(max_workers=workers)
+    )
+    with executor:
+        return list(executor.map(load_file, files, chunksize=8))
+
+
+async def aload_file(
+    path: Union[str, PathLike[str]],
+    fmt: Optional[str] = None,
+    executor: Optional[Executor] = None,
+) -> Dict[str, Any]:
+    """Load a file in an executor, without blocking the event loop
+
+    Args:
+        path: The path to the file
+        fmt: The format, `json`, `yaml` or `toml`, see `load_file()`
+        executor: The executor, the default one of the loop if not given
+
+    Returns:
+        The parsed dictionary
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, load_file, path, fmt)
+
+
+async def aload_many(
+    paths: Iterable[Union[str, PathLike[str]]],
+    fmt: Optional[str] = None,
+    limit: int = 8,
+    executor: Optional[Executor] = None,
+) -> List[Dict[str, Any]]:
+    """Load files concurrently, with at most `limit` files at a time
+
+    Args:
+        paths: The paths to the files
+        fmt: The format, see `load_file()`
+        limit: The max number of files being loaded at the same time
+        executor: The executor, the default one of the loop if not given
+
+    Returns:
+        The parsed dictionaries, in the order of the paths
+    """
+    semaphore = asyncio.Semaphore(limit)
+
+    async def load(path: Union[str, PathLike[str]]) -> Dict[str, Any]:
+        async with semaphore:
+            return await aload_file(path, fmt, executor)
+
+    return list(await asyncio.gather(*(load(path) for path in paths)))
+
+
+def _write_file(
+    path: Union[str, PathLike[str]],
+    dump: Callable[[], str],
+    encoding: str,
+    errors: str,
+) -> None:
+    # the serializers build the whole string anyway (json.dumps with the C
+    # encoder is much faster than streaming with iterencode), so it's
+    # written at once
+    content = dump()
+    with open(path, "w", encoding=encoding, errors=errors) as fout:
+        fout.write(content)
+
+
+async def adump_file(
+    path: Union[str, PathLike[str]],
+    dump: Callable[..., str],
+    *args: Any,
+    encoding: str = "utf-8",
+    errors: str = "strict",
+    executor: Optional[Executor] = None,
+    **kwargs: Any,
+) -> None:
+    """Serialize and write a file in an executor
+
+    Args:
+        path: The path to the file
+        dump: The function to serialize the data to a string
+        *args: The positional arguments for the dump function
+        encoding: The encoding of the file
+        errors: The errors handling for writing the file
+        executor: The executor, the default one of the loop if not given
+        **kwargs: The keyword arguments for the dump function
+    """
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(
+        executor,
+        _write_file,
+        path,
+        partial(dump, *args, **kwargs),
+        encoding,
+        errors,
+    )
@@ -0,0 +1,353 @@
+"""Diots that notify subscribers of their changes"""
+from __future__ import annotations
+
+import asyncio
+from contextlib import contextmanager
+from itertools import count
+from threading import RLock
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
+
+from .changes import Change, make_change
+from .diot import Diot
+from .paths import _MISSING, PathType, compile_path, format_path
+
+Segments = Tuple[Any, ...]
+
+
+def _adopt(value: Any, parent: Diot, prefix: Segments) -> None:
+    """Link the observable diots in a value to their parent"""
+    if isinstance(value, ObservableDiot):
+        value.__dict__["__parent__"] = (parent, prefix)
+    elif isinstance(value, (list, tuple)):
+        for i, item in enumerate(value):
+            _adopt(item, parent, prefix + (i,))
+
+
+def _release(value: Any, parent: Diot) -> None:
+    """Unlink the observable diots in a removed value from the parent"""
+    if isinstance(value, ObservableDiot):
+        link = value.__dict__.get("__parent__")
+        if link is not None and link[0] is parent:
+            value.__dict__["__parent__"] = None
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            _release(item, parent)
+
+
+def _observables(value: Any) -> Iterator[ObservableDiot]:
+    """The observable diots in a value, including the ones in lists"""
+    if isinstance(value, ObservableDiot):
+        yield value
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            yield from _observables(item)
+
+
+class _Hub:
+    """The subscribers and the pending changes of an observable diot tree
+
+    Changes are coalesced by path until they are flushed to the subscribers:
+    at the end of the outermost `batch()`/`thaw()` block, at the next tick of
+    the running event loop, or right away if there is no event loop running.
+    """
+
+    def __init__(self, transform: Callable[[str], str]) -> None:
+        self.transform = transform
+        self.lock = RLock()
+        self.ids = count()
+        # id => (callback, transformed path)
+        self.subscribers: Dict[int, Tuple[Callable, Segments]] = {}
+        # transformed path => [path, first old value, last new value]
+        self.pending: Dict[Segments, List[Any]] = {}
+        self.depth = 0
+        self.scheduled = False
+
+    def normalize(self, segments: Segments) -> Segments:
+        """Transform the keys of a path, so that aliases match"""
+        return tuple(
+            self.transform(seg) if isinstance(seg, str) else seg
+            for seg in segments
+        )
+
+    def subscribe(self, callback: Callable, segments: Segments) -> int:
+        with self.lock:
+            sid = next(self.ids)
+            self.subscribers[sid] = (callback, self.normalize(segments))
+        return sid
+
+    def emit(self, segments: Segments, old: Any, new: Any) -> None:
+        with self.lock:
+            if not self.subscribers:
+                return
+            key = self.normalize(segments)
+            pending = self.pending.get(key)
+            if pending is None:
+                self.pending[key] = [segments, old, new]
+            else:
+                pending[2] = new
+            if self.depth or self.scheduled:
+                return
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                loop = None
+            else:
+                self.scheduled = True
+
+        if loop is None:
+            self.flush()
+        else:
+            loop.call_soon(self.flush)
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        with self.lock:
+            self.depth += 1
+        try:
+            yield
+        finally:
+            with self.lock:
+                self.depth -= 1
+                flush = not self.depth and not self.scheduled
+            if flush:
+                self.flush()
+
+    def flush(self) -> None:
+        with self.lock:
+            self.scheduled = False
+            pending, self.pending = self.pending, {}
+            subscribers = list(self.subscribers.values())
+
+        changes = []
+        for key, (segments, old, new) in pending.items():
+            change = make_change(format_path(segments), old, new)
+            if change is not None:
+                changes.append((key, change))
+        if not changes:
+            return
+
+        for callback, prefix in subscribers:
+            n_prefix = len(prefix)
+            # changes inside the path, or the path replaced/removed as a whole
+            matched = [
+                change
+                for key, change in changes
+                if key[:n_prefix] == prefix or prefix[: len(key)] == key
+            ]
+            if matched:
+                callback(matched)
+
+
+class ObservableDiot(Diot):
+    """A diot that notifies subscribers of its changes
+
+    Changes made by `__setitem__` (and so attribute setting, `setdefault`,
+    `update`, `update_recursively` and `merge`), `__delitem__`, `pop`,
+    `popitem` and `clear` on the diot or any nested diot are reported to the subscribers
+    in batches. Changes to the same path are coalesced in a batch, and a
+    batch is delivered:
+
+    - at the end of the outermost `batch()` or `thaw()` block
+    - at the next tick of the running asyncio event loop
+    - right after each operation if there is no event loop running
+
+    Paths of the changes are always from the root of the tree. Changes made
+    in place to lists are not observed.
+
+    Examples:
+        >>> conf = ObservableDiot(db={"host": "a"})
+        >>> unsubscribe = conf.subscribe(print, "db")
+        >>> conf.db.host = "b"
+        >>> # [Change(kind='replace', path='db.host', old='a', new='b')]
+        >>> async for changes in conf.watch("db"):
+        >>>     ...
+    """
+
+    # the diots in lists have to be linked to their parents when they are set
+    _nest_lazily = False
+
+    def _root(self) -> Tuple[Diot, Segments]:
+        """Get the root of the tree and the path of this node from it"""
+        node: Diot = self
+        segments: Segments = ()
+        while True:
+            link = node.__dict__.get("__parent__")
+            if link is None:
+                return node, segments
+            node, prefix = link
+            segments = prefix + segments
+
+    def _hub(self) -> _Hub:
+        """Get the hub of the tree, created on the root when needed"""
+        root, _ = self._root()
+        hub = root.__dict__.get("__hub__")
+        if hub is None:
+            hub = root.__dict__["__hub__"] = _Hub(root.__diot__["transform"])
+        return hub
+
+    def _emit(self, key: Any, old: Any, new: Any) -> None:
+        root, segments = self._root()
+        hub = root.__dict__.get("__hub__")
+        if hub is not None:
+            hub.emit(segments + (key,), old, new)
+
+    def subscribe(
+        self,
+        callback: Callable[[List[Change]], Any],
+        path: Optional[PathType] = None,
+    ) -> Callable[[], None]:
+        """Subscribe to the changes of the diot
+
+        Args:
+            callback: The function to call with a list of changes
+            path: Only the changes in or of the path (relative to this diot)
+                are delivered
+
+        Returns:
+            A function to unsubscribe
+        """
+        hub = self._hub()
+        _, segments = self._root()
+        if path is not None:
+            segments += compile_path(path)
+        sid = hub.subscribe(callback, segments)
+
+        def unsubscribe() -> None:
+            with hub.lock:
+                hub.subscribers.pop(sid, None)
+
+        return unsubscribe
+
+    async def watch(
+        self,
+        path: Optional[PathType] = None,
+    ) -> AsyncIterator[List[Change]]:
+        """Watch the changes of the diot in the running event loop
+
+        The changes can be made from other threads as well.
+
+        Examples:
+            >>> async for changes in conf.watch("db"):
+            >>>     ...
+
+        Args:
+            path: Only the changes in or of the path are delivered
+
+        Yields:
+            The batches of changes
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+
+        def callback(changes: List[Change]) -> None:
+            loop.call_soon_threadsafe(queue.put_nowait, changes)
+
+        unsubscribe = self.subscribe(callback, path)
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            unsubscribe()
+
+    @contextmanager
+    def batch(self) -> Iterator[ObservableDiot]:
+        """Deliver the changes made in the block as one batch
+
+        Yields:
+            self, the reference to this diot.
+        """
+        with self._hub().batch():
+            yield self
+
+    @contextmanager
+    def thaw(self, recursive: bool = False):
+        """A context manager for temporarily change the diot
+
+        The changes made in the block are delivered as one batch.
+
+        Args:
+            recursive: Whether unfreeze all diot objects recursively
+
+        Yields:
+            self, the reference to this diot.
+        """
+        with self._hub().batch(), super().thaw(recursive):
+            yield self
+
+    def __deepcopy__(self, memo: Optional[Dict[int, Any]] = None) -> Diot:
+        out = super().__deepcopy__(memo)
+        # the values are copied bypassing __setitem__, link them to the
+        # copied parents
+        seen = {id(out)}
+        stack = [out]
+        while stack:
+            node = stack.pop()
+            for key, value in dict.items(node):
+                _adopt(value, node, (key,))
+                for child in _observables(value):
+                    if id(child) not in seen:
+                        seen.add(id(child))
+                        stack.append(child)
+        return out
+
+    def __setitem__(self, name: str, value: Any) -> None:
+        old = dict.get(self, name, _MISSING)
+        super().__setitem__(name, value)
+        new = dict.__getitem__(self, name)
+        if new is not old:
+            _release(old, self)
+            _adopt(new, self, (name,))
+        self._emit(name, old, new)
+
+    def __delitem__(self, name: str) -> None:
+        name = self.__diot__["keymaps"].get(name, name)
+        old = dict.get(self, name, _MISSING)
+        super().__delitem__(name)
+        _release(old, self)
+        self._emit(name, old, _MISSING)
+
+    __delattr__ = __delitem__
+
+    def pop(self, name: str, *value: Any) -> Any:
+        name = self.__diot__["keymaps"].get(name, name)
+        exists = dict.__contains__(self, name)
+        out = super().pop(name, *value)
+        if exists:
+            _release(out, self)
+            self._emit(name, out, _MISSING)
+        return out
+
+    def popitem(self) -> Tuple[str, Any]:
+        key, value = super().popitem()
+        _release(value, self)
+        self._emit(key, value, _MISSING)
+        return key, value
+
+    def update(self, *value: Any, **kwargs: Any) -> None:
+        with self._hub().batch():
+            super().update(*value, **kwargs)
+
+    def update_recursively(self, *value: Any, **kwargs: Any) -> None:
+        with self._hub().batch():
+            super().update_recursively(*value, **kwargs)
+
+    def merge(self, *sources: Any, **kwargs: Any) -> None:
+        with self._hub().batch():
+            super().merge(*sources, **kwargs)
+
+    def clear(self) -> None:
+        items = list(dict.items(self))
+        super().clear()
+        with self._hub().batch():
+            for key, value in items:
+                _release(value, self)
+                self._emit(key, value, _MISSING)
@@ -0,0 +1,473 @@
+"""Dotted-path access for diot
+
+Paths are strings like `a.b[0].c` or `a["key.with.dots"]`. They are parsed
+once and the compiled form (a tuple of keys and list indices) is cached, so
+repeated lookups with the same path only pay for the descent itself.
+
+Patterns for `select` can also have wildcards: `*` for any key of a mapping,
+`[*]` for any item of a list and `**` for any number of levels.
+"""
+from __future__ import annotations
+
+import re
+from collections.abc import Mapping, MutableMapping
+from functools import lru_cache
+from itertools import chain
+from typing import (
+    Any,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+    cast,
+)
+
+PathType = Union[str, Sequence[Union[str, int]]]
+
+# A marker for missing values while descending
+_MISSING = object()
+
+
+class _Wildcard:
+    """Wildcards in compiled patterns"""
+
+    __slots__ = ("token",)
+
+    def __init__(self, token: str) -> None:
+        self.token = token
+
+    def __repr__(self) -> str:
+        return self.token
+
+
+ANY_KEY = _Wildcard("*")
+ANY_INDEX = _Wildcard("[*]")
+ANY_DEPTH = _Wildcard("**")
+
+_PATH_TOKEN = re.compile(
+    r"""
+    \[\s*(?P<index>-?\d+)\s*\]
+    | \[\s*(?P<star>\*)\s*\]
+    | \[\s*(?P<quote>["'])(?P<qkey>(?:\\.|(?!(?P=quote)).)*)(?P=quote)\s*\]
+    | (?P<dot>\.)
+    | (?P<key>[^.\[\]]+)
+    """,
+    re.VERBOSE,
+)
+_UNESCAPE = re.compile(r"\\(.)")
+_PLAIN_KEY = re.compile(r"[^.\[\]\"']+")
+
+
+@lru_cache(maxsize=4096)
+def _compile_str(
+    path: str,
+    wildcards: bool = False,
+) -> Tuple[Union[str, int, _Wildcard], ...]:
+    """Parse a path string into a tuple of keys (str) and indices (int)
+
+    With wildcards, `*`, `**` and `[*]` are parsed into wildcard markers.
+    """
+    segments: List[Union[str, int, _Wildcard]] = []
+    pos = 0
+    # whether a key is expected (at the start or right after a dot)
+    expect_key = True
+    while pos < len(path):
+        matched = _PATH_TOKEN.match(path, pos)
+        if not matched:
+            raise ValueError(f"Invalid path {path!r} at position {pos}.")
+        if matched.group("dot") is not None:
+            if expect_key:
+                raise ValueError(f"Empty key in path {path!r} at {pos}.")
+            expect_key = True
+        elif matched.group("key") is not None:
+            if not expect_key:
+                raise ValueError(
+                    f"Missing '.' before key in path {path!r} at {pos}."
+                )
+            key = matched.group("key")
+            if wildcards and key == "*":
+                segments.append(ANY_KEY)
+            elif wildcards and key == "**":
+                # a.**.**.b is the same as a.**.b
+                if not segments or segments[-1] is not ANY_DEPTH:
+                    segments.append(ANY_DEPTH)
+            else:
+                segments.append(key)
+            expect_key = False
+        elif matched.group("index") is not None:
+            segments.append(int(matched.group("index")))
+            expect_key = False
+        elif matched.group("star") is not None:
+            if not wildcards:
+                raise ValueError(
+                    f"Wildcards are not allowed in path {path!r}."
+                )
+            segments.append(ANY_INDEX)
+            expect_key = False
+        else:
+            segments.append(_UNESCAPE.sub(r"\1", matched.group("qkey")))
+            expect_key = False
+        pos = matched.end()
+
+    if expect_key and segments:
+        raise ValueError(f"Path {path!r} ends with '.'.")
+    return tuple(segments)
+
+
+def compile_path(path: PathType) -> Tuple[Union[str, int], ...]:
+    """Compile a path into a tuple of segments
+
+    Examples:
+        >>> compile_path("a.b[0].c")     # ("a", "b", 0, "c")
+        >>> compile_path('a["x.y"]')     # ("a", "x.y")
+        >>> compile_path(("a", 0))       # ("a", 0)
+
+    Args:
+        path: The path string, or a sequence of segments already split
+
+    Returns:
+        The compiled path
+
+    Raises:
+        ValueError: when the path string is malformed
+    """
+    if isinstance(path, str):
+        # no wildcards without wildcards=True
+        return cast(Tuple[Union[str, int], ...], _compile_str(path))
+    return tuple(path)
+
+
+def compile_pattern(
+    pattern: PathType,
+) -> Tuple[Union[str, int, _Wildcard], ...]:
+    """Compile a pattern with wildcards into a tuple of segments
+
+    Examples:
+        >>> compile_pattern("a.*.b[*]")   # ("a", ANY_KEY, "b", ANY_INDEX)
+        >>> compile_pattern("**.port")    # (ANY_DEPTH, "port")
+        >>> compile_pattern('a["*"]')     # ("a", "*"), the literal key
+
+    Args:
+        pattern: The pattern string, or a sequence of segments already split
+
+    Returns:
+        The compiled pattern
+    """
+    if isinstance(pattern, str):
+        return _compile_str(pattern, True)
+    return tuple(pattern)
+
+
+def format_path(segments: Sequence[Any]) -> str:
+    """Format segments back to a path string
+
+    Examples:
+        >>> format_path(("a", 0, "x.y"))  # 'a[0]["x.y"]'
+
+    Args:
+        segments: The keys and indices
+
+    Returns:
+        The path string that can be compiled back to the segments
+    """
+    out = []
+    for segment in segments:
+        if isinstance(segment, int) and not isinstance(segment, bool):
+            out.append(f"[{segment}]")
+        elif (
+            isinstance(segment, str)
+            and segment not in ("*", "**")
+            and _PLAIN_KEY.fullmatch(segment)
+            and not segment.strip("-").isdigit()
+        ):
+            out.append(f".{segment}" if out else segment)
+        else:
+            escaped = str(segment).replace("\\", "\\\\").replace('"', '\\"')
+            out.append(f'["{escaped}"]')
+    return "".join(out)
+
+
+def lookup(obj: Any, segment: Union[str, int]) -> Any:
+    """Get the child of obj at segment, or `_MISSING` if it does not exist
+
+    For Diot objects, transformed keys are resolved through `keymaps`.
+    The value is read directly from the storage, without going through
+    `__getitem__`, so that no missing handler is triggered and no exception
+    is raised for missing keys.
+    """
+    if isinstance(obj, dict):
+        value = dict.get(obj, segment, _MISSING)
+        if value is _MISSING and type(obj) is not dict:
+            config = getattr(obj, "__dict__", {}).get("__diot__")
+            if config is not None:
+                key = config["keymaps"].get(segment, _MISSING)
+                if key is not _MISSING:
+                    value = dict.get(obj, key, _MISSING)
+        return value
+
+    if isinstance(obj, (list, tuple)):
+        if isinstance(segment, str):
+            if not segment.lstrip("-").isdigit():
+                return _MISSING
+            segment = int(segment)
+        if -len(obj) <= segment < len(obj):
+            return obj[segment]
+        return _MISSING
+
+    if isinstance(obj, Mapping):
+        return obj.get(segment, _MISSING)
+
+    return _MISSING
+
+
+def get_path(obj: Any, path: PathType, default: Any = None) -> Any:
+    """Get the value at path from obj
+
+    Args:
+        obj: The object to descend from
+        path: The path
+        default: The value to return if the path does not exist
+
+    Returns:
+        The value at the path or the default
+    """
+    for segment in compile_path(path):
+        obj = lookup(obj, segment)
+        if obj is _MISSING:
+            return default
+    return obj
+
+
+def has_path(obj: Any, path: PathType) -> bool:
+    """Check if a path exists in obj
+
+    Args:
+        obj: The object to descend from
+        path: The path
+
+    Returns:
+        True if the path exists otherwise False
+    """
+    for segment in compile_path(path):
+        obj = lookup(obj, segment)
+        if obj is _MISSING:
+            return False
+    return True
+
+
+def set_path(obj: Any, path: PathType, value: Any) -> None:
+    """Set the value at path in obj
+
+    Missing intermediate mappings are created. For Diot objects they are
+    created through `__setitem__`, so they are converted to the same diot
+    class as the parent.
+
+    Args:
+        obj: The object to descend from
+        path: The path
+        value: The value to set
+
+    Raises:
+        ValueError: when the path is empty
+        IndexError: when a list index is out of range
+        TypeError: when an intermediate value is not a container, or a
+            segment on a list is not an index
+    """
+    segments = compile_path(path)
+    if not segments:
+        raise ValueError("Cannot set value to an empty path.")
+
+    for segment in segments[:-1]:
+        child = lookup(obj, segment)
+        if child is _MISSING:
+            if not isinstance(obj, (dict, Mapping)):
+                _list_index(path, segment)
+                raise IndexError(f"Index out of range: {segment!r}")
+            container = cast(MutableMapping[Any, Any], obj)
+            segment = _resolve_key(container, segment)
+            container[segment] = {}
+            child = container[segment]
+        elif not isinstance(child, (dict, Mapping, list)):
+            raise TypeError(
+                f"Cannot set path {path!r}: "
+                f"{segment!r} is not a container ({type(child).__name__})."
+            )
+        obj = child
+
+    segment = segments[-1]
+    if isinstance(obj, list):
+        obj[_list_index(path, segment)] = value
+    elif isinstance(obj, (dict, Mapping)):
+        container = cast(MutableMapping[Any, Any], obj)
+        container[_resolve_key(container, segment)] = value
+    else:
+        raise TypeError(
+            f"Cannot set path {path!r} on {type(obj).__name__} object."
+        )
+
+
+def _list_index(path: PathType, segment: Union[str, int]) -> int:
+    """Get the list index of a segment for set_path()"""
+    if isinstance(segment, int) and not isinstance(segment, bool):
+        return segment
+    if isinstance(segment, str) and segment.lstrip("-").isdigit():
+        return int(segment)
+    raise TypeError(
+        f"Cannot set path {path!r}: {segment!r} is not an index of a list."
+    )
+
+
+def _resolve_key(obj: Any, segment: Union[str, int]) -> Any:
+    """Resolve a transformed key to the original key if it exists"""
+    if isinstance(obj, dict) and type(obj) is not dict:
+        config = getattr(obj, "__dict__", {}).get("__diot__")
+        if config is not None and not dict.__contains__(obj, segment):
+            return config["keymaps"].get(segment, segment)
+    return segment
+
+
+def _match_key(obj: Mapping[Any, Any], key: Any) -> Any:
+    """Find the key of obj that matches key, `_MISSING` if there is none
+
+    Different from `lookup`, the key is transformed by the transform of the
+    diot, so that `a-b` matches `a_b` and vice versa.
+    """
+    if dict.__contains__(obj, key) if isinstance(obj, dict) else key in obj:
+        return key
+    config = getattr(obj, "__dict__", {}).get("__diot__")
+    if config and isinstance(key, str):
+        return config["keymaps"].get(config["transform"](key), _MISSING)
+    return _MISSING
+
+
+class PathAccessor:
+    """A reusable callable extracting the values at several paths at once
+
+    Like `operator.attrgetter`, but for dotted paths over diot objects. The
+    paths are compiled once when the accessor is created. Values are read
+    directly from the storage, so `__getattr__` and `__getitem__` (and their
+    missing handlers) are bypassed. Keys are looked up as they are first, and
+    only fall back to `keymaps` for transformed keys.
+
+    Examples:
+        >>> get_fields = PathAccessor("a.b", "c[0]")
+        >>> get_fields(Diot(a={"b": 1}, c=[2]))   # (1, 2)
+
+    Args:
+        *paths: The paths to extract
+        default: The value for missing paths. If not given, a KeyError will be
+            raised for a missing path.
+    """
+
+    __slots__ = ("paths", "_compiled", "_default")
+
+    def __init__(self, *paths: PathType, default: Any = _MISSING) -> None:
+        self.paths = paths
+        self._compiled = tuple(compile_path(path) for path in paths)
+        self._default = default
+
+    def __call__(self, obj: Any) -> Tuple[Any, ...]:
+        out = []
+        for i, segments in enumerate(self._compiled):
+            value = obj
+            for segment in segments:
+                value = lookup(value, segment)
+                if value is _MISSING:
+                    if self._default is _MISSING:
+                        raise KeyError(self.paths[i])
+                    value = self._default
+                    break
+            out.append(value)
+        return tuple(out)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}{self.paths!r}"
+
+
+def _children(obj: Any) -> Iterator[Tuple[Any, Any]]:
+    """Iterate over the (key, value) pairs of a container lazily"""
+    if isinstance(obj, Mapping):
+        return iter(obj.items())
+    if isinstance(obj, (list, tuple)):
+        return enumerate(obj)
+    return iter(())
+
+
+def _descend(
+    node: Any,
+    i: int,
+    path: Tuple[Any, ...],
+) -> Iterator[Tuple[Any, int, Tuple[Any, ...]]]:
+    """Lazily generate the states of the children of node for select"""
+    for key, child in _children(node):
+        yield child, i, path + (key,)
+
+
+def select(obj: Any, pattern: PathType) -> Iterator[Tuple[str, Any]]:
+    """Query the values matching a pattern
+
+    The tree is walked lazily, so that the matches stream out without
+    materializing intermediate lists.
+
+    Examples:
+        >>> list(select(d, "services.*.listeners[*].port"))
+        >>> # [("services.web.listeners[0].port", 80), ...]
+        >>> list(select(d, "**.port"))
+
+    Args:
+        obj: The object to query
+        pattern: The pattern, where `*` matches any key of a mapping,
+            `[*]` any item of a list or tuple and `**` any number of levels
+            (including none)
+
+    Yields:
+        Tuples of the path (with the original keys) and the value
+    """
+    segments = compile_pattern(pattern)
+    n_segments = len(segments)
+    # paths can be reached more than once with more than one **
+    seen: Optional[Set[Tuple[Any, ...]]] = (
+        set() if segments.count(ANY_DEPTH) > 1 else None
+    )
+
+    # a stack of iterators of (node, index of next segment, path)
+    stack: List[Iterator[Tuple[Any, int, Tuple[Any, ...]]]] = [
+        iter(((obj, 0, ()),))
+    ]
+    while stack:
+        state = next(stack[-1], None)
+        if state is None:
+            stack.pop()
+            continue
+
+        node, i, path = state
+        if i == n_segments:
+            if seen is not None:
+                if path in seen:
+                    continue
+                seen.add(path)
+            yield format_path(path), node
+            continue
+
+        segment = segments[i]
+        if segment is ANY_DEPTH:
+            stack.append(
+                chain(((node, i + 1, path),), _descend(node, i, path))
+            )
+        elif segment is ANY_KEY:
+            if isinstance(node, Mapping):
+                stack.append(_descend(node, i + 1, path))
+        elif segment is ANY_INDEX:
+            if isinstance(node, (list, tuple)):
+                stack.append(_descend(node, i + 1, path))
+        elif not isinstance(segment, _Wildcard):
+            child = lookup(node, segment)
+            if child is not _MISSING:
+                if isinstance(node, (list, tuple)):
+                    key = int(segment) % len(node)
+                else:
+                    key = _resolve_key(node, segment)
+                stack.append(iter(((child, i + 1, path + (key,)),)))
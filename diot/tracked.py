@@ -0,0 +1,108 @@
+"""Diots that track the changed paths for incremental syncing"""
+from __future__ import annotations
+
+from typing import Any, Dict, List, Tuple
+
+from .changes import to_pointer
+from .observable import ObservableDiot
+from .paths import _MISSING, format_path, lookup
+from .utils import to_dict
+
+Segments = Tuple[Any, ...]
+
+
+class TrackedDiot(ObservableDiot):
+    """A diot that records the paths changed since the last checkpoint
+
+    All mutations of the diot and its nested diots are recorded (see
+    `ObservableDiot` for the mutators observed), so that the changes can be
+    exported as a JSON Patch whose size is proportional to what changed, not
+    to the size of the tree. Only the paths are recorded, the values are
+    read from the tree when the patch is exported.
+
+    Examples:
+        >>> conf = TrackedDiot(db={"host": "a"}, log={"level": 1})
+        >>> conf.db.host = "b"
+        >>> conf.export_patch(checkpoint=True)
+        >>> # [{"op": "replace", "path": "/db/host", "value": "b"}]
+        >>> remote.apply_patch(patch)
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        # changes made by the constructor are not recorded
+        self.__dict__["__dirty__"] = {}
+
+    def _emit(self, key: Any, old: Any, new: Any) -> None:
+        if old is not new:
+            root, segments = self._root()
+            segments += (key,)
+            # path => whether it existed at the last checkpoint
+            dirty = root.__dict__.setdefault("__dirty__", {})
+            if segments not in dirty:
+                dirty[segments] = old is not _MISSING
+        super()._emit(key, old, new)
+
+    def _dirty(self) -> Dict[Segments, bool]:
+        """The dirty paths, excluding the ones inside other dirty paths"""
+        root, _ = self._root()
+        dirty = root.__dict__.get("__dirty__", {})
+        out = {}
+        for segments, existed in dirty.items():
+            if not any(
+                segments[:i] in dirty for i in range(1, len(segments))
+            ):
+                out[segments] = existed
+        return out
+
+    @property
+    def dirty_paths(self) -> List[str]:
+        """The paths changed since the last checkpoint
+
+        Paths inside other changed paths are not included.
+        """
+        return [format_path(segments) for segments in self._dirty()]
+
+    def checkpoint(self) -> None:
+        """Forget the changes recorded so far"""
+        root, _ = self._root()
+        root.__dict__["__dirty__"] = {}
+
+    def export_patch(self, checkpoint: bool = False) -> List[Dict[str, Any]]:
+        """Export the changes since the last checkpoint as a JSON Patch
+
+        Paths that are changed and then changed back to not existing (e.g.
+        added and then deleted) are not included.
+
+        Args:
+            checkpoint: Also forget the recorded changes after exporting
+
+        Returns:
+            The JSON Patch (RFC 6902) operations, with the values converted
+            to plain python objects
+        """
+        root, _ = self._root()
+        patch = []
+        for segments, existed in self._dirty().items():
+            value = root
+            for segment in segments:
+                value = lookup(value, segment)
+                if value is _MISSING:
+                    break
+
+            if value is _MISSING:
+                if existed:
+                    patch.append({"op": "remove", "path": to_pointer(segments)})
+                continue
+
+            patch.append(
+                {
+                    "op": "replace" if existed else "add",
+                    "path": to_pointer(segments),
+                    "value": to_dict(value),
+                }
+            )
+
+        if checkpoint:
+            self.checkpoint()
+        return patch
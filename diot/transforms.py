@@ -23,6 +23,14 @@ def safe_transform(item: str) -> str:
     Returns:
         The safely-transformed item
     """
+    # fast paths for the most common keys, giving the same results as the
+    # regular expressions below
+    if type(item) is str and item.isascii() and item.isidentifier():
+        return '_' + item if keyword.iskeyword(item) else item
+    if type(item) is int:
+        # 1 => _1, -1 => _1
+        return '_' + str(abs(item))
+
     # // support bytes transform to keys in bytes?
     if isinstance(item, bytes):
         item = item.decode("utf-8")
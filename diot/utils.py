@@ -1,5 +1,6 @@
 """Utilities for diot"""
-from typing import Any, Iterable, cast
+from itertools import chain
+from typing import Any, Iterable, Iterator, List, Optional, cast
 
 
 class DiotFrozenError(Exception):
@@ -11,12 +12,45 @@ def nest(
     types: Iterable[type],
     dest_type: type,
     frozen: bool,
+    share: bool = False,
 ) -> Any:
-    """Convert values with certain types recursively"""
+    """Convert values with certain types recursively
+
+    Args:
+        value: The value to convert
+        types: The types to convert
+        dest_type: The diot class to convert the dictionaries to
+        frozen: Whether the converted diots are frozen
+        share: Return a DiotList as it is, if it is converted the same way.
+            Otherwise, a new list is built from its raw items, so that the
+            list is not shared between diots.
+    """
     # nothing to convert
     if not types or not isinstance(value, tuple(types)):  # type: ignore
         return value
 
+    if isinstance(value, DiotList):
+        if share and value._nest == (types, dest_type, frozen):
+            return value
+        value = list(list.__iter__(value))
+
+    # items of exact lists are converted lazily, when they are accessed, if
+    # the diot class allows. User-subclassed lists are converted right away,
+    # to keep their classes.
+    if (
+        type(value) is list
+        and list in types  # type: ignore
+        and dict in types  # type: ignore
+        and getattr(dest_type, "_nest_lazily", False)
+    ):
+        # collecting the types runs in C, much faster than checking each item
+        if not any(
+            issubclass(cls, tuple(types))  # type: ignore[arg-type]
+            for cls in set(map(type, value))
+        ):
+            return list(value)
+        return DiotList(value, types, dest_type, frozen)
+
     if (list in types and isinstance(value, list)) or (  # type: ignore
         tuple in types and isinstance(value, tuple)  # type: ignore
     ):
@@ -41,13 +75,587 @@ def nest(
     return value
 
 
-def to_dict(value: Any) -> Any:
-    """Convert converted Diot objects back to dict"""
+class DiotList(list):
+    """A list whose items are converted to diots when they are accessed
+
+    Used for the lists in diots, so that a list of many dictionaries is not
+    converted all at once when the diot is created. The raw items are
+    stored, and converted (with the configurations of the diot) when they
+    are accessed by index or iteration, and the converted items are stored
+    back, so they are only converted once.
+
+    Only the items given when the list is created are converted. Items added
+    later are kept as they are, as they are in a plain list.
+
+    Note that the dictionaries given are not copied, so changing them
+    before they are accessed changes the items as well.
+
+    Args:
+        iterable: The items
+        types: The types to convert, see `nest()`
+        dest_type: The diot class to convert the dictionaries to
+        frozen: Passed to `nest()`
+    """
+
+    __slots__ = ("_nest", "_pending", "_lazy", "_mutations")
+
+    def __init__(
+        self,
+        iterable: Iterable[Any] = (),
+        types: Iterable[type] = (),
+        dest_type: type = dict,
+        frozen: bool = False,
+    ) -> None:
+        super().__init__(iterable)
+        self._nest = (types, dest_type, frozen)
+        # id => the item to be converted, kept so that the id is not reused
+        self._pending: dict[int, Any] = (
+            dict(zip(map(id, list.__iter__(self)), list.__iter__(self)))
+            if types
+            else {}
+        )
+        # whether there may be items not converted yet
+        self._lazy = bool(self._pending)
+        # counted, so that a full iteration can tell if it saw all the items
+        self._mutations = 0
+
+    def _derive(self, items: Iterable[Any], pending: dict[int, Any]) -> Any:
+        """Create a list converted the same way, with the pending items"""
+        out = self.__class__.__new__(self.__class__)
+        list.__init__(out, items)
+        out._nest = self._nest
+        out._pending = pending
+        out._lazy = bool(pending)
+        out._mutations = 0
+        return out
+
+    def _clone(self) -> "DiotList":
+        """Shallow copy the list, keeping the items not converted yet"""
+        out: DiotList = self._derive(list.__iter__(self), self._pending.copy())
+        return out
+
+    def _convert(self, index: int) -> Any:
+        item = list.__getitem__(self, index)
+        if id(item) not in self._pending:
+            return item
+        out = nest(item, *self._nest)
+        if out is not item:
+            list.__setitem__(self, index, out)
+        return out
+
+    def _converted(self) -> None:
+        """Mark all the items as converted"""
+        self._pending = {}
+        self._lazy = False
+
+    def _convert_all(self) -> None:
+        if self._lazy:
+            for i in range(list.__len__(self)):
+                self._convert(i)
+            self._converted()
+
+    def _touch(self) -> None:
+        self._mutations += 1
+
+    def __getitem__(self, index: Any) -> Any:
+        if not self._lazy:
+            return list.__getitem__(self, index)
+        if isinstance(index, slice):
+            for i in range(*index.indices(list.__len__(self))):
+                self._convert(i)
+            return list.__getitem__(self, index)
+        return self._convert(index)
+
+    def __iter__(self) -> Iterator[Any]:
+        if not self._lazy:
+            return list.__iter__(self)
+        return self._iter_lazy()
+
+    def _iter_lazy(self) -> Iterator[Any]:
+        mutations = self._mutations
+        i = 0
+        while i < list.__len__(self):
+            yield self._convert(i)
+            i += 1
+        if mutations == self._mutations:
+            self._converted()
+
+    def __reversed__(self) -> Iterator[Any]:
+        self._convert_all()
+        return list.__reversed__(self)
+
+    def __repr__(self) -> str:
+        self._convert_all()
+        return list.__repr__(self)
+
+    def __add__(self, other: Any) -> Any:
+        if not isinstance(other, list):
+            return NotImplemented
+        # the raw items are kept, to be converted lazily in the new list
+        return self._derive(
+            chain(list.__iter__(self), _raw_iter(other)),
+            {**self._pending, **getattr(other, "_pending", {})},
+        )
+
+    def __radd__(self, other: Any) -> Any:
+        if not isinstance(other, list):
+            return NotImplemented
+        return self._derive(
+            chain(_raw_iter(other), list.__iter__(self)),
+            {**getattr(other, "_pending", {}), **self._pending},
+        )
+
+    def __mul__(self, times: Any) -> Any:
+        self._convert_all()
+        return list.__mul__(self, times)
+
+    __rmul__ = __mul__
+
+    def __reduce_ex__(self, protocol: Any) -> Any:
+        # the raw items are pickled (or copied), to be converted lazily again
+        items = list(list.__iter__(self))
+        pending = self._pending
+        return (
+            _restore_list,
+            (
+                items,
+                *self._nest,
+                [i for i, item in enumerate(items) if id(item) in pending],
+            ),
+        )
+
+    def copy(self) -> List[Any]:
+        self._convert_all()
+        return list.copy(self)
+
+    def pop(self, index: Any = -1) -> Any:
+        if self._lazy:
+            self._convert(index)
+        return list.pop(self, index)
+
+    def sort(self, *args: Any, **kwargs: Any) -> None:
+        self._convert_all()
+        list.sort(self, *args, **kwargs)
+
+    def __setitem__(self, index: Any, value: Any) -> None:
+        list.__setitem__(self, index, value)
+        self._touch()
+
+    def __delitem__(self, index: Any) -> None:
+        list.__delitem__(self, index)
+        self._touch()
+
+    def __iadd__(self, other: Any) -> Any:
+        list.__iadd__(self, other)
+        self._touch()
+        return self
+
+    def append(self, item: Any) -> None:
+        list.append(self, item)
+        self._touch()
+
+    def extend(self, items: Iterable[Any]) -> None:
+        list.extend(self, items)
+        self._touch()
+
+    def insert(self, index: Any, item: Any) -> None:
+        list.insert(self, index, item)
+        self._touch()
+
+
+def _restore_list(
+    items: List[Any],
+    types: Iterable[type],
+    dest_type: type,
+    frozen: bool,
+    pending: List[int],
+) -> DiotList:
+    """Restore a pickled DiotList, with the items not converted yet"""
+    out = DiotList((), types, dest_type, frozen)
+    return out._derive(  # type: ignore[no-any-return]
+        items, {id(items[i]): items[i] for i in pending}
+    )
+
+
+def _raw_iter(value: Any) -> Iterator[Any]:
+    """Iterate over a container, the raw items for DiotList"""
+    if isinstance(value, DiotList):
+        return list.__iter__(value)
+    return iter(value)
+
+
+def _open(value: Any, level: int, memo: dict[int, Any]) -> list[Any]:
+    """Start converting a container, returning its frame for `to_dict()`
+
+    A frame is [original, output, items iterator, level, pending key,
+    whether all the items are kept as they are].
+    """
     if isinstance(value, dict):
-        d = cast(dict[Any, Any], value)
-        return {key: to_dict(val) for key, val in d.items()}
-    if isinstance(value, tuple):
-        return tuple(to_dict(val) for val in cast(tuple[Any, ...], value))
-    if isinstance(value, list):
-        return [to_dict(val) for val in cast(list[Any], value)]
-    return value
+        out: Any = {}
+        items = iter(value.items())
+    else:
+        out = []
+        items = _raw_iter(value)
+    if not isinstance(value, tuple):
+        # registered before the items are converted, so that cycles end here
+        memo[id(value)] = out
+    return [value, out, items, level, None, True]
+
+
+def _close(frame: list[Any], share: bool, memo: dict[int, Any]) -> Any:
+    """Finish converting a container"""
+    value, out = frame[0], frame[1]
+    if share and frame[5] and type(value) in (dict, list, tuple):
+        out = value
+    elif isinstance(value, tuple):
+        out = tuple(out)
+    memo[id(value)] = out
+    return out
+
+
+def _convert_flat(value: Any, share: bool, memo: dict[int, Any]) -> Any:
+    """Convert a list or tuple without containers inside in one go
+
+    Returns:
+        The converted value, or the memo if there are containers inside
+    """
+    # collecting the types runs in C, much faster than isinstance per item
+    if any(
+        issubclass(cls, (dict, list, tuple))
+        for cls in set(map(type, _raw_iter(value)))
+    ):
+        return memo
+    if share and type(value) in (list, tuple):
+        out = value
+    else:
+        out = tuple(value) if isinstance(value, tuple) else list(_raw_iter(value))
+    memo[id(value)] = out
+    return out
+
+
+def to_dict(
+    value: Any,
+    depth: Optional[int] = None,
+    shallow: bool = False,
+    share: bool = False,
+) -> Any:
+    """Convert converted Diot objects back to dict
+
+    The tree is walked iteratively, so deep trees don't hit the recursion
+    limit. A container referred to more than once in the tree is converted
+    once, so the aliasing (and cycles) are preserved in the result.
+
+    Args:
+        value: The value to convert
+        depth: Only convert the containers down to this depth, 1 for the
+            value itself. The values below are kept as they are.
+        shallow: Only convert the value itself, the same as `depth=1`
+        share: Keep the dicts, lists and tuples with no diots inside as they
+            are, instead of copying them. The result shares them with the
+            tree, which saves memory for large trees.
+
+    Returns:
+        The converted value
+    """
+    if shallow:
+        depth = 1
+    containers = (dict, list, tuple)
+    if not isinstance(value, containers) or (depth is not None and depth < 1):
+        return value
+
+    memo: dict[int, Any] = {}
+    stack = [_open(value, 1, memo)]
+    while True:
+        frame = stack[-1]
+        out, items, level = frame[1], frame[2], frame[3]
+        is_dict = isinstance(out, dict)
+        descend = depth is None or level < depth
+        for item in items:
+            key, val = item if is_dict else (None, item)
+            if descend and isinstance(val, containers):
+                # the memo itself as the sentinel of not converted yet
+                converted = memo.get(id(val), memo)
+                if converted is memo and not isinstance(val, dict):
+                    converted = _convert_flat(val, share, memo)
+                if converted is memo:
+                    frame[4] = key
+                    stack.append(_open(val, level + 1, memo))
+                    break
+                if converted is not val:
+                    frame[5] = False
+                val = converted
+
+            if is_dict:
+                out[key] = val
+            else:
+                out.append(val)
+        else:
+            stack.pop()
+            converted = _close(frame, share, memo)
+            if not stack:
+                return converted
+
+            parent = stack[-1]
+            if converted is not frame[0]:
+                parent[5] = False
+            if isinstance(parent[1], dict):
+                parent[1][parent[4]] = converted
+            else:
+                parent[1].append(converted)
+
+
+class _End:
+    """The sentinel marking both ends of the keys in OrderedKeys"""
+
+    __slots__ = ()
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return "<end>"
+
+
+_END = _End()
+
+
+class OrderedKeys:
+    """An ordered set of keys for OrderedDiot
+
+    The keys are kept in a doubly linked list (two dicts of neighbours), so
+    that membership, appending, removing and inserting before/after an
+    existing key are all O(1). A list of the keys is cached for iteration and
+    positional access. Appending keeps the cache, positional insertion updates
+    it in place, and other changes drop it to be rebuilt when it's needed.
+
+    Args:
+        keys: The initial keys. Duplicates are ignored.
+    """
+
+    __slots__ = ("_next", "_prev", "_cache")
+
+    def __init__(self, keys: Iterable[Any] = ()) -> None:
+        self._next: dict[Any, Any] = {_END: _END}
+        self._prev: dict[Any, Any] = {_END: _END}
+        self._cache: Optional[list[Any]] = []
+        for key in keys:
+            self.append(key)
+
+    def _link_before(self, anchor: Any, key: Any) -> None:
+        prev = self._prev[anchor]
+        self._next[prev] = key
+        self._prev[key] = prev
+        self._next[key] = anchor
+        self._prev[anchor] = key
+
+    def _unlink(self, key: Any) -> None:
+        nxt = self._next.pop(key)
+        prev = self._prev.pop(key)
+        self._next[prev] = nxt
+        self._prev[nxt] = prev
+
+    def _as_list(self) -> list[Any]:
+        if self._cache is None:
+            cache = []
+            nexts = self._next
+            key = nexts[_END]
+            while key is not _END:
+                cache.append(key)
+                key = nexts[key]
+            self._cache = cache
+        return self._cache
+
+    def _key_at(self, position: int) -> Any:
+        """Get the key at a (non-negative, in range) position"""
+        if self._cache is not None:
+            return self._cache[position]
+        size = len(self)
+        if position <= size // 2:
+            links, steps = self._next, position
+        else:
+            links, steps = self._prev, size - position - 1
+        key = links[_END]
+        for _ in range(steps):
+            key = links[key]
+        return key
+
+    def __len__(self) -> int:
+        return len(self._next) - 1
+
+    def __contains__(self, key: Any) -> bool:
+        return key in self._next and key is not _END
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self._as_list())
+
+    def __reversed__(self) -> Iterator[Any]:
+        return reversed(self._as_list())
+
+    def __getitem__(self, index: Any) -> Any:
+        return self._as_list()[index]
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, OrderedKeys):
+            return self._as_list() == other._as_list()
+        if isinstance(other, (list, tuple)):
+            return self._as_list() == list(other)
+        return NotImplemented
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self._as_list()!r})"
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        return (self.__class__, (self._as_list()[:],))
+
+    def __copy__(self) -> "OrderedKeys":
+        out = self.__class__.__new__(self.__class__)
+        out._next = self._next.copy()
+        out._prev = self._prev.copy()
+        out._cache = None if self._cache is None else self._cache[:]
+        return out
+
+    copy = __copy__
+
+    def __deepcopy__(self, memo: Any = None) -> "OrderedKeys":
+        # keys are hashable, and are not copied by dict.__deepcopy__ either
+        return self.copy()
+
+    def append(self, key: Any) -> None:
+        """Append a key at the end, if it doesn't exist. O(1)"""
+        if key in self._next:
+            return
+        self._link_before(_END, key)
+        if self._cache is not None:
+            self._cache.append(key)
+
+    def extend(self, keys: Iterable[Any]) -> None:
+        """Append keys at the end"""
+        for key in keys:
+            self.append(key)
+
+    def remove(self, key: Any) -> None:
+        """Remove a key. O(1)
+
+        Raises:
+            KeyError: when the key doesn't exist
+        """
+        if key not in self:
+            raise KeyError(key)
+        self._unlink(key)
+        self._cache = None
+
+    def discard(self, key: Any) -> None:
+        """Remove a key if it exists. O(1)"""
+        if key in self:
+            self._unlink(key)
+            self._cache = None
+
+    def pop(self) -> Any:
+        """Remove and return the last key
+
+        Raises:
+            KeyError: when there is no keys
+        """
+        key = self._prev[_END]
+        if key is _END:
+            raise KeyError("pop from empty OrderedKeys")
+        self._unlink(key)
+        if self._cache is not None:
+            self._cache.pop()
+        return key
+
+    def clear(self) -> None:
+        """Remove all keys"""
+        self._next = {_END: _END}
+        self._prev = {_END: _END}
+        self._cache = []
+
+    def index(self, key: Any) -> int:
+        """Get the position of a key. O(n)
+
+        Raises:
+            KeyError: when the key doesn't exist
+        """
+        if key not in self:
+            raise KeyError(key)
+        return self._as_list().index(key)
+
+    def insert(self, position: int, key: Any) -> None:
+        """Insert a key before the position, like `list.insert`
+
+        An existing key is moved to the position.
+        """
+        if key in self:
+            self.remove(key)
+        size = len(self)
+        if position < 0:
+            position = max(position + size, 0)
+        if position >= size:
+            self.append(key)
+            return
+        self._link_before(self._key_at(position), key)
+        if self._cache is not None:
+            self._cache.insert(position, key)
+
+    def insert_before(self, existing_key: Any, key: Any) -> None:
+        """Insert a key before an existing key. O(1)
+
+        An existing key is moved.
+
+        Raises:
+            KeyError: when the existing key doesn't exist
+        """
+        if existing_key not in self:
+            raise KeyError(existing_key)
+        if key == existing_key:
+            return
+        self.discard(key)
+        self._link_before(existing_key, key)
+        self._cache = None
+
+    def insert_after(self, existing_key: Any, key: Any) -> None:
+        """Insert a key after an existing key. O(1)
+
+        An existing key is moved.
+
+        Raises:
+            KeyError: when the existing key doesn't exist
+        """
+        if existing_key not in self:
+            raise KeyError(existing_key)
+        if key == existing_key:
+            return
+        self.discard(key)
+        self._link_before(self._next[existing_key], key)
+        self._cache = None
+
+    def move_to_end(self, key: Any, last: bool = True) -> None:
+        """Move an existing key to either end. O(1)
+
+        Args:
+            key: The key
+            last: Move to the end if True, otherwise to the beginning
+
+        Raises:
+            KeyError: when the key doesn't exist
+        """
+        if key not in self:
+            raise KeyError(key)
+        self._unlink(key)
+        if last:
+            self._link_before(_END, key)
+            if self._cache is not None and self._cache[-1:] != [key]:
+                self._cache = None
+        else:
+            self._link_before(self._next[_END], key)
+            self._cache = None
+
+    def replace(self, keys: Iterable[Any]) -> None:
+        """Replace all the keys with new ones in a single O(n) pass
+
+        Args:
+            keys: The new keys, without duplicates
+        """
+        ring = [_END, *keys]
+        self._next = dict(zip(ring, ring[1:] + ring[:1]))
+        self._prev = dict(zip(ring, ring[-1:] + ring[:-1]))
+        self._cache = ring[1:]
@@ -0,0 +1,238 @@
+"""Versioned diots with immutable snapshots for concurrent readers"""
+from __future__ import annotations
+
+from copy import deepcopy
+from threading import Lock
+from typing import Any, Dict, Tuple, Union
+
+from .diot import Diot
+from .paths import _MISSING, PathType, compile_path, lookup
+
+
+def _freeze_new(value: Any) -> Any:
+    """Get a recursively frozen copy of a value to be published
+
+    The diots are copied, so that the ones passed in are not frozen, and the
+    lists are turned into tuples, so that the snapshots can't be modified in
+    place. Other values are kept as they are.
+    """
+    if isinstance(value, Diot):
+        out = value._copy()
+        for key, val in dict.items(out):
+            frozen = _freeze_new(val)
+            if frozen is not val:
+                dict.__setitem__(out, key, frozen)
+        out.__diot__["frozen"] = True
+        return out
+    if isinstance(value, list) or type(value) is tuple:
+        # iterating over a DiotList converts the items
+        return tuple(_freeze_new(item) for item in value)
+    return value
+
+
+def _store(node: Diot, key: Any, value: Any) -> None:
+    """Set a value to node, with the nested value frozen"""
+    node[key] = value
+    dict.__setitem__(node, key, _freeze_new(dict.__getitem__(node, key)))
+
+
+def _thawed_copy(node: Diot) -> Diot:
+    """Shallow copy a frozen node to be modified, sharing the children"""
+    out = node._copy()
+    out.__diot__["frozen"] = False
+    return out
+
+
+def _original_key(node: Diot, key: Any) -> Any:
+    """Resolve a transformed key to the original key if it exists"""
+    if dict.__contains__(node, key):
+        return key
+    return node.__diot__["keymaps"].get(key, key)
+
+
+def _merge(node: Diot, patch: Dict[str, Any]) -> Diot:
+    """Merge the patch into a copy of node, copying only the changed paths"""
+    out = _thawed_copy(node)
+    for key, value in patch.items():
+        key = _original_key(out, key)
+        current = dict.get(out, key, _MISSING)
+        if isinstance(current, Diot) and isinstance(value, dict):
+            out[key] = _merge(current, value)
+        else:
+            _store(out, key, value)
+    out.__diot__["frozen"] = True
+    return out
+
+
+def _set_in(
+    node: Any,
+    segments: Tuple[Union[str, int], ...],
+    value: Any,
+    delete: bool = False,
+) -> Any:
+    """Set (or delete) the value at segments in a copy of node
+
+    Only the nodes along the path are copied.
+    """
+    segment, rest = segments[0], segments[1:]
+    if isinstance(node, Diot):
+        out = _thawed_copy(node)
+        key = _original_key(out, segment)
+        if rest:
+            child = dict.get(out, key, _MISSING)
+            if child is _MISSING:
+                child = out.__class__()
+                child.freeze(True)
+            out[key] = _set_in(child, rest, value, delete)
+        elif delete:
+            del out[key]
+        else:
+            _store(out, key, value)
+        out.__diot__["frozen"] = True
+        return out
+
+    if isinstance(node, (list, tuple)):
+        items = list(node)
+        index = int(segment)
+        if rest:
+            items[index] = _set_in(items[index], rest, value, delete)
+        elif delete:
+            del items[index]
+        else:
+            items[index] = _freeze_new(value)
+        try:
+            return node.__class__(items)  # type: ignore[call-arg]
+        except Exception:  # pragma: no cover
+            return items
+
+    raise TypeError(
+        f"Cannot set {segment!r} on {type(node).__name__} object."
+    )
+
+
+class VersionedDiot:
+    """A diot that publishes a new immutable version on each update
+
+    Readers get the current version with `snapshot()` in O(1), without
+    copying and without locking. A snapshot is a recursively frozen diot that
+    never changes, so readers always see a consistent view.
+
+    Writers are serialized. Each update copies only the nodes along the
+    changed paths and shares the unchanged subtrees with the previous
+    version, then publishes the new version with a single reference swap.
+
+    The values are copied when they are published, so that the diots passed
+    in are not frozen, and lists are published as tuples.
+
+    Examples:
+        >>> conf = VersionedDiot({"db": {"host": "a", "port": 1}})
+        >>> snap = conf.snapshot()
+        >>> conf.update_recursively({"db": {"host": "b"}})
+        >>> snap.db.host                 # "a"
+        >>> conf.snapshot().db.host      # "b"
+
+    Args:
+        *args: Anything that can be sent to the diot constructor
+        diot_class: The diot class for the tree
+        **kwargs: keyword arguments that can be sent to the diot constructor
+    """
+
+    __slots__ = ("_current", "_version", "_lock")
+
+    def __init__(
+        self,
+        *args: Any,
+        diot_class: type = Diot,
+        **kwargs: Any,
+    ) -> None:
+        tree = args[0] if len(args) == 1 and not kwargs else None
+        if not isinstance(tree, Diot):
+            tree = diot_class(*args, **kwargs)
+        else:
+            # don't share the other mutable values with the diot passed in
+            tree = deepcopy(tree)
+        self._current = _freeze_new(tree)
+        self._version = 0
+        self._lock = Lock()
+
+    def snapshot(self) -> Diot:
+        """Get the current version of the tree
+
+        Returns:
+            The recursively frozen diot of the current version
+        """
+        return self._current
+
+    @property
+    def version(self) -> int:
+        """The number of updates published"""
+        return self._version
+
+    def __repr__(self) -> str:
+        return (
+            f"{self.__class__.__name__}({dict(self._current)!r}, "
+            f"version={self._version})"
+        )
+
+    def _publish(self, tree: Diot) -> None:
+        self._current = tree
+        self._version += 1
+
+    def update(self, *value: Any, **kwargs: Any) -> None:
+        """Publish a new version with top-level keys replaced
+
+        Args:
+            *value: args that can be sent to dict to update the object
+            **kwargs: kwargs that can be sent to dict to update the object
+        """
+        patch = dict(*value, **kwargs)
+        with self._lock:
+            out = _thawed_copy(self._current)
+            for key, val in patch.items():
+                _store(out, _original_key(out, key), val)
+            out.__diot__["frozen"] = True
+            self._publish(out)
+
+    def update_recursively(self, *value: Any, **kwargs: Any) -> None:
+        """Publish a new version with the patch merged recursively
+
+        Args:
+            *value: args that can be sent to dict to update the object
+            **kwargs: kwargs that can be sent to dict to update the object
+        """
+        patch = dict(*value, **kwargs)
+        with self._lock:
+            self._publish(_merge(self._current, patch))
+
+    def set_path(self, path: PathType, value: Any) -> None:
+        """Publish a new version with the value at a dotted path set
+
+        Args:
+            path: The path, such as `a.b[0].c`
+            value: The value
+        """
+        segments = compile_path(path)
+        if not segments:
+            raise ValueError("Cannot set value to an empty path.")
+        with self._lock:
+            self._publish(_set_in(self._current, segments, value))
+
+    def delete_path(self, path: PathType) -> None:
+        """Publish a new version with the value at a dotted path deleted
+
+        Args:
+            path: The path, such as `a.b[0].c`
+
+        Raises:
+            KeyError: when the path does not exist
+        """
+        segments = compile_path(path)
+        if not segments:
+            raise ValueError("Cannot delete an empty path.")
+        with self._lock:
+            node = self._current
+            for segment in segments:
+                node = lookup(node, segment)
+                if node is _MISSING:
+                    raise KeyError(path)
+            self._publish(_set_in(self._current, segments, None, True))
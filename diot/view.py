@@ -0,0 +1,270 @@
+"""Attribute access over existing dictionaries, without copying them"""
+from __future__ import annotations
+
+from collections.abc import MutableMapping, MutableSequence
+from typing import Any, Callable, Dict, Iterator, List, Optional, Union
+
+from .diot import Diot
+from .transforms import TRANSFORMS
+from .utils import to_dict
+
+_MISSING = object()
+
+
+def _unwrap(value: Any) -> Any:
+    """Get the container wrapped by a view, or the value itself"""
+    if isinstance(value, DiotView):
+        return value.mapping
+    if isinstance(value, DiotListView):
+        return value.sequence
+    return value
+
+
+def _wrap(value: Any, view_class: type, transform: Callable, cached: Any) -> Any:
+    """Wrap a nested container as a view, reusing the cached one if it still
+    wraps the container
+    """
+    if isinstance(value, list):
+        if not isinstance(cached, DiotListView) or cached.sequence is not value:
+            cached = DiotListView(value, transform)
+            cached._view_class = view_class
+        return cached
+    if isinstance(value, Diot) or not isinstance(value, MutableMapping):
+        return value
+    if not isinstance(cached, DiotView) or cached.mapping is not value:
+        cached = view_class(value, transform)
+    return cached
+
+
+def _signature(mapping: MutableMapping[Any, Any]) -> Any:
+    """Get the size and the last key of a mapping
+
+    New keys are added to the end of dictionaries, so the keys hardly change
+    without changing either of them.
+    """
+    try:
+        last = next(reversed(mapping), _MISSING)  # type: ignore[call-overload]
+    except TypeError:
+        last = _MISSING
+    return len(mapping), last
+
+
+class DiotView(MutableMapping):
+    """A proxy with attribute access over a dictionary, reading and writing
+    through to it
+
+    Wrapping is O(1): nothing is copied, and the nested dictionaries and
+    lists are wrapped as views (`DiotView` and `DiotListView`) when they are
+    accessed. The keymaps (transformed keys to the original keys) are only
+    built when a key is not found as it is. They are rebuilt when a key found
+    through them no longer exists, or when a key is not found and the size
+    or the last key of the dictionary has changed since they were built, so
+    repeated misses don't walk the dictionary.
+
+    Values that are diots are returned as they are, and so are tuples.
+
+    Examples:
+        >>> data = json.loads(payload)
+        >>> view = Diot.view(data)
+        >>> view.user.first_name   # data["user"]["first-name"]
+        >>> view.user.age = 30     # data["user"]["age"] = 30
+        >>> view.users[0].first_name   # data["users"][0]["first-name"]
+
+    Args:
+        mapping: The dictionary to wrap
+        diot_transform: The transform for the keys, see `Diot`
+    """
+
+    __slots__ = ("mapping", "_transform", "_keymaps", "_signature", "_views")
+
+    def __init__(
+        self,
+        mapping: MutableMapping[Any, Any],
+        diot_transform: Union[Callable[[str], str], str] = "safe",
+    ) -> None:
+        set_attr = object.__setattr__
+        set_attr(self, "mapping", mapping)
+        set_attr(
+            self,
+            "_transform",
+            TRANSFORMS[diot_transform]
+            if isinstance(diot_transform, str)
+            else diot_transform,
+        )
+        set_attr(self, "_keymaps", None)
+        # tells if the keys may have changed since the keymaps were built
+        set_attr(self, "_signature", None)
+        # key => the view of the nested container
+        set_attr(self, "_views", {})
+
+    def _resolve(self, key: Any) -> Any:
+        """Get the key of the mapping that matches key, or key itself"""
+        mapping = self.mapping
+        if key in mapping or not isinstance(key, str):
+            return key
+
+        keymaps: Optional[Dict[Any, Any]] = self._keymaps
+        signature = _signature(mapping)
+        if keymaps is not None:
+            orig = keymaps.get(key, _MISSING)
+            if orig is _MISSING:
+                if signature == self._signature:
+                    return key
+            elif orig in mapping:
+                return orig
+
+        # not found through the keymaps, which may be outdated
+        transform = self._transform
+        keymaps = {
+            transform(orig) if isinstance(orig, str) else orig: orig
+            for orig in mapping
+        }
+        object.__setattr__(self, "_keymaps", keymaps)
+        object.__setattr__(self, "_signature", signature)
+        return keymaps.get(key, key)
+
+    def __getitem__(self, key: Any) -> Any:
+        key = self._resolve(key)
+        value = self.mapping[key]
+        cached = self._views.get(key)
+        view = _wrap(value, self.__class__, self._transform, cached)
+        if view is not value and view is not cached:
+            self._views[key] = view
+        return view
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        self.mapping[self._resolve(key)] = _unwrap(value)
+
+    def __delitem__(self, key: Any) -> None:
+        key = self._resolve(key)
+        del self.mapping[key]
+        self._views.pop(key, None)
+
+    def __getattr__(self, name: str) -> Any:
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(
+                f"{self.__class__.__name__} object has no attribute {name!r}"
+            ) from None
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        self[name] = value
+
+    def __delattr__(self, name: str) -> None:
+        try:
+            del self[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __contains__(self, key: Any) -> bool:
+        return self._resolve(key) in self.mapping
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self.mapping)
+
+    def __len__(self) -> int:
+        return len(self.mapping)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.mapping!r})"
+
+    def to_dict(
+        self,
+        depth: Optional[int] = None,
+        shallow: bool = False,
+        share: bool = False,
+    ) -> Dict[Any, Any]:
+        """Convert the dictionary, with the diots inside, to a plain one
+
+        Args:
+            depth: Only convert the containers down to this depth
+            shallow: Only convert the dictionary itself
+            share: Keep the containers with no diots inside as they are,
+                see `Diot.to_dict()`
+
+        Returns:
+            The converted dictionary
+        """
+        return to_dict(  # type: ignore[no-any-return]
+            self.mapping, depth, shallow, share
+        )
+
+    dict = as_dict = to_dict
+
+    def to_diot(self, diot_class: type = Diot, **kwargs: Any) -> Diot:
+        """Copy the dictionary into a diot
+
+        Args:
+            diot_class: The diot class
+            **kwargs: The diot configurations, such as `diot_transform`
+
+        Returns:
+            The diot
+        """
+        return diot_class(self.mapping, **kwargs)
+
+
+class DiotListView(MutableSequence):
+    """A proxy over a list in a `DiotView`, wrapping the dictionaries in it
+    as views when they are accessed
+
+    Reads and writes go through to the list.
+
+    Args:
+        sequence: The list to wrap
+        diot_transform: The transform for the keys, see `Diot`
+    """
+
+    __slots__ = ("sequence", "_transform", "_view_class", "_views")
+
+    def __init__(
+        self,
+        sequence: List[Any],
+        diot_transform: Union[Callable[[str], str], str] = "safe",
+    ) -> None:
+        self.sequence = sequence
+        self._transform = (
+            TRANSFORMS[diot_transform]
+            if isinstance(diot_transform, str)
+            else diot_transform
+        )
+        self._view_class: type = DiotView
+        # index => the view of the nested container
+        self._views: Dict[int, Any] = {}
+
+    def __getitem__(self, index: Any) -> Any:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self.sequence)))]
+
+        value = self.sequence[index]
+        if index < 0:
+            index += len(self.sequence)
+        cached = self._views.get(index)
+        view = _wrap(value, self._view_class, self._transform, cached)
+        if view is not value and view is not cached:
+            self._views[index] = view
+        return view
+
+    def __setitem__(self, index: Any, value: Any) -> None:
+        if isinstance(index, slice):
+            self.sequence[index] = [_unwrap(val) for val in value]
+        else:
+            self.sequence[index] = _unwrap(value)
+
+    def __delitem__(self, index: Any) -> None:
+        del self.sequence[index]
+        self._views.clear()
+
+    def insert(self, index: int, value: Any) -> None:
+        self.sequence.insert(index, _unwrap(value))
+        self._views.clear()
+
+    def __len__(self) -> int:
+        return len(self.sequence)
+
+    def __eq__(self, other: Any) -> bool:
+        return self.sequence == _unwrap(other)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.sequence!r})"
@@ -0,0 +1,140 @@
+"""Diots backed by files, reloaded in place when the files change"""
+from __future__ import annotations
+
+import os
+from collections.abc import Mapping
+from functools import partial
+from os import PathLike
+from pathlib import Path
+from threading import Lock
+from time import monotonic
+from typing import Any, Iterator, List, Optional, Tuple, Union
+
+from .changes import Change, apply_changes, diff
+from .diot import Diot
+from .loaders import load_file
+from .paths import format_path
+
+
+class FileDiot(Mapping):
+    """A read-only handle of a diot loaded from a json, yaml or toml file
+
+    The file is loaded at the first access, and the parsed tree is cached.
+    Later accesses check the file (by its modification time, size and inode)
+    at most every `interval` seconds, and when it has changed, only the
+    differences are applied to the cached tree. So the tree, and the nested
+    diots that callers hold, stay the same objects and stay up to date.
+
+    Keys and the methods of the tree are available on the handle directly.
+    The tree is a diot of `diot_class`, for example, with `ObservableDiot`,
+    the subscribers are notified of the changes when the file is reloaded.
+
+    Examples:
+        >>> conf = Diot.watch_file("conf.yaml", interval=5)
+        >>> db = conf.db   # loaded here
+        >>> db.host        # the latest value, checked at most every 5s
+
+    Args:
+        path: The path to the file
+        interval: The min number of seconds between the checks of the file
+        fmt: The format, `json`, `yaml` or `toml`. If not given, it's told by
+            the suffix of the file.
+        diot_class: The class of the tree
+        **kwargs: The diot configurations, such as `diot_transform`
+    """
+
+    __slots__ = (
+        "path",
+        "fmt",
+        "interval",
+        "_factory",
+        "_tree",
+        "_signature",
+        "_checked",
+        "_lock",
+    )
+
+    def __init__(
+        self,
+        path: Union[str, PathLike[str]],
+        interval: float = 1.0,
+        fmt: Optional[str] = None,
+        diot_class: type = Diot,
+        **kwargs: Any,
+    ) -> None:
+        self.path = Path(path)
+        self.fmt = fmt
+        self.interval = interval
+        self._factory = partial(diot_class, **kwargs)
+        self._tree: Optional[Diot] = None
+        self._signature: Optional[Tuple[int, int, int]] = None
+        self._checked = float("-inf")
+        self._lock = Lock()
+
+    @property
+    def diot(self) -> Diot:
+        """The tree, with the file checked if `interval` seconds have passed"""
+        if monotonic() - self._checked >= self.interval:
+            self.refresh()
+        return self._tree  # type: ignore[return-value]
+
+    def refresh(self) -> List[Change]:
+        """Check the file right away, and reload it if it has changed
+
+        Returns:
+            The changes applied to the tree, empty at the first load
+
+        Raises:
+            OSError: when the file can't be read
+            ValueError: when the file can't be parsed into a mapping
+        """
+        with self._lock:
+            # stat before reading, so a change during the reading is caught
+            # by the next check
+            stat = os.stat(self.path)
+            signature = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+            self._checked = monotonic()
+            if signature == self._signature:
+                return []
+
+            new = self._factory(load_file(self.path, self.fmt))
+            tree = self._tree
+            if tree is None:
+                self._tree = new
+                changes = []
+            else:
+                # applied with the raw paths, as the keys that are not
+                # strings can't be parsed back from the formatted ones
+                changes = list(diff(tree, new, raw=True))
+                frozen = tree.__diot__["frozen"]
+                if frozen:
+                    with tree.thaw(frozen is True):
+                        apply_changes(tree, changes)
+                else:
+                    apply_changes(tree, changes)
+                changes = [
+                    change._replace(path=format_path(change.path))
+                    for change in changes
+                ]
+            self._signature = signature
+            return changes
+
+    def __getitem__(self, key: Any) -> Any:
+        return self.diot[key]
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return getattr(self.diot, name)
+
+    def __contains__(self, key: Any) -> bool:
+        return key in self.diot
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self.diot)
+
+    def __len__(self) -> int:
+        return len(self.diot)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({str(self.path)!r})"
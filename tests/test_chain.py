@@ -0,0 +1,100 @@
+import pytest
+from diot import ChainDiot, Diot
+
+
+@pytest.fixture
+def defaults():
+    return Diot(
+        {"db": {"host": "localhost", "port": 5432, "opts": {"a": 1}}, "debug": False}
+    )
+
+
+@pytest.fixture
+def env():
+    return Diot({"db": {"host": "db.prod", "opts": {"b": 2}}, "log-level": 1})
+
+
+def test_chain_lookup(defaults, env):
+    chain = ChainDiot(env, defaults)
+    assert chain.db.host == "db.prod"
+    assert chain.db.port == 5432
+    assert chain["db"]["opts"] == {"a": 1, "b": 2}
+    assert chain.log_level == chain["log-level"] == 1
+    assert chain.debug is False
+    assert "log_level" in chain
+    assert "x" not in chain
+    assert set(chain) == {"db", "debug", "log-level"}
+    assert len(chain) == 3
+    assert chain.get("x", 1) == 1
+    with pytest.raises(KeyError):
+        chain["x"]
+    with pytest.raises(AttributeError):
+        chain.x
+
+    assert chain.to_dict() == {
+        "db": {"host": "db.prod", "port": 5432, "opts": {"a": 1, "b": 2}},
+        "debug": False,
+        "log-level": 1,
+    }
+    merged = defaults.copy()
+    merged.update_recursively(env)
+    assert chain == merged
+    assert isinstance(chain.to_diot(), Diot)
+    assert chain.to_diot() == merged
+
+    # a non-mapping shadows the mappings in the lower layers
+    chain = ChainDiot({"db": {"host": "x"}}, {"db": 1}, defaults)
+    assert chain.db.to_dict() == {"host": "x"}
+    assert ChainDiot({"db": 1}, defaults).db == 1
+    assert repr(ChainDiot()) == "ChainDiot([Diot({})])"
+
+
+def test_chain_cache(defaults, env):
+    chain = ChainDiot(env, defaults)
+    db = chain.db
+    assert chain.db is db
+    assert chain.db.opts is db.opts
+
+    # nested changes are seen by the cached views
+    defaults.db.port = 1
+    assert chain.db is db
+    assert db.port == 1
+
+    # changes at the level drop the cache
+    env.db = {"host": "x"}
+    assert chain.db is not db
+    assert chain.db.host == "x"
+    assert chain.db.opts == {"a": 1}
+    del env.db
+    assert chain.db.host == "localhost"
+
+    # views from other mappings are not cached
+    chain = ChainDiot({"a": {"b": 1}})
+    assert chain.a is not chain.a
+
+
+def test_chain_write(defaults, env):
+    request = Diot()
+    chain = ChainDiot(env, defaults).new_child(request)
+    assert chain.maps == [request, env, defaults]
+    assert chain.parents.maps == [env, defaults]
+
+    chain.debug = True
+    chain.db.opts.c = 3
+    chain.db.port = 1
+    assert request == {"debug": True, "db": {"opts": {"c": 3}, "port": 1}}
+    assert chain.db.opts == {"a": 1, "b": 2, "c": 3}
+    assert chain.db.port == 1
+    assert defaults.db.port == 5432
+
+    del chain.db.port
+    assert chain.db.port == 5432
+    with pytest.raises(KeyError):
+        del chain.db["port"]
+    with pytest.raises(AttributeError):
+        del chain.log_level
+    chain["log_level"] = 2
+    assert chain.log_level == 2
+    assert env["log-level"] == 1
+
+    assert chain.new_child().maps[1:] == chain.maps
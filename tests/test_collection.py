@@ -0,0 +1,112 @@
+import pytest
+from diot import Diot, DiotCollection
+
+
+@pytest.fixture
+def records():
+    return [
+        {"name": "a", "status": "active", "profile": {"country": "NL"}},
+        {"name": "b", "status": "inactive", "profile": {"country": "NL"}},
+        {"name": "c", "status": "active", "profile": {"country": "DE"}},
+        {"name": "d", "status": "active", "tags": ["x"]},
+    ]
+
+
+def test_where(records):
+    users = DiotCollection(records, indexes=["status"])
+    assert all(isinstance(user, Diot) for user in users)
+    assert users.indexes == ["status"]
+
+    active = users.where(status="active")
+    assert [user.name for user in active] == ["a", "c", "d"]
+    # the same objects
+    assert active[0] is users[0]
+
+    # non-indexed field
+    assert [u.name for u in users.where({"profile.country": "NL"})] == [
+        "a",
+        "b",
+    ]
+    users.create_index("profile.country")
+    assert [
+        u.name
+        for u in users.where({"profile.country": "NL"}, status="active")
+    ] == ["a"]
+    assert users.where(status="nosuch") == []
+    assert len(users.where()) == 4
+
+    # unhashable values
+    users.create_index("tags")
+    assert [u.name for u in users.where(tags=["x"])] == ["d"]
+
+    # diots are compared by contents, with or without the index
+    for query in ({"country": "NL"}, Diot(country="NL")):
+        assert [u.name for u in users.where(profile=query)] == ["a", "b"]
+    users.create_index("profile")
+    for query in ({"country": "NL"}, Diot(country="NL")):
+        assert [u.name for u in users.where(profile=query)] == ["a", "b"]
+    users.drop_index("profile")
+
+    users.drop_index("tags")
+    assert users.indexes == ["status", "profile.country"]
+    with pytest.raises(KeyError):
+        users.drop_index("tags")
+
+
+def test_maintain_indexes(records):
+    users = DiotCollection(records, indexes=["status", "tags"])
+    users.append({"name": "e", "status": "active"})
+    assert [u.name for u in users.where(status="active")] == ["a", "c", "d", "e"]
+
+    users.remove(users[0])
+    assert [u.name for u in users.where(status="active")] == ["c", "d", "e"]
+
+    last = users.pop()
+    assert last.name == "e"
+    assert [u.name for u in users.where(status="active")] == ["c", "d"]
+
+    users[0] = Diot(name="x", status="inactive")
+    assert [u.name for u in users.where(status="inactive")] == ["x"]
+
+    del users[1:]
+    assert users.where(status="active") == []
+    assert users.where(tags=["x"]) == []
+
+    # the same item twice
+    item = Diot(name="y", status="active")
+    users.extend([item, item])
+    del users[1]
+    assert users.where(status="active") == [item]
+    del users[1]
+    assert users.where(status="active") == []
+
+    # in-place changes need reindexing
+    users.append(item)
+    item.status = "inactive"
+    assert users.where(status="active") == [item]
+    users.reindex(item)
+    assert users.where(status="active") == []
+    item.status = "active"
+    users.reindex()
+    assert users.where(status="active") == [item]
+
+    users.clear()
+    assert len(users) == 0
+    assert users.indexes == ["status", "tags"]
+
+
+def test_collection_misc(records):
+    users = DiotCollection(records, indexes=["status"])
+    sub = users[:2]
+    assert isinstance(sub, DiotCollection)
+    assert sub.indexes == ["status"]
+    assert [u.name for u in sub.where(status="active")] == ["a"]
+    assert users[0] in users
+    assert users == records
+    assert users.to_list() == records
+    assert repr(sub).startswith("DiotCollection([")
+
+    with pytest.raises(TypeError):
+        users.append(1)
+    with pytest.raises(TypeError):
+        users[:1] = []
@@ -1,5 +1,6 @@
+import os
 import pytest
-from copy import deepcopy
+from copy import copy, deepcopy
 from argparse import Namespace
 from collections import OrderedDict
 from diot import Diot, CamelDiot, SnakeDiot, OrderedDiot, DiotFrozenError
@@ -149,6 +150,27 @@ def test_unicode_key():
     assert dt.a_b == 1
 
 
+def test_safe_transform_fast_paths():
+    from diot.transforms import safe_transform
+
+    assert safe_transform("a_b") == "a_b"
+    assert safe_transform("class") == "_class"
+    assert safe_transform("False") == "_False"
+    assert safe_transform("é") == "_"
+    assert safe_transform(3) == "_3"
+    assert safe_transform(-3) == "_3"
+    assert safe_transform(True) == "_True"
+    assert safe_transform((3, 4)) == "_3_4_"
+
+    dt = Diot({1: "a", -2: "b", "c": 3})
+    assert dt._1 == "a"
+    assert dt._2 == "b"
+    assert dt[-2] == "b"
+    # collisions are still detected
+    with pytest.raises(KeyError):
+        dt[2] = 1
+
+
 def test_bytes_key():
     dt = Diot({b"a_@_b": 1})
     assert dt.a__b == 1
@@ -172,6 +194,159 @@ def test_to_dict():
     assert d == {"a": {"b": {"c": [{"d": 1}], "e": ({"f": 2},)}}}
 
 
+def test_to_dict_options():
+    shared = Diot(x=1)
+    plain = [1, 2, "y"]
+    dt = Diot(a={"b": shared, "c": shared}, p=plain, t=(1, 2))
+    dt.a.self = dt
+
+    d = dt.to_dict()
+    assert type(d["a"]["b"]) is dict
+    # aliasing and cycles preserved
+    assert d["a"]["b"] is d["a"]["c"]
+    assert d["a"]["self"] is d
+    assert d["p"] == plain and d["p"] is not dt.p
+
+    d = dt.to_dict(share=True)
+    assert d["p"] is dt.p
+    assert d["t"] is dt.t
+    assert type(d["a"]) is dict
+    assert d["a"]["self"] is d
+
+    d = dt.to_dict(shallow=True)
+    assert type(d) is dict
+    assert d["a"] is dt.a
+    d = dt.to_dict(depth=2)
+    assert type(d["a"]) is dict
+    assert d["a"]["b"] is shared
+    assert dt.to_dict(depth=0) is dt
+
+    # deep trees don't hit the recursion limit
+    deep = node = Diot()
+    for _ in range(5000):
+        node.a = Diot()
+        node = node.a
+    out = deep.to_dict()
+    for _ in range(5000):
+        out = out["a"]
+    assert out == {}
+
+
+def test_diot_list():
+    from pickle import dumps, loads
+    from diot.utils import DiotList
+
+    class MyList(list):
+        pass
+
+    raw = [{"a": 1}, {"b": [{"c": 2}]}, 3]
+    dt = Diot(items=raw, mine=MyList([{"a": 1}]), nums=[1, 2], t=({"a": 1},))
+    items = dt["items"]
+    assert isinstance(items, DiotList)
+    assert items is not raw
+    # user subclasses are converted right away, lists without containers
+    # and tuples are not lazy
+    assert type(dt.mine) is MyList and isinstance(list.__getitem__(dt.mine, 0), Diot)
+    assert type(dt.nums) is list
+    assert isinstance(dt.t[0], Diot)
+
+    # converted on access, only once
+    assert type(list.__getitem__(items, 1)) is dict
+    assert items[0].a == 1
+    assert items[0] is items[0]
+    assert type(list.__getitem__(items, 1)) is dict
+    assert items[1].b[0].c == 2
+    assert items[-1] == 3
+    assert [type(x) for x in items[:2]] == [Diot, Diot]
+    assert items == raw
+    assert list(items) == raw
+    assert items._lazy is False
+
+    # items added later are kept as they are
+    appended = {"d": 4}
+    items.append(appended)
+    assert items[-1] is appended
+    items.insert(0, {"e": 5})
+    assert [type(x) for x in items] == [dict, Diot, Diot, int, dict]
+    items[0] = {"f": 6}
+    assert items.pop(0) == {"f": 6}
+    items.extend([{"g": 7}])
+    items += [{"h": 8}]
+    assert type(list(reversed(items))[0]) is dict
+    assert repr(items).startswith("[Diot(")
+
+    lazy = Diot(items=[{"a": 1}, {"a": 2}])["items"]
+    lazy.insert(0, {"x": 0})
+    assert [type(x) for x in lazy[:]] == [dict, Diot, Diot]
+    lazy = Diot(items=[{"a": 1}])["items"]
+    assert isinstance((lazy + [])[-1], Diot)
+    assert [type(x) for x in lazy + [{"i": 9}]] == [Diot, dict]
+    assert [type(x) for x in [{"i": 9}] + lazy] == [dict, Diot]
+    assert isinstance(lazy.copy()[-1], Diot)
+
+    # the dictionaries given are not copied until they are converted
+    raw = [{"a": 1}]
+    dt = Diot(items=raw)
+    raw[0]["a"] = 99
+    assert dt["items"][0].a == 99
+
+    dt2 = Diot(items=[{"a": 2}, {"a": 1}])
+    dt2["items"].sort(key=lambda x: x.a)
+    assert dt2["items"][0].a == 1
+    assert isinstance((dt2["items"] * 2)[3], Diot)
+
+    copied = copy(dt2["items"])
+    assert isinstance(copied, DiotList) and copied[0] is dt2["items"][0]
+    pickled = loads(dumps(Diot(items=[{"a": 1}])))
+    assert pickled["items"][0].a == 1
+    lazy = Diot(items=[{"a": 1}])["items"]
+    lazy.append({"b": 2})
+    for copied in (loads(dumps(lazy)), deepcopy(lazy), copy(lazy)):
+        assert [type(x) for x in copied] == [Diot, dict]
+
+    # exported without being converted
+    dt3 = Diot(items=[{"a": 1}])
+    assert dt3.to_dict() == {"items": [{"a": 1}]}
+    assert type(list.__getitem__(dt3["items"], 0)) is dict
+
+    # merged lists are still converted
+    dt4 = Diot(a=[{"x": 1}], b=[1])
+    dt4.merge({"a": [{"x": 2}], "b": [{"x": 3}]}, lists="append")
+    assert dt4.a[1].x == 2
+    assert dt4.b[1].x == 3
+
+
+def test_diot_list_not_shared():
+    src = Diot(a=[{"x": 1}], i=[{"k": 1}])
+
+    built = Diot(src)
+    assert built.a is not src.a
+    built.a.append({"x": 2})
+    assert len(src.a) == 1
+
+    assigned = Diot()
+    assigned.a = src.a
+    assert assigned.a is not src.a
+
+    merged = Diot(i=[])
+    merged.merge(src)
+    assert merged.i is not src.i
+    merged.i.append(1)
+    assert len(src.i) == 1
+
+    updated = Diot()
+    updated.update_recursively(src)
+    assert updated.i is not src.i
+
+    # the items are converted to the target class
+    assert type(CamelDiot(src).a[0]) is CamelDiot
+    assert type(OrderedDiot(src).a[0]) is OrderedDiot
+
+    # lists converted inside a list are kept
+    nested = Diot(a=[[{"x": 1}]])
+    assert nested.a[0] is nested.a[0]
+
+
 def test_deepcopy():
     dt = Diot(a={"b": {"c": [{"d": 1}], "e": ({"f": 2},)}})
     dt2 = deepcopy(dt)
@@ -185,6 +360,60 @@ def test_deepcopy():
     assert dt.a.b.e[0] is not dt2.a.b.e[0]
 
 
+def test_deepcopy_tree():
+    from diot import SyncDiot
+    from diot.utils import DiotList
+
+    shared = Diot(x=[1, 2])
+    dt = Diot({"a-b": {"c": shared, "d": shared}, "n": 1, "s": {1, 2}})
+    dt.a_b.self = dt
+    dt2 = deepcopy(dt)
+    assert dt2.n == 1
+    assert dt2.a_b.c == {"x": [1, 2]}
+    assert dt2.a_b is not dt.a_b
+    # aliasing and cycles preserved
+    assert dt2.a_b.c is dt2.a_b.d
+    assert dt2.a_b.c is not shared
+    assert dt2.a_b.c.x is not shared.x
+    assert dt2.a_b.self is dt2
+    assert dt2.s == {1, 2} and dt2.s is not dt.s
+    # configurations shared, keymaps and states copied
+    assert dt2.__diot__["transform"] is dt.__diot__["transform"]
+    assert dt2.__diot__["keymaps"] == dt.__diot__["keymaps"]
+    assert dt2.__diot__["keymaps"] is not dt.__diot__["keymaps"]
+
+    frozen = Diot(a={"b": 1})
+    frozen.freeze(True)
+    frozen2 = deepcopy(frozen)
+    assert frozen2.a.__diot__["frozen"] is True
+    with pytest.raises(DiotFrozenError):
+        frozen2.x = 1
+
+    od = OrderedDiot([("b", {"x": 1}), ("a", 2)])
+    od2 = deepcopy(od)
+    assert list(od2) == ["b", "a"]
+    od2.insert(0, "c", 3)
+    assert list(od2) == ["c", "b", "a"]
+    assert list(od) == ["b", "a"]
+
+    sd = SyncDiot(a={"b": 1})
+    sd2 = deepcopy(sd)
+    assert sd2.__lock__ is not sd.__lock__
+    assert sd2.a.__lock__ is not sd.a.__lock__
+    assert isinstance(sd2.a, SyncDiot)
+
+    ld = Diot(items=[{"a": 1}, {"a": 2}])
+    ld["items"][0]
+    ld2 = deepcopy(ld)
+    assert isinstance(ld2["items"], DiotList)
+    assert ld2["items"][0] is not ld["items"][0]
+    assert ld2["items"][1].a == 2
+
+    memo = {}
+    copied = deepcopy([dt.a_b, dt.a_b], memo)
+    assert copied[0] is copied[1]
+
+
 def test_trydeepcopy():
     def tryDeepCopy(obj, _recurvise=True):
         """
@@ -381,6 +610,77 @@ def test_from_namespace():
     assert isinstance(d3.c, Namespace)
 
 
+def test_from_namespace_options():
+    ns = Namespace(a=Namespace(b_c=Namespace(d=1)), e=[{"f": 1}])
+    d = Diot.from_namespace(ns, diot_transform="upper", diot_frozen=True)
+    assert d.A.B_C.D == 1
+    assert d.E == [{"f": 1}]
+    assert d.__diot__["frozen"] is True
+    assert d.A.__diot__["frozen"] is True
+    assert d.A.B_C.__diot__["transform"] is d.__diot__["transform"]
+    with pytest.raises(DiotFrozenError):
+        d.A.x = 1
+
+    d = OrderedDiot.from_namespace(ns)
+    assert isinstance(d.a.b_c, OrderedDiot)
+
+
+def test_from_env():
+    environ = {
+        "APP__DB__HOST": "a",
+        "APP__DB__PORT": "5432",
+        "APP__DEBUG": "1",
+        "APP_X": "2",
+        "OTHER": "3",
+    }
+    d = Diot.from_env("APP", environ=environ, diot_transform="upper")
+    assert d == {"db": {"host": "a", "port": "5432"}, "debug": "1"}
+    assert d.DB.HOST == "a"
+    assert d.DB.__diot__["transform"] is d.__diot__["transform"]
+
+    d = Diot.from_env("APP", sep="_", environ={"APP_DB_HOST": "a"}, lowercase=False)
+    assert d == {"DB": {"HOST": "a"}}
+    d = Diot.from_env(environ={"A_B": "1", "C": "2"}, sep="_")
+    assert d == {"a": {"b": "1"}, "c": "2"}
+
+    with pytest.raises(ValueError):
+        Diot.from_env("APP", environ={"APP__DB": "a", "APP__DB__HOST": "b"})
+    with pytest.raises(ValueError):
+        Diot.from_env("APP", environ={"APP__DB____HOST": "b"})
+    with pytest.raises(ValueError):
+        Diot.from_env("APP", environ={"APP__DB__": "b"})
+    # the same key after lowercasing
+    with pytest.raises(ValueError, match="APP__db__host"):
+        Diot.from_env(
+            "APP", environ={"APP__DB__HOST": "a", "APP__db__host": "b"}
+        )
+    d = Diot.from_env(
+        "APP",
+        environ={"APP__DB__HOST": "a", "APP__db__host": "b"},
+        lowercase=False,
+    )
+    assert d == {"DB": {"HOST": "a"}, "db": {"host": "b"}}
+
+    # invalid variables are skipped without a prefix
+    d = Diot.from_env(
+        environ={
+            "__CF_USER_TEXT_ENCODING": "x",
+            "A____B": "1",
+            "A__C": "2",
+            "D": "3",
+            "D__E": "4",
+            "d": "5",
+        }
+    )
+    assert d == {"a": {"c": "2"}, "d": "3"}
+
+    os.environ["DIOT_TEST__KEY"] = "1"
+    try:
+        assert Diot.from_env("DIOT_TEST").key == "1"
+    finally:
+        del os.environ["DIOT_TEST__KEY"]
+
+
 def test_keywords():
 
     d = Diot(a=1, get=2)
@@ -564,3 +864,575 @@ def test_hashable():
     assert isinstance(hash(od), int)
     s2 = {cd, od}
     assert len(s2) == 2
+
+
+def test_compile_path():
+    from diot.paths import compile_path
+
+    assert compile_path("a.b[0].c") == ("a", "b", 0, "c")
+    assert compile_path('a["x.y"][-1]') == ("a", "x.y", -1)
+    assert compile_path("a['it\\'s']") == ("a", "it's")
+    assert compile_path(("a", 0)) == ("a", 0)
+    assert compile_path("") == ()
+    assert compile_path("a.b") is compile_path("a.b")
+
+    for path in ("a..b", "a.", ".a", "a[x]", 'a["b"]c'):
+        with pytest.raises(ValueError):
+            compile_path(path)
+
+
+def test_get_path():
+    d = Diot({"a": {"b-c": [{"d": 1}, ({"e": 2},)]}, "x": None})
+    assert d.get_path("a.b_c[0].d") == 1
+    assert d.get_path('a["b-c"][1][0].e') == 2
+    assert d.get_path("a.b_c.0.d") == 1
+    assert d.get_path("a.b_c[2].d", 3) == 3
+    assert d.get_path("a.b_c[0].d.e") is None
+    assert d.get_path("x") is None
+    assert d.get_path("x.y", 1) == 1
+    assert d.get_path("") is d
+    default = {"k": 1}
+    assert d.get_path("nope", default) is default
+
+    assert d.has_path("a.b_c[-1][0].e")
+    assert d.has_path("x")
+    assert not d.has_path("a.b_c[5]")
+    assert not d.has_path("y.z")
+
+
+def test_set_path():
+    d = Diot(a={"b-c": [{"d": 1}]})
+    d.set_path("a.b_c[0].d", 2)
+    assert d.a["b-c"][0].d == 2
+    assert list(d.a) == ["b-c"]
+
+    d.set_path("x.y.z", 3)
+    assert isinstance(d.x.y, Diot)
+    assert d.x.y.z == 3
+
+    d.set_path("a.b_c[0]", 4)
+    assert d.a.b_c == [4]
+
+    with pytest.raises(IndexError):
+        d.set_path("a.b_c[3].e", 1)
+    with pytest.raises(TypeError):
+        d.set_path("x.y.z.w", 1)
+    with pytest.raises(ValueError):
+        d.set_path("", 1)
+    # non-integer segments on lists
+    with pytest.raises(TypeError, match=r"'a\.b_c\.x'.*'x' is not an index"):
+        d.set_path("a.b_c.x", 1)
+    with pytest.raises(TypeError, match="'x' is not an index"):
+        d.set_path("a.b_c.x.y", 1)
+    d.set_path(("a", "b_c", "0"), 5)
+    assert d.a.b_c == [5]
+
+    d.freeze(True)
+    with pytest.raises(DiotFrozenError):
+        d.set_path("x.y.z", 5)
+
+
+def test_accessor():
+    get_fields = Diot.accessor("a.b", "c[0]", "d-e")
+    assert repr(get_fields) == "PathAccessor('a.b', 'c[0]', 'd-e')"
+    d = Diot({"a": {"b": 1}, "c": [2], "d-e": 3})
+    assert get_fields(d) == (1, 2, 3)
+    assert Diot.accessor("d_e")(d) == (3,)
+    # plain dicts work too
+    assert get_fields({"a": {"b": 4}, "c": (5,), "d-e": 6}) == (4, 5, 6)
+
+    with pytest.raises(KeyError, match="x.y"):
+        Diot.accessor("a.b", "x.y")(d)
+
+    # missing handlers are bypassed
+    d = Diot(a=1, diot_missing=None)
+    assert Diot.accessor("a", "b", default=0)(d) == (1, 0)
+
+
+def test_missing_handler_no_internal_exceptions():
+    d = Diot({"a-b": 1}, diot_missing=None)
+    # the slot is populated, no fallback to __getattr__ for __diot__
+    assert object.__getattribute__(d, "__diot__") is d.__dict__["__diot__"]
+    assert d.a_b == 1
+    assert d.x is None
+    assert d["x"] is None
+
+    # handler replaced after construction
+    d.__diot__["missing"] = KeyError
+    with pytest.raises(KeyError) as excinfo:
+        d.x
+    assert excinfo.value.__context__ is None
+
+    d = Diot(a=1)
+    with pytest.raises(KeyError) as excinfo:
+        d["x"]
+    assert excinfo.value.args == ("x",)
+    with pytest.raises(AttributeError) as excinfo:
+        d.x
+    assert excinfo.value.__context__ is None
+    assert getattr(d, "x", 2) == 2
+
+    d = Diot(a=1, diot_missing=RuntimeError)
+    with pytest.raises(RuntimeError, match="'x'"):
+        d.x
+
+    d2 = deepcopy(d)
+    with pytest.raises(RuntimeError):
+        d2.x
+    assert object.__getattribute__(d2, "__diot__") is d2.__dict__["__diot__"]
+
+    # attribute access goes through an overridden __getitem__
+    class Defaulted(Diot):
+        def __getitem__(self, name):
+            try:
+                return super().__getitem__(name)
+            except KeyError:
+                if name == "fallback":
+                    return 0
+                raise
+
+    d = Defaulted(a=1)
+    assert d.a == 1
+    assert d.fallback == 0
+    with pytest.raises(AttributeError):
+        d.x
+
+
+def test_select():
+    d = Diot(
+        services={
+            "web": {"listeners": [{"port": 80}, {"port": 443}]},
+            "db-main": {"listeners": [{"port": 5432}], "port": 1},
+            "empty": {"listeners": []},
+        },
+        port=0,
+    )
+    assert list(d.select("services.*.listeners[*].port")) == [
+        ("services.web.listeners[0].port", 80),
+        ("services.web.listeners[1].port", 443),
+        ("services.db-main.listeners[0].port", 5432),
+    ]
+    assert [val for _, val in d.select("**.port")] == [0, 80, 443, 1, 5432]
+    assert [val for _, val in d.select("services.**.**.port")] == [
+        80, 443, 1, 5432
+    ]
+    assert list(d.select("services.db_main.port")) == [
+        ("services.db-main.port", 1)
+    ]
+    assert list(d.select("services.web.listeners[-1]")) == [
+        ("services.web.listeners[1]", {"port": 443})
+    ]
+    assert list(d.select("services.*[*]")) == []
+    assert list(d.select("nosuch.*")) == []
+    assert list(d.select("")) == [("", d)]
+
+    # paths can be used with get_path
+    for path, value in d.select("**.listeners[*]"):
+        assert d.get_path(path) is value
+
+    # lazy
+    it = d.select("**")
+    assert next(it) == ("", d)
+
+    from diot.paths import compile_path, compile_pattern, ANY_KEY, ANY_DEPTH
+
+    assert compile_pattern('a.*.**.**["*"]') == ("a", ANY_KEY, ANY_DEPTH, "*")
+    assert compile_path("a.*") == ("a", "*")
+    with pytest.raises(ValueError):
+        compile_path("a[*]")
+
+
+def test_ordered_keys():
+    from diot.utils import OrderedKeys
+
+    keys = OrderedKeys("abca")
+    assert keys == ["a", "b", "c"]
+    assert len(keys) == 3
+    assert "b" in keys and "x" not in keys
+    keys.remove("b")
+    assert keys == ("a", "c")
+    with pytest.raises(KeyError):
+        keys.remove("b")
+    keys.discard("b")
+
+    keys.insert_before("a", "x")
+    keys.insert_after("a", "y")
+    keys.insert_after("c", "z")
+    assert keys == ["x", "a", "y", "c", "z"]
+    # positional access without the cache
+    keys.remove("z")
+    assert keys._cache is None
+    keys.insert(3, "z")
+    keys.remove("y")
+    keys.insert(-1, "w")
+    assert keys == ["x", "a", "z", "w", "c"]
+    keys.insert(100, "v")
+    keys.insert(-100, "u")
+    keys.insert(1, "c")  # moved
+    assert keys == ["u", "c", "x", "a", "z", "w", "v"]
+    assert keys.index("a") == 3
+    assert keys[-1] == "v"
+    assert list(reversed(keys)) == ["v", "w", "z", "a", "x", "c", "u"]
+    assert keys.pop() == "v"
+    assert keys == deepcopy(keys) == keys.copy()
+    assert repr(keys) == "OrderedKeys(['u', 'c', 'x', 'a', 'z', 'w'])"
+
+    from pickle import dumps, loads
+
+    assert loads(dumps(keys)) == keys
+    keys.clear()
+    assert keys == []
+    with pytest.raises(KeyError):
+        keys.pop()
+
+
+def test_ordered_ops():
+    od = OrderedDiot([("c", 1), ("b", 2), ("a", 3)], d=4)
+    assert od.popitem() == ("d", 4)
+    assert list(od) == ["c", "b", "a"]
+    del od.b
+    od.b = 5
+    assert list(od.items()) == [("c", 1), ("a", 3), ("b", 5)]
+    od2 = deepcopy(od)
+    assert list(od2) == ["c", "a", "b"]
+    from pickle import dumps, loads
+
+    assert list(loads(dumps(od))) == ["c", "a", "b"]
+    assert list(OrderedDiot(None, a=1)) == ["a"]
+
+    od.insert_after("b", {"x": 1, "y": 2})
+    od.insert_before("c", {"u": 1, "v": 2})
+    assert list(od) == ["u", "v", "c", "a", "b", "x", "y"]
+    od.clear()
+    assert list(od) == []
+    with pytest.raises(KeyError):
+        od.popitem()
+
+
+def test_ordered_reorder():
+    od = OrderedDiot([("a", 1), ("b-x", 2), ("c", 3), ("d", 4)])
+    od.move_to_end("a")
+    assert list(od) == ["b-x", "c", "d", "a"]
+    od.move_to_end("b_x", last=False)
+    assert list(od) == ["b-x", "c", "d", "a"]
+    od.move_to_end("d", last=False)
+    assert list(od) == ["d", "b-x", "c", "a"]
+    od.move_to_end("a")
+    assert list(od) == ["d", "b-x", "c", "a"]
+    with pytest.raises(KeyError):
+        od.move_to_end("x")
+
+    od.reorder(["c", "b_x"])
+    assert list(od) == ["c", "b-x", "d", "a"]
+    assert list(od.values()) == [3, 2, 4, 1]
+    with pytest.raises(KeyError):
+        od.reorder(["c", "x"])
+    assert list(od) == ["c", "b-x", "d", "a"]
+
+    od.sort_keys()
+    assert list(od) == ["a", "b-x", "c", "d"]
+    od.sort_keys(key=lambda k: od[k] % 2, reverse=True)
+    assert list(od) == ["a", "c", "b-x", "d"]
+    od.x = 0
+    assert list(od) == ["a", "c", "b-x", "d", "x"]
+    assert od.popitem() == ("x", 0)
+
+    od.freeze()
+    with pytest.raises(DiotFrozenError):
+        od.move_to_end("a")
+    with pytest.raises(DiotFrozenError):
+        od.reorder(["a"])
+    with pytest.raises(DiotFrozenError):
+        od.sort_keys()
+
+
+def test_copy_without_constructor():
+    d = Diot({"a-b": {"c": 1}}, diot_missing=None, diot_transform="upper")
+    d.freeze()
+    d2 = d.copy()
+    assert d2 == d and type(d2) is Diot
+    assert d2.__diot__ is not d.__diot__
+    assert d2.__diot__["keymaps"] == d.__diot__["keymaps"]
+    assert d2.__diot__["keymaps"] is not d.__diot__["keymaps"]
+    assert d2.A_B is d.A_B
+    assert d2.x is None
+    with pytest.raises(DiotFrozenError):
+        d2.x = 1
+    d2.unfreeze()
+    d2.x = 1
+    assert "X" not in d.__diot__["keymaps"]
+
+    od = OrderedDiot([("b", 1), ("a", 2)])
+    od2 = od.copy()
+    assert type(od2) is OrderedDiot
+    assert list(od2.items()) == [("b", 1), ("a", 2)]
+    assert list(od2.values()) == [1, 2]
+    od2.c = 3
+    od2.move_to_end("b")
+    assert list(od) == ["b", "a"]
+    assert list(od2) == ["a", "c", "b"]
+    assert list(copy(od)) == ["b", "a"]
+
+
+def test_copy_lists_not_shared():
+    from diot import SyncDiot
+
+    for cls in (Diot, OrderedDiot, SyncDiot):
+        d = cls(l=[1], r=[{"x": 1}])
+        c = d.copy()
+        c.l.append(2)
+        c.r.append({"x": 2})
+        assert d.l == [1]
+        assert len(d.r) == 1
+        assert type(c.r) is type(d.r)
+        assert copy(d).l is not d.l
+
+    d = Diot(l=[1])
+    merged = d | {"a": 1}
+    merged.l.append(2)
+    assert d.l == [1]
+
+
+def _check_keymaps(d):
+    transform = d.__diot__["transform"]
+    assert len(d.__diot__["keymaps"]) == len(d)
+    for key in dict.keys(d):
+        assert d.__diot__["keymaps"][transform(key)] == key
+    for val in dict.values(d):
+        if isinstance(val, Diot):
+            _check_keymaps(val)
+
+
+def test_sync_diot():
+    from diot import SyncDiot
+
+    d = SyncDiot(a={"b": 1})
+    assert isinstance(d.a, SyncDiot)
+    assert d.a.__lock__ is not d.__lock__
+    with d.atomic() as locked:
+        assert locked is d
+        d.x = d.setdefault("x", 0) + 1
+    assert d.x == 1
+    d2 = d.copy()
+    assert isinstance(d2, SyncDiot) and d2 == d
+    assert d2.__lock__ is not d.__lock__
+    d3 = deepcopy(d)
+    assert d3 == d and d3.a.__lock__ is not d.a.__lock__
+    d4 = d | {"y": 2}
+    assert d4.y == 2 and "y" not in d
+    del d.x
+    assert d.pop("a") == {"b": 1}
+    d.z = 1
+    assert d.popitem() == ("z", 1)
+    d.update(a=1)
+    d.clear()
+    assert d == {}
+    from pickle import dumps, loads
+
+    d5 = loads(dumps(SyncDiot(a={"b-c": 1})))
+    assert d5.a.b_c == 1
+    assert "__lock__" in d5.a.__dict__
+
+
+def test_sync_diot_stress():
+    import threading
+    from diot import SyncDiot
+
+    d = SyncDiot(counter=0, conf={"a-0": 0})
+    n_threads, n_iter = 8, 300
+    errors = []
+
+    def writer(tid):
+        try:
+            for i in range(n_iter):
+                key = f"k-{tid}-{i % 10}"
+                d[key] = i
+                d.update_recursively({"conf": {f"a-{i % 5}": {"v": i}}})
+                d.setdefault(f"s-{i % 7}", tid)
+                d.pop(f"k-{tid}-{(i + 5) % 10}", None)
+                with d.atomic():
+                    d.counter += 1
+        except Exception as exc:  # pragma: no cover
+            errors.append(exc)
+
+    def reader():
+        try:
+            for i in range(n_iter * 3):
+                d.get("counter")
+                d.conf.get(f"a_{i % 5}")
+                getattr(d, f"s_{i % 7}", None)
+        except Exception as exc:  # pragma: no cover
+            errors.append(exc)
+
+    threads = [threading.Thread(target=writer, args=(i,)) for i in range(n_threads)]
+    threads += [threading.Thread(target=reader) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    assert d.counter == n_threads * n_iter
+    _check_keymaps(d)
+
+
+def test_pop_keeps_keymaps():
+    d = Diot({"a-b": 1, "c": 2})
+    assert d.pop("a_b") == 1
+    assert d.pop("c") == 2
+    assert d.pop("c", 3) == 3
+    with pytest.raises(KeyError):
+        d.pop("c")
+    assert d.__diot__["keymaps"] == {}
+
+    od = OrderedDiot({"a-b": 1, "c-d": 2, "e": 3})
+    assert od.pop("a_b") == 1
+    del od.c_d
+    assert list(od) == ["e"]
+    _check_keymaps(od)
+
+
+def test_diff():
+    from diot import Change
+
+    shared = Diot(x=1)
+    before = Diot(
+        {"a-b": {"c": 1, "d": [1, {"e": 1}, 3]}, "s": shared, "f": 1, "g": 1}
+    )
+    after = Diot({"a_b": {"c": 2, "d": [1, {"e": 2}]}, "s": shared, "f": 1})
+    after.h = {"i": 1}
+
+    changes = before.diff(after)
+    assert iter(changes) is changes
+    assert list(changes) == [
+        Change("replace", "a-b.c", 1, 2),
+        Change("replace", "a-b.d[1].e", 1, 2),
+        Change("remove", "a-b.d[2]", 3, None),
+        Change("remove", "g", 1, None),
+        Change("add", "h", None, {"i": 1}),
+    ]
+    assert list(before.diff(before)) == []
+    assert list(Diot(a=[1]).diff({"a": [1, 2]})) == [
+        Change("add", "a[1]", None, 2)
+    ]
+    assert list(Diot(a={"b": 1}).diff({"a": 1})) == [
+        Change("replace", "a", {"b": 1}, 1)
+    ]
+
+
+def test_diff_compares_once():
+    from diot.changes import diff
+
+    calls = []
+
+    class Node(dict):
+        def __eq__(self, other):
+            calls.append(1)
+            return dict.__eq__(self, other)
+
+        __hash__ = None
+
+    def chain(leaf):
+        node = Node(x=leaf)
+        for _ in range(30):
+            node = Node(x=node, y=1)
+        return node
+
+    assert [change.path for change in diff(chain(1), chain(2))] == [
+        "x" + ".x" * 30
+    ]
+    # once at the top, which compares the levels below in turn
+    assert len(calls) <= 31
+
+
+def test_diff_frozen_hash():
+    from diot.changes import content_hash
+
+    a = Diot({"x": {"y": 1}, "z": (1, 2)})
+    b = Diot({"x": {"y": 1}, "z": (1, 2)})
+    a.freeze(True)
+    b.freeze(True)
+    assert content_hash(a) is not None
+    assert content_hash(a) == content_hash(b)
+    assert "__content_hash__" in a.x.__dict__
+    assert list(a.diff(b)) == []
+
+    # not hashed when not recursively frozen or with lists
+    assert content_hash(Diot(x=1)) is None
+    c = Diot(x=[1])
+    c.freeze(True)
+    assert content_hash(c) is None
+
+    # cache is dropped when unfrozen
+    with b.x.thaw():
+        b.x.y = 2
+    assert "__content_hash__" not in b.x.__dict__
+    assert content_hash(a.x) != content_hash(b.x)
+    assert [change.path for change in a.diff(b)] == ["x.y"]
+
+    # tuples of diots are hashed by their contents
+    t1 = Diot(a=({"x": 1},))
+    t2 = Diot(a=({"x": 1},))
+    t1.freeze(True)
+    t2.freeze(True)
+    assert content_hash(t1.a) == content_hash(t2.a)
+    assert list(t1.diff(t2)) == []
+    assert list(Diot(a=frozenset([1])).diff({"a": frozenset([1])})) == []
+
+
+def test_merge():
+    d = Diot({"a-b": {"c": 1, "l": [1, {"x": 1}]}, "e": 1, "f": {"g": 1}})
+    child = d.a_b
+    s1 = {"a_b": {"c": 2, "d": {"x": 1}}, "e": {"h": 1}}
+    s2 = Diot({"a-b": {"d": {"y": 2}, "l": [2]}, "f": 2, "i": [{"j": 1}]})
+    d.merge(s1, s2)
+    assert d == {
+        "a-b": {"c": 2, "d": {"x": 1, "y": 2}, "l": [2]},
+        "e": {"h": 1},
+        "f": 2,
+        "i": [{"j": 1}],
+    }
+    # children reused, sources not touched or aliased
+    assert d.a_b is child
+    assert isinstance(d.a_b.d, Diot)
+    assert isinstance(d.i[0], Diot)
+    assert s1 == {"a_b": {"c": 2, "d": {"x": 1}}, "e": {"h": 1}}
+    assert d.a_b.d is not s2.a_b.d
+    assert list(d.accessible_keys()) == ["a_b", "e", "f", "i"]
+
+    # a non-mapping in between replaces the merged mapping
+    d = Diot(a={"b": 1})
+    d.merge({"a": {"c": 1}}, {"a": 1}, {"a": {"d": 1}})
+    assert d == {"a": {"d": 1}}
+
+    # mappings are copied when dicts are not nested
+    d = Diot(a={"b": 1}, diot_nest=[list])
+    src = {"a": {"c": {"x": 1}}}
+    d.merge(src)
+    assert d.a == {"c": {"x": 1}}
+    assert type(d.a) is dict
+    assert d.a is not src["a"] and d.a["c"] is not src["a"]["c"]
+
+
+def test_merge_lists_conflict():
+    d = Diot(a=[1, 2, {"x": 1}], b=1)
+    d.merge({"a": [2, 3, {"x": 1}, [1]]}, lists="unique")
+    assert d.a == [1, 2, {"x": 1}, 3, [1]]
+    d.merge({"a": [1]}, lists="append")
+    assert d.a == [1, 2, {"x": 1}, 3, [1], 1]
+
+    d.merge({"b": 2, "c": 1}, conflict="keep")
+    assert d.b == 1 and d.c == 1
+    d.merge({"b": 1, "c": 1}, conflict="error")
+    with pytest.raises(ValueError, match="'b'"):
+        d.merge({"b": 2}, conflict="error")
+    d.merge({"b": {"x": 1}}, conflict=lambda path, old, new: [path, old, new])
+    assert d.b == [("b",), 1, {"x": 1}]
+
+    with pytest.raises(ValueError):
+        d.merge({}, lists="x")
+    with pytest.raises(ValueError):
+        d.merge({}, conflict="x")
+    d.freeze()
+    with pytest.raises(DiotFrozenError):
+        d.merge({})
@@ -0,0 +1,113 @@
+import pytest
+from diot import Diot, SnakeDiot, DiotFrame
+
+np = pytest.importorskip("numpy")
+
+
+@pytest.fixture
+def records():
+    return [
+        Diot(name="a", price=1.5, qty=2, profile={"home-country": "NL"}),
+        Diot(name="b", price=2.0, qty=3, profile={"home-country": "DE"}),
+        Diot(name="c", price=4.0, qty=1, profile={"home-country": "NL"}),
+    ]
+
+
+def test_from_to_diots(records):
+    frame = DiotFrame.from_diots(records)
+    assert len(frame) == 3
+    assert frame.columns == ["name", "price", "qty", "profile.home-country"]
+    assert frame["qty"].dtype.kind == "i"
+    assert frame["price"].dtype.kind == "f"
+    assert frame["name"].dtype.kind == "U"
+    assert frame.to_diots() == records
+    assert all(type(rec) is Diot for rec in frame.to_diots())
+
+    # object dtype only when needed
+    frame = DiotFrame.from_diots([{"a": 1}, {"a": "x"}, {"b": [1, 2]}])
+    assert frame["a"].dtype == object
+    assert frame["a"].tolist() == [1, "x", None]
+    assert frame["b"].tolist() == [None, None, [1, 2]]
+    assert frame.to_diots()[2] == {"a": None, "b": [1, 2]}
+
+    frame = DiotFrame.from_diots([SnakeDiot(a=1)])
+    assert type(frame.to_diots()[0]) is SnakeDiot
+
+    empty = DiotFrame.from_diots([])
+    assert len(empty) == 0
+    assert empty.to_diots() == []
+
+
+def test_optional_nested_records():
+    records = [
+        {"a": 1, "p": None},
+        {"a": 2, "p": {"c": "NL"}},
+        {"a": 3, "p": {"c": "DE", "d": {"e": 1}}},
+    ]
+    frame = DiotFrame.from_diots(records)
+    assert frame.columns == ["a", "p"]
+    assert frame["p"].dtype == object
+    assert frame.to_diots() == records
+    assert frame[0].p is None
+    assert frame[1].p == {"c": "NL"}
+
+    # nested under other fields, and with empty mappings
+    frame = DiotFrame.from_diots([{"x": {"p": {}}}, {"x": {"p": {"c": 1}}}])
+    assert frame.columns == ["x.p"]
+    assert frame[0].x.p == {}
+
+    with pytest.raises(ValueError, match="'p'"):
+        DiotFrame({"p": [None], "p.c": [1]})
+    frame = DiotFrame({"p.c": [1]})
+    with pytest.raises(ValueError, match="'p'"):
+        frame["p"] = [None]
+    assert frame.columns == ["p.c"]
+
+
+def test_vectorized(records):
+    frame = DiotFrame.from_diots(records)
+    frame["total"] = frame["price"] * frame["qty"]
+    assert frame["total"].tolist() == [3.0, 6.0, 4.0]
+    frame["one"] = 1
+    assert frame["one"].tolist() == [1, 1, 1]
+    del frame["one"]
+    assert "one" not in frame
+
+    nl = frame[frame["profile.home-country"] == "NL"]
+    assert isinstance(nl, DiotFrame)
+    assert nl["name"].tolist() == ["a", "c"]
+    assert frame.filter(frame["qty"] > 1)["name"].tolist() == ["a", "b"]
+    assert frame[1:]["name"].tolist() == ["b", "c"]
+
+    with pytest.raises(ValueError):
+        frame["bad"] = [1, 2]
+    with pytest.raises(ValueError):
+        DiotFrame({"a": [1], "b": [1, 2]})
+
+
+def test_row_views(records):
+    frame = DiotFrame.from_diots(records)
+    row = frame[0]
+    assert row.name == "a"
+    assert row.qty == 2
+    assert type(row.qty) is int
+    assert row.profile.home_country == "NL"
+    assert row["profile"]["home-country"] == "NL"
+    assert list(row) == ["name", "price", "qty", "profile"]
+    assert len(row.profile) == 1
+    assert dict(row.profile) == {"home-country": "NL"}
+    assert row.to_diot() == records[0]
+    assert frame[-1].name == "c"
+    assert [row.name for row in frame.rows()] == ["a", "b", "c"]
+    assert repr(frame) == (
+        "<DiotFrame: 3 rows, columns="
+        "['name', 'price', 'qty', 'profile.home-country']>"
+    )
+    assert repr(row.profile) == "DiotFrameRow({'home-country': 'NL'})"
+
+    with pytest.raises(AttributeError):
+        row.nosuch
+    with pytest.raises(KeyError):
+        row["nosuch"]
+    with pytest.raises(IndexError):
+        frame[3]
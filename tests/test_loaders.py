@@ -0,0 +1,105 @@
+import json
+
+import pytest
+from diot import Diot, OrderedDiot
+from diot.loaders import list_files, load_file
+
+
+@pytest.fixture
+def conf_dir(tmp_path):
+    (tmp_path / "10-base.json").write_text(
+        json.dumps({"db": {"host": "a", "port": 1}, "tags": ["x"]})
+    )
+    (tmp_path / "20-env.yaml").write_text("db:\n  host: b\ntags: [y]\n")
+    (tmp_path / "30-empty.yml").write_text("")
+    (tmp_path / "README.md").write_text("# not a config")
+    sub = tmp_path / "sub"
+    sub.mkdir()
+    (sub / "40-sub.json").write_text(json.dumps({"db": {"port": 2}}))
+    return tmp_path
+
+
+def test_list_files(conf_dir):
+    assert [file.name for file in list_files(conf_dir)] == [
+        "10-base.json",
+        "20-env.yaml",
+        "30-empty.yml",
+    ]
+    assert [file.name for file in list_files(conf_dir, "**/*")] == [
+        "10-base.json",
+        "20-env.yaml",
+        "30-empty.yml",
+        "40-sub.json",
+    ]
+
+
+def test_load_file(tmp_path, conf_dir):
+    assert load_file(conf_dir / "30-empty.yml") == {}
+    with pytest.raises(ValueError, match="Unsupported"):
+        load_file(conf_dir / "README.md")
+    (tmp_path / "list.json").write_text("[1]")
+    with pytest.raises(ValueError, match="mapping"):
+        load_file(tmp_path / "list.json")
+
+
+@pytest.mark.parametrize("workers, processes", [(1, False), (4, False), (2, True)])
+def test_load_dir(conf_dir, workers, processes):
+    conf = Diot.load_dir(conf_dir, workers=workers, processes=processes)
+    assert conf == {"db": {"host": "b", "port": 1}, "tags": ["y"]}
+
+    conf = OrderedDiot.load_dir(
+        conf_dir, "**/*", workers=workers, lists="append", diot_transform="upper"
+    )
+    assert isinstance(conf, OrderedDiot)
+    assert conf.DB.port == 2
+    assert conf.tags == ["x", "y"]
+
+
+def test_load_dir_toml(tmp_path):
+    pytest.importorskip("tomllib")
+    (tmp_path / "a.toml").write_text('[db]\nhost = "a"\n')
+    (tmp_path / "b.json").write_text('{"db": {"port": 1}}')
+    assert Diot.load_dir(tmp_path) == {"db": {"host": "a", "port": 1}}
+
+
+def test_async_io(tmp_path):
+    import asyncio
+
+    d = Diot({"a-b": {"c": [1, 2]}, "d": "ü"})
+
+    async def main():
+        await d.ato_json(tmp_path / "a.json")
+        await d.ato_yaml(tmp_path / "a.yaml")
+        loaded = await asyncio.gather(
+            Diot.afrom_json(tmp_path / "a.json"),
+            OrderedDiot.afrom_yaml(tmp_path / "a.yaml", diot_transform="upper"),
+        )
+        many = await Diot.aload_many(
+            [tmp_path / "a.json", tmp_path / "a.yaml"] * 5, limit=2
+        )
+        return loaded, many
+
+    (from_json, from_yaml), many = asyncio.run(main())
+    assert from_json == d
+    assert from_json.a_b.c == [1, 2]
+    assert isinstance(from_yaml, OrderedDiot)
+    assert from_yaml.A_B == {"c": [1, 2]}
+    assert len(many) == 10
+    assert all(conf == d for conf in many)
+
+
+def test_async_toml(tmp_path):
+    import asyncio
+
+    pytest.importorskip("tomllib")
+    (tmp_path / "a.conf").write_text('[db]\nhost = "a"\n')
+    d = asyncio.run(Diot.afrom_toml(tmp_path / "a.conf"))
+    assert d.db.host == "a"
+
+
+def test_async_write(tmp_path):
+    import asyncio
+
+    d = Diot({f"key{i}": "x" * i for i in range(50)})
+    asyncio.run(d.ato_json(tmp_path / "a.json", indent=2))
+    assert (tmp_path / "a.json").read_text() == d.to_json(indent=2)
@@ -0,0 +1,179 @@
+import asyncio
+
+import pytest
+from diot import Change, Diot, DiotFrozenError, ObservableDiot
+
+
+def test_subscribe():
+    d = ObservableDiot({"db": {"host": "a", "port": 1}, "x-y": 1})
+    assert isinstance(d.db, ObservableDiot)
+    events = []
+    unsubscribe = d.subscribe(events.append)
+
+    d.db.host = "b"
+    assert events == [[Change("replace", "db.host", "a", "b")]]
+
+    events.clear()
+    d["x-y"] = 2
+    d["new"] = {"a": 1}
+    del d.new
+    assert events == [
+        [Change("replace", "x-y", 1, 2)],
+        [Change("add", "new", None, {"a": 1})],
+        [Change("remove", "new", {"a": 1}, None)],
+    ]
+
+    events.clear()
+    assert d.pop("x_y") == 2
+    assert d.pop("nonexist", None) is None
+    d.setdefault("z", 1)
+    d.setdefault("z", 2)
+    assert events == [
+        [Change("remove", "x-y", 2, None)],
+        [Change("add", "z", None, 1)],
+    ]
+
+    events.clear()
+    d.z = 1  # same object, nothing changed
+    assert events == []
+
+    assert d.popitem() == ("z", 1)
+    assert events == [[Change("remove", "z", 1, None)]]
+
+    events.clear()
+    unsubscribe()
+    d.z = 3
+    assert events == []
+
+
+def test_subscribe_path():
+    d = ObservableDiot({"db": {"host": "a"}, "log": {"level": 1}})
+    events = []
+    d.subscribe(events.append, "db")
+    d.log.level = 2
+    assert events == []
+    d.db.host = "b"
+    d.db = {"host": "c"}
+    assert [change.path for batch in events for change in batch] == [
+        "db.host",
+        "db",
+    ]
+    # the new child is observed
+    events.clear()
+    d.db.host = "d"
+    assert events == [[Change("replace", "db.host", "c", "d")]]
+
+    # the removed child is not
+    old = d.pop("db")
+    events.clear()
+    old.host = "e"
+    assert events == []
+
+    # subscribing on a child, with aliases
+    d = ObservableDiot({"a-b": {"c": [{"d": 1}]}})
+    events = []
+    d.a_b.subscribe(events.append, "c[0]")
+    d.a_b.c[0].d = 2
+    assert events == [[Change("replace", "a-b.c[0].d", 1, 2)]]
+
+
+def test_batch():
+    d = ObservableDiot({"a": 1, "b": {"c": 1}})
+    events = []
+    d.subscribe(events.append)
+
+    d.update(a=2, x=1)
+    assert len(events) == 1
+    assert sorted(events[0]) == [
+        Change("add", "x", None, 1),
+        Change("replace", "a", 1, 2),
+    ]
+
+    events.clear()
+    with d.batch():
+        d.a = 3
+        d.a = 4
+        d.b.c = 2
+        d.y = 1
+        del d.y
+    assert events == [
+        [Change("replace", "a", 2, 4), Change("replace", "b.c", 1, 2)]
+    ]
+
+    events.clear()
+    d.update_recursively({"b": {"c": 3, "d": 1}})
+    assert events == [
+        [Change("replace", "b.c", 2, 3), Change("add", "b.d", None, 1)]
+    ]
+
+    events.clear()
+    d.freeze()
+    with pytest.raises(DiotFrozenError):
+        d.a = 5
+    with d.thaw():
+        d.a = 5
+        d.a = 6
+    assert events == [[Change("replace", "a", 4, 6)]]
+
+    events.clear()
+    d.unfreeze()
+    d.clear()
+    assert len(events) == 1
+    assert {change.kind for change in events[0]} == {"remove"}
+
+
+def test_watch():
+    d = ObservableDiot({"db": {"host": "a"}})
+
+    async def main():
+        batches = []
+
+        async def watcher():
+            async for changes in d.watch("db"):
+                batches.append(changes)
+                if len(batches) == 2:
+                    break
+
+        task = asyncio.create_task(watcher())
+        await asyncio.sleep(0)
+        # coalesced in the same tick
+        d.db.host = "b"
+        d.db.host = "c"
+        d.other = 1
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        d.db.port = 1
+        await asyncio.wait_for(task, 1)
+        return batches
+
+    batches = asyncio.run(main())
+    assert batches == [
+        [Change("replace", "db.host", "a", "c")],
+        [Change("add", "db.port", None, 1)],
+    ]
+
+
+def test_observable_copy():
+    d = ObservableDiot(a={"b": 1})
+    events = []
+    d.subscribe(events.append)
+    d2 = d.copy()
+    d2.x = 1
+    assert events == []
+    assert isinstance(Diot(d), Diot)
+
+
+def test_deepcopy():
+    from copy import deepcopy
+
+    d = ObservableDiot(a={"b": 1}, c=[{"d": 1}])
+    d2 = deepcopy(d)
+    events = []
+    d2.subscribe(events.append)
+    d2.a.b = 2
+    d2.c[0].d = 2
+    assert events == [
+        [Change("replace", "a.b", 1, 2)],
+        [Change("replace", "c[0].d", 1, 2)],
+    ]
+    assert d.a.b == 1
@@ -0,0 +1,88 @@
+import json
+
+import pytest
+from diot import Diot, TrackedDiot
+
+
+def test_dirty_paths():
+    d = TrackedDiot({"db": {"host": "a", "port": 1}, "srv": [{"x": 1}]})
+    assert d.dirty_paths == []
+    assert d.export_patch() == []
+
+    d.db.host = "b"
+    d.srv[0].x = 2
+    d.new = {"a": 1}
+    d.new.b = 2
+    assert d.dirty_paths == ["db.host", "srv[0].x", "new"]
+    assert d.db.dirty_paths == d.dirty_paths
+
+    d.checkpoint()
+    assert d.dirty_paths == []
+    d.tmp = 1
+    del d.tmp
+    d.db = {"host": "c"}
+    d.db.port = 2
+    assert d.dirty_paths == ["tmp", "db"]
+    # added and removed
+    assert d.export_patch(checkpoint=True) == [
+        {"op": "replace", "path": "/db", "value": {"host": "c", "port": 2}},
+    ]
+    assert d.dirty_paths == []
+
+
+def test_export_apply_patch():
+    data = {"db": {"host": "a", "a/b": 1, "c~d": 2}, "log": {"level": 1}}
+    d = TrackedDiot(data)
+    remote = Diot(data)
+
+    d.db.host = "b"
+    d.db["a/b"] = 3
+    del d.db["c~d"]
+    d.update(x=[{"y": 1}])
+    d.log.pop("level")
+    d.log.setdefault("file", "a.log")
+    patch = d.export_patch(checkpoint=True)
+    assert patch == [
+        {"op": "replace", "path": "/db/host", "value": "b"},
+        {"op": "replace", "path": "/db/a~1b", "value": 3},
+        {"op": "remove", "path": "/db/c~0d"},
+        {"op": "add", "path": "/x", "value": [{"y": 1}]},
+        {"op": "remove", "path": "/log/level"},
+        {"op": "add", "path": "/log/file", "value": "a.log"},
+    ]
+    # the patch is json-serializable
+    remote.apply_patch(json.loads(json.dumps(patch)))
+    assert remote == d
+    assert isinstance(remote.x[0], Diot)
+
+    d.x[0].y = 2
+    d.popitem()
+    d.x = [1]
+    remote.apply_patch(d.export_patch(checkpoint=True))
+    assert remote == d
+
+
+def test_apply_patch_lists():
+    d = Diot(a=[1, 2])
+    d.apply_patch(
+        [
+            {"op": "add", "path": "/a/-", "value": 3},
+            {"op": "add", "path": "/a/0", "value": 0},
+            {"op": "replace", "path": "/a/1", "value": 10},
+            {"op": "remove", "path": "/a/2"},
+        ]
+    )
+    assert d.a == [0, 10, 3]
+
+    with pytest.raises(ValueError):
+        d.apply_patch([{"op": "move", "path": "/a", "from": "/b"}])
+    with pytest.raises(ValueError):
+        d.apply_patch([{"op": "remove", "path": ""}])
+    with pytest.raises(ValueError):
+        d.apply_patch([{"op": "remove", "path": "a"}])
+    with pytest.raises(ValueError):
+        d.apply_patch([{"op": "remove", "path": "/a/x"}])
+    with pytest.raises(IndexError):
+        d.apply_patch([{"op": "add", "path": "/a/5", "value": 1}])
+    with pytest.raises(KeyError):
+        d.apply_patch([{"op": "replace", "path": "/b", "value": 1}])
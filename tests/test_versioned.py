@@ -0,0 +1,135 @@
+import threading
+
+import pytest
+from diot import Diot, DiotFrozenError, OrderedDiot, VersionedDiot
+
+
+def test_snapshot():
+    vd = VersionedDiot({"db": {"host": "a", "port": 1}, "log": {"level": 1}})
+    snap = vd.snapshot()
+    assert vd.version == 0
+    assert snap is vd.snapshot()
+    assert isinstance(snap, Diot)
+    with pytest.raises(DiotFrozenError):
+        snap.x = 1
+    with pytest.raises(DiotFrozenError):
+        snap.db.host = "b"
+
+    vd.update_recursively({"db": {"host": "b"}, "new": {"x": 1}})
+    assert vd.version == 1
+    new = vd.snapshot()
+    assert snap.db.host == "a"
+    assert "new" not in snap
+    assert new.db == {"host": "b", "port": 1}
+    assert new.new.x == 1
+    # unchanged subtrees are shared
+    assert new.log is snap.log
+    with pytest.raises(DiotFrozenError):
+        new.db.host = "c"
+    with pytest.raises(DiotFrozenError):
+        new.new.x = 2
+
+    vd.update(log=2)
+    assert vd.snapshot().log == 2
+    assert vd.snapshot().db is new.db
+    assert new.log == {"level": 1}
+    assert repr(vd).startswith("VersionedDiot(")
+
+
+def test_snapshot_paths():
+    vd = VersionedDiot({"a-b": {"c": [{"d": 1}, {"d": 2}]}, "e": {"f": 1}})
+    snap = vd.snapshot()
+
+    vd.set_path("a_b.c[1].d", 3)
+    new = vd.snapshot()
+    assert new.a_b.c[1].d == 3
+    assert snap.a_b.c[1].d == 2
+    assert new.a_b.c[0] is snap.a_b.c[0]
+    assert new.e is snap.e
+    assert list(new) == ["a-b", "e"]
+
+    vd.set_path("x.y", {"z": 1})
+    assert vd.snapshot().x.y.z == 1
+    with pytest.raises(DiotFrozenError):
+        vd.snapshot().x.y.z = 2
+
+    vd.delete_path("a_b.c[0]")
+    assert vd.snapshot().a_b.c == ({"d": 3},)
+    vd.delete_path("e.f")
+    assert vd.snapshot().e == {}
+    assert snap.e == {"f": 1}
+    with pytest.raises(KeyError):
+        vd.delete_path("e.f")
+    with pytest.raises(ValueError):
+        vd.set_path("", 1)
+    with pytest.raises(TypeError):
+        vd.set_path("x.y.z.w", 1)
+
+
+def test_versioned_from_diot():
+    od = OrderedDiot([("b", {"x": 1}), ("a", 2)])
+    vd = VersionedDiot(od)
+    # the diot passed in is not frozen
+    od.b.x = 2
+    assert vd.snapshot().b.x == 1
+    vd.update(c=3)
+    snap = vd.snapshot()
+    assert isinstance(snap, OrderedDiot)
+    assert list(snap) == ["b", "a", "c"]
+
+    vd = VersionedDiot(a=1, diot_class=OrderedDiot)
+    assert isinstance(vd.snapshot(), OrderedDiot)
+
+
+def test_versioned_copies_values():
+    vd = VersionedDiot({"items": [{"a": 1}]})
+    snap = vd.snapshot()
+    # lists are published as tuples, with the items frozen
+    assert snap["items"] == ({"a": 1},)
+    with pytest.raises(DiotFrozenError):
+        snap["items"][0].a = 2
+
+    mine = Diot(x={"y": 1}, z=[{"w": 1}])
+    vd.update(db=mine)
+    vd.update_recursively({"new": mine})
+    vd.set_path("path.to", mine)
+    # the diot passed in is not frozen nor shared
+    mine.x.y = 2
+    mine.z.append(3)
+    snap = vd.snapshot()
+    for node in (snap.db, snap.new, snap.path.to):
+        assert node is not mine
+        assert node.x.y == 1
+        assert node.z == ({"w": 1},)
+        with pytest.raises(DiotFrozenError):
+            node.x.y = 3
+
+
+def test_versioned_concurrent():
+    vd = VersionedDiot({"conf": {"a": 0, "b": 0}})
+    errors = []
+    n_iter = 500
+
+    def writer():
+        for i in range(1, n_iter + 1):
+            vd.update_recursively({"conf": {"a": i, "b": i}})
+
+    def reader():
+        try:
+            for _ in range(n_iter):
+                snap = vd.snapshot()
+                # never a half-applied update
+                assert snap.conf.a == snap.conf.b
+        except Exception as exc:  # pragma: no cover
+            errors.append(exc)
+
+    threads = [threading.Thread(target=writer) for _ in range(2)]
+    threads += [threading.Thread(target=reader) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    assert vd.version == 2 * n_iter
+    assert vd.snapshot().conf == {"a": n_iter, "b": n_iter}
@@ -0,0 +1,127 @@
+import pytest
+
+from diot import Diot, DiotView, OrderedDiot
+from diot.view import DiotListView
+
+
+def test_read_through():
+    data = {"user": {"first-name": "a", "tags": [{"x": 1}]}, "in": 1, 2: "two"}
+    view = Diot.view(data)
+    assert isinstance(view, DiotView)
+    assert view.mapping is data
+    assert view.user.first_name == "a"
+    assert view["user"]["first_name"] == "a"
+    assert view._in == 1
+    assert view[2] == "two"
+    # lists are wrapped, and so are the dictionaries in them
+    tags = view.user.tags
+    assert isinstance(tags, DiotListView)
+    assert tags.sequence is data["user"]["tags"]
+    assert tags is view.user.tags
+    assert tags[0].x == 1
+    assert tags[0] is tags[-1]
+    assert tags == [{"x": 1}]
+    assert view.user == {"first-name": "a", "tags": [{"x": 1}]}
+    # the nested views are cached until the value is replaced
+    assert view.user is view.user
+    assert view.user.mapping is data["user"]
+    data["user"] = {"first-name": "b"}
+    assert view.user.first_name == "b"
+
+    assert "user" in view
+    assert "_in" in view
+    assert "x" not in view
+    assert list(view) == ["user", "in", 2]
+    assert len(view) == 3
+    assert repr(Diot.view({"a": 1})) == "DiotView({'a': 1})"
+
+    with pytest.raises(KeyError):
+        view["x"]
+    with pytest.raises(AttributeError):
+        view.x
+    assert view.get("x") is None
+
+
+def test_keymaps_refreshed():
+    data = {"a-b": 1}
+    view = Diot.view(data)
+    assert view.a_b == 1
+    data["c-d"] = 2
+    assert view.c_d == 2
+    del data["a-b"]
+    assert "a_b" not in view
+    # same size, but a different key
+    data["e-f"] = 3
+    del data["c-d"]
+    assert view.e_f == 3
+    assert "c_d" not in view
+
+
+def test_keymaps_not_rebuilt_on_misses():
+    calls = []
+
+    def transform(key):
+        calls.append(key)
+        return key.replace("-", "_")
+
+    data = {f"k-{i}": i for i in range(100)}
+    view = Diot.view(data, diot_transform=transform)
+    assert view.k_1 == 1
+    assert len(calls) == 100
+    for _ in range(10):
+        assert "x" not in view
+        assert view.get("x") is None
+        assert not hasattr(view, "x")
+    assert len(calls) == 100
+
+    # rebuilt when the keys may have changed
+    data["x-y"] = 1
+    assert view.x_y == 1
+    assert len(calls) == 201
+
+
+def test_write_through():
+    data = {"user": {"first-name": "a"}}
+    view = Diot.view(data, diot_transform="upper")
+    view.USER.FIRST_NAME = "b"
+    assert data == {"user": {"first-name": "b"}}
+    view.AGE = 30
+    view.other = view.USER
+    assert data["AGE"] == 30
+    assert data["other"] is data["user"]
+    del view.AGE
+    del view["other"]
+    assert data == {"user": {"first-name": "b"}}
+    with pytest.raises(AttributeError):
+        del view.AGE
+
+
+def test_list_write_through():
+    data = {"users": [{"first-name": "a"}, 1]}
+    view = Diot.view(data)
+    users = view.users
+    users[0].first_name = "b"
+    users.append({"first-name": "c"})
+    users.insert(0, view.users[0])
+    assert data["users"][0] is data["users"][1]
+    assert users[-1].first_name == "c"
+    assert [type(user) for user in users[:2]] == [DiotView, DiotView]
+    users[1] = users[-1]
+    del users[-1]
+    users[:1] = [0]
+    assert data == {"users": [0, {"first-name": "c"}, 1]}
+    assert len(users) == 3
+    assert repr(users) == "DiotListView([0, {'first-name': 'c'}, 1])"
+
+
+def test_diots_and_export():
+    diot = Diot(a={"b": 1})
+    data = {"d": diot, "e": {"f": [diot]}}
+    view = Diot.view(data)
+    assert view.d is diot
+    assert view.to_dict() == {"d": {"a": {"b": 1}}, "e": {"f": [{"a": {"b": 1}}]}}
+    assert type(view.to_dict()["d"]) is dict
+
+    out = view.e.to_diot(OrderedDiot)
+    assert isinstance(out, OrderedDiot)
+    assert out.f[0].a.b == 1
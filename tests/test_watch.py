@@ -0,0 +1,110 @@
+import os
+
+import pytest
+
+from diot import Diot, FileDiot, ObservableDiot
+from diot.changes import Change
+
+
+def _write(path, content):
+    """Write the file, making sure the signature changes"""
+    path.write_text(content)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_lazy_load(tmp_path):
+    path = tmp_path / "conf.json"
+    conf = Diot.watch_file(path)
+    assert isinstance(conf, FileDiot)
+    assert repr(conf) == f"FileDiot({str(path)!r})"
+    # not loaded until accessed
+    _write(path, '{"db": {"host": "a"}, "x-y": 1}')
+    assert conf.db.host == "a"
+    assert conf["x_y"] == 1
+    assert conf.get_path("db.host") == "a"
+    assert "db" in conf
+    assert list(conf) == ["db", "x-y"]
+    assert len(conf) == 2
+    assert isinstance(conf.diot, Diot)
+
+
+def test_reload_in_place(tmp_path):
+    path = tmp_path / "conf.yaml"
+    _write(path, "db:\n  host: a\n  port: 1\nlist: [1, 2, 3]\nold: 1\n")
+    conf = Diot.watch_file(path, interval=0)
+    tree = conf.diot
+    db = conf.db
+    assert conf.refresh() == []
+
+    _write(path, "db:\n  host: b\n  port: 1\nlist: [1, 2]\nnew: 2\n")
+    changes = conf.refresh()
+    assert Change("replace", "db.host", "a", "b") in changes
+    assert len(changes) == 4
+    assert conf.diot is tree
+    assert conf.db is db
+    assert db.host == "b"
+    assert tree == {"db": {"host": "b", "port": 1}, "list": [1, 2], "new": 2}
+
+
+def test_reload_non_string_keys(tmp_path):
+    path = tmp_path / "conf.yaml"
+    _write(path, "true: a\nnull: b\n2: c\nx:\n  false: d\n")
+    conf = Diot.watch_file(path, interval=0)
+    tree = conf.diot
+    assert tree[True] == "a"
+
+    _write(path, "true: A\nnull: B\n2: C\nx:\n  false: D\n")
+    changes = conf.refresh()
+    assert Change("replace", '["True"]', "a", "A") in changes
+    assert conf.diot is tree
+    assert tree == {True: "A", None: "B", 2: "C", "x": {False: "D"}}
+
+    _write(path, "null: B\n2: C\nx: {}\n")
+    conf.refresh()
+    assert tree == {None: "B", 2: "C", "x": {}}
+
+
+def test_interval(tmp_path):
+    path = tmp_path / "conf.json"
+    _write(path, '{"a": 1}')
+    conf = Diot.watch_file(path, interval=3600)
+    assert conf.a == 1
+    _write(path, '{"a": 2}')
+    # not checked again within the interval
+    assert conf.a == 1
+    conf.refresh()
+    assert conf.a == 2
+
+
+def test_frozen_and_observable(tmp_path):
+    path = tmp_path / "conf.json"
+    _write(path, '{"a": {"b": 1}}')
+    conf = ObservableDiot.watch_file(path, interval=0, diot_frozen=True)
+    conf.diot.freeze(True)
+    events = []
+    conf.subscribe(events.append)
+
+    _write(path, '{"a": {"b": 2}}')
+    assert conf.a.b == 2
+    assert events == [[Change("replace", "a.b", 1, 2)]]
+    assert conf.diot.__diot__["frozen"] is True
+    assert conf.a.__diot__["frozen"] is True
+
+
+def test_errors(tmp_path):
+    conf = Diot.watch_file(tmp_path / "conf.json")
+    with pytest.raises(FileNotFoundError):
+        conf.a
+
+    path = tmp_path / "conf.conf"
+    _write(path, "a = 1")
+    with pytest.raises(ValueError):
+        Diot.watch_file(path).a
+
+
+def test_fmt(tmp_path):
+    pytest.importorskip("tomllib")
+    path = tmp_path / "conf.conf"
+    _write(path, "a = 1")
+    assert Diot.watch_file(path, fmt="toml").a == 1